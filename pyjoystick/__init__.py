@@ -1,9 +1,18 @@
 from .__meta__ import version as __version__
 
-from .utils import deadband, change_path, rescale, PeriodicThread
+from .utils import deadband, change_path, rescale, PeriodicThread, AdaptiveInterval, OrderedExecutor, \
+    deadband_array, rescale_array
 from .stash import Stash
 from .button_repeater import Repeater, ButtonRepeater, HatRepeater, ButtonHatRepeater
-from .interface import Key, Joystick
+from .interface import Key, Joystick, JoystickStash
+from .composite import CompositeJoystick
+from .axis_response import AxisTable
+from .coalesce import CoalescePolicy, LatestValue, KeepAll, RateLimited, MinDelta
+from .stats import LatencyHistogram, EventStats
+from .profiler import SlowHandlerWarning, HandlerProfiler
+from .batch import KeyColumns, keys_to_columns
+from .history import ChannelHistory, DeviceHistory, HistoryRecorder
+from .consumer import Consumer
 
 try:
     from .sdl2 import Joystick as SDLJoystick, run_event_loop as run_sdl_loop
@@ -0,0 +1,151 @@
+import math
+
+
+__all__ = ['AxisTable']
+
+
+class AxisTable(object):
+    """Per-device axis processing table with a precomputed response curve for each axis.
+
+    Each axis has a deadband, an expo amount, and an optional curve function. These are compiled into a lookup table of
+    the output magnitude for the input magnitude, so processing a value is one table lookup with linear interpolation.
+
+    X/Y stick pairs use a radial deadband. The magnitude of the (x, y) vector goes through the pair's response curve
+    and both axes are scaled together, so a change on one axis also changes the other axis.
+
+    .. code-block:: python
+
+        table = AxisTable(deadband=0.1)
+        table.set_pair(0, 1, deadband=0.15, expo=0.3)  # Left stick
+        table.set_pair(3, 4, deadband=0.15)  # Right stick
+        table.set_axis(2, deadband=0)  # Trigger
+
+        mngr.set_axis_table(joy, table)
+    """
+
+    def __init__(self, deadband=0.2, expo=0, curve=None, resolution=1024):
+        """Initialize the table.
+
+        Args:
+            deadband (float)[0.2]: Default deadband for axes that were not set.
+            expo (float)[0]: Default expo amount 0 (linear) to 1 (cubic) for axes that were not set.
+            curve (callable/function)[None]: Default curve that takes a magnitude 0 to 1 after the deadband and expo
+                and returns the output magnitude 0 to 1.
+            resolution (int)[1024]: Number of lookup table segments for each response curve.
+        """
+        self.deadband = deadband
+        self.expo = expo
+        self.curve = curve
+        self.resolution = int(resolution)
+
+        self.axes = {}  # {number: (deadband, expo, curve)}
+        self.pairs = {}  # {x number: (y number, deadband, expo, curve)}
+        self.raw = {}  # {number: last raw value}
+
+        # Compiled tables
+        self.default_lut = None  # (deadband, lookup table)
+        self.luts = {}  # {number: (deadband, lookup table)}
+        self.partners = {}  # {number: (partner number, deadband, lookup table)}
+        self.compile()
+
+    def set_axis(self, number, deadband=None, expo=None, curve=None):
+        """Set the response for a single axis. None values use the table default."""
+        self.axes[number] = (deadband, expo, curve)
+        self.compile()
+
+    def set_pair(self, x, y, deadband=None, expo=None, curve=None):
+        """Process the x and y axes together with a radial deadband and response. None values use the table default."""
+        self.remove_pair(x)
+        self.remove_pair(y)
+        self.pairs[x] = (y, deadband, expo, curve)
+        self.compile()
+
+    def remove_pair(self, number):
+        """Stop processing the pair with the given x or y axis number together."""
+        for x, (y, *_) in list(self.pairs.items()):
+            if number == x or number == y:
+                del self.pairs[x]
+        self.compile()
+
+    @staticmethod
+    def response(magnitude, deadband=0.2, expo=0, curve=None):
+        """Return the output magnitude 0 to 1 for the input magnitude 0 to 1."""
+        if magnitude <= deadband:
+            return 0.0
+        if deadband >= 1:
+            return 1.0
+        value = min((magnitude - deadband) / (1 - deadband), 1.0)
+        if expo:
+            value = (1 - expo) * value + expo * value ** 3
+        if curve is not None:
+            value = min(max(float(curve(value)), 0.0), 1.0)
+        return value
+
+    def build_lut(self, deadband=None, expo=None, curve=None):
+        """Return the (deadband, lookup table) for the response. None values use the table default."""
+        if deadband is None:
+            deadband = self.deadband
+        if expo is None:
+            expo = self.expo
+        if curve is None:
+            curve = self.curve
+        deadband = abs(float(deadband))
+        res = self.resolution
+        return deadband, [self.response(i / res, deadband, expo, curve) for i in range(res + 1)]
+
+    def compile(self):
+        """Compile the response lookup tables."""
+        self.default_lut = self.build_lut()
+        self.luts = {number: self.build_lut(*response) for number, response in self.axes.items()}
+
+        partners = {}
+        for x, (y, *response) in self.pairs.items():
+            deadband, lut = self.build_lut(*response)
+            partners[x] = (y, deadband, lut)
+            partners[y] = (x, deadband, lut)
+        self.partners = partners
+
+    def process(self, number, value):
+        """Process the raw axis value.
+
+        Returns:
+            value (float): Processed value for the axis.
+            partner (int)[None]: Partner axis number if the axis is part of an X/Y pair.
+            partner_value (float)[None]: New processed value for the partner axis.
+        """
+        value = float(value)
+        self.raw[number] = value
+        res = self.resolution
+
+        pair = self.partners.get(number, None)
+        if pair is None:
+            deadband, lut = self.luts.get(number, self.default_lut)
+            mag = abs(value)
+            if mag <= deadband:
+                return 0.0, None, None
+            elif mag >= 1:
+                out = lut[res]
+            else:
+                pos = mag * res
+                i = int(pos)
+                out = lut[i] + (lut[i + 1] - lut[i]) * (pos - i)
+            return (out if value > 0 else -out), None, None
+
+        # Radial response for the X/Y pair
+        partner, deadband, lut = pair
+        partner_value = self.raw.get(partner, 0.0)
+        mag = math.hypot(value, partner_value)
+        if mag <= deadband:
+            return 0.0, partner, 0.0
+        elif mag >= 1:
+            out = lut[res]
+        else:
+            pos = mag * res
+            i = int(pos)
+            out = lut[i] + (lut[i + 1] - lut[i]) * (pos - i)
+        scale = out / mag
+        return value * scale, partner, partner_value * scale
+
+    def reset(self):
+        """Forget the saved raw axis values."""
+        self.raw = {}
@@ -0,0 +1,44 @@
+import math
+from array import array
+from collections import namedtuple
+
+from pyjoystick.interface import KeyTypes
+
+
+__all__ = ['KeyColumns', 'keys_to_columns']
+
+
+KeyColumns = namedtuple('KeyColumns', 'devices types numbers values timestamps')
+KeyColumns.__doc__ = """Columnar batch of key events.
+
+Each column is an array.array, so it can be wrapped by NumPy without a copy (numpy.frombuffer(columns.values)).
+
+Attributes:
+    devices (array('i')): Device index of each key's joystick (manager.devices) or -1 if the joystick is not saved.
+    types (array('b')): Key type code of each key (KeyTypes.from_code).
+    numbers (array('i')): Key number of each key.
+    values (array('d')): Value of each key or NaN if the value is not a number (ball motion tuples).
+    timestamps (array('d')): time.perf_counter() when each key was received or NaN if it was not recorded. The event
+        managers timestamp keys when batch_columns or stats are enabled.
+"""
+
+
+def keys_to_columns(keys, device_index=None):
+    """Return the keys as a KeyColumns batch.
+
+    Args:
+        keys (list): Ordered list of Key objects.
+        device_index (dict)[None]: {joystick: device index}. If None all devices are -1.
+
+    Returns:
+        columns (KeyColumns): Columnar batch of the keys.
+    """
+    if device_index is None:
+        device_index = {}
+    to_code = KeyTypes.to_code
+    nan = math.nan
+    return KeyColumns(array('i', [device_index.get(key.joystick, -1) for key in keys]),
+                      array('b', [to_code(key.keytype) for key in keys]),
+                      array('i', [key.number for key in keys]),
+                      array('d', [key.value if isinstance(key.value, (int, float)) else nan for key in keys]),
+                      array('d', [getattr(key, 'timestamp', nan) for key in keys]))
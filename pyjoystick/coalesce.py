@@ -0,0 +1,119 @@
+import time
+from collections import OrderedDict
+
+
+__all__ = ['CoalescePolicy', 'LatestValue', 'KeepAll', 'RateLimited', 'MinDelta']
+
+
+class CoalescePolicy(object):
+    """Decide how a key event is saved in a joystick's event buffer until the next dispatch.
+
+    The event buffer for a joystick is {'events': OrderedDict(), 'buttons': Stash()}. 'events' keeps the latest value
+    for each key and 'buttons' keeps every key in order.
+    """
+
+    def save(self, items, key, value):
+        """Save the key event in the joystick's event buffer items. The event manager's event_lock is held."""
+        raise NotImplementedError
+
+    def pop_due(self, now=None):
+        """Return a list of (key, value) that were held back and should be dispatched now."""
+        return []
+
+    def reset(self):
+        """Clear any saved state."""
+        pass
+
+
+class LatestValue(CoalescePolicy):
+    """Only keep the latest value for each key."""
+
+    def save(self, items, key, value):
+        items['events'][key] = value
+
+
+class KeepAll(CoalescePolicy):
+    """Keep every key event in order."""
+
+    def save(self, items, key, value):
+        items['buttons'].append(key)
+
+
+class RateLimited(CoalescePolicy):
+    """Dispatch each key at most `rate` times a second.
+
+    Key events that arrive too soon are held back and the latest held value is dispatched on a later dispatch tick.
+    """
+
+    def __init__(self, rate=30, clock=time.monotonic):
+        """Initialize the policy.
+
+        Args:
+            rate (float)[30]: Maximum number of events per second for each key.
+            clock (callable)[time.monotonic]: Function that returns the time in seconds.
+        """
+        self.interval = 1 / rate
+        self.clock = clock
+        self.last_times = {}  # {(joystick, keytype, number): time}
+        self.held = OrderedDict()  # {(joystick, keytype, number): (key, value)}
+
+    def save(self, items, key, value):
+        k = (key.joystick, key.keytype, key.number)
+        now = self.clock()
+        if now - self.last_times.get(k, float('-inf')) >= self.interval:
+            self.last_times[k] = now
+            self.held.pop(k, None)
+            items['events'][key] = value
+        else:
+            self.held[k] = (key, value)
+
+    def pop_due(self, now=None):
+        if not self.held:
+            return []
+        if now is None:
+            now = self.clock()
+
+        due = []
+        for k, item in list(self.held.items()):
+            if now - self.last_times[k] >= self.interval:
+                self.last_times[k] = now
+                del self.held[k]
+                due.append(item)
+        return due
+
+    def reset(self):
+        self.last_times.clear()
+        self.held.clear()
+
+
+class MinDelta(CoalescePolicy):
+    """Only keep key events where the value changed by at least `delta` since the last kept value."""
+
+    def __init__(self, delta=0.01, keep_all=False):
+        """Initialize the policy.
+
+        Args:
+            delta (float)[0.01]: Minimum change in value to keep a key event.
+            keep_all (bool)[False]: If True keep every changed event in order else only keep the latest value.
+        """
+        self.delta = delta
+        self.keep_all = keep_all
+        self.last_values = {}  # {(joystick, keytype, number): value}
+
+    def save(self, items, key, value):
+        k = (key.joystick, key.keytype, key.number)
+        last = self.last_values.get(k, None)
+        try:
+            if last is not None and abs(value - last) < self.delta:
+                return
+        except TypeError:
+            pass  # Values that can not be subtracted always change
+
+        self.last_values[k] = value
+        if self.keep_all:
+            items['buttons'].append(key)
+        else:
+            items['events'][key] = value
+
+    def reset(self):
+        self.last_values.clear()
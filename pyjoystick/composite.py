@@ -0,0 +1,136 @@
+from pyjoystick.interface import Key, Joystick
+
+
+__all__ = ['CompositeJoystick']
+
+
+class CompositeJoystick(Joystick):
+    """Virtual joystick that merges inputs from several physical joysticks into one device.
+
+    Source inputs are declared with `map()` and compiled into remap tables. When the event manager finds a source
+    joystick the tables are bound to that joystick, so a key event is remapped with one table lookup and a list index.
+
+    .. code-block:: python
+
+        flight = CompositeJoystick('Flight Controls')
+        flight.map('Stick', Key.AXIS, 0)  # Virtual Axis 0
+        flight.map('Stick', Key.AXIS, 1)  # Virtual Axis 1
+        flight.map('Throttle', Key.AXIS, 0, 2)  # Virtual Axis 2
+        flight.map('Pedals', Key.AXIS, 2)  # Virtual Axis 3
+        flight.map('Stick', Key.BUTTON, 0)  # Virtual Button 0
+
+        mngr = ThreadEventManager(run_event_loop, handle_key_event=handle_key_event)
+        mngr.add_composite(flight)
+    """
+
+    def __init__(self, name='Composite Joystick', identifier=-1, mapping=None, passthrough=False, deadband=0.2):
+        """Initialize the composite joystick.
+
+        Args:
+            name (str)['Composite Joystick']: Name of the virtual joystick.
+            identifier (int)[-1]: Id of the virtual joystick. This should not match a physical joystick id.
+            mapping (list)[None]: List of (source, keytype, number[, virtual_number]) to map.
+            passthrough (bool)[False]: If True source keys that are not mapped are still sent for the source joystick.
+            deadband (float)[0.2]: Deadband for the virtual joystick axes.
+        """
+        self.identifier = identifier
+        self.name = name
+        self.numaxes = 0
+        self.numbuttons = 0
+        self.numhats = 0
+        self.numballs = 0
+        self.deadband = deadband
+        self.passthrough = passthrough
+
+        self.sources = []  # List of source identifiers (Joystick, name, or id)
+        self.mapping = []  # List of (source, keytype, number, virtual_number)
+        self.tables = {}  # {source: {keytype: [virtual_number or None]}}
+
+        super().__init__()
+
+        if mapping is not None:
+            for item in mapping:
+                self.map(*item)
+
+    def __reduce__(self):
+        """Pickle with the mapping and rebuild the remap tables through __init__."""
+        return self.__class__, (self.name, self.identifier, list(self.mapping), self.passthrough, self.deadband)
+
+    def is_available(self):
+        """Return if this joystick is still active and available."""
+        return True
+
+    def close(self):
+        """Close the joystick."""
+        pass
+
+    def map(self, source, keytype, number, virtual_number=None):
+        """Map a source joystick input to a virtual input.
+
+        Args:
+            source (Joystick/str/int): Source joystick, joystick name, or joystick id.
+            keytype (str): Key type of the source input (Key.AXIS, Key.BUTTON, Key.HAT, Key.BALL).
+            number (int): Source input number.
+            virtual_number (int)[None]: Virtual input number of the same keytype. If None use the next number.
+
+        Returns:
+            virtual_number (int): Virtual input number.
+        """
+        count_attr = 'num' + self.get_key_attr(keytype)
+        if virtual_number is None:
+            virtual_number = getattr(self, count_attr)
+
+        self.mapping.append((source, keytype, number, virtual_number))
+        if source not in self.sources:
+            self.sources.append(source)
+        setattr(self, count_attr, max(getattr(self, count_attr), virtual_number + 1))
+
+        self.compile()
+        return virtual_number
+
+    @staticmethod
+    def get_key_attr(keytype):
+        """Return the attribute name for the keytype (axis, button, hat, ball)."""
+        attr = str(keytype).lower()
+        if attr == 'axis':
+            return 'axes'
+        return attr + 's'
+
+    def compile(self):
+        """Compile the mapping into remap tables and initialize the virtual keys."""
+        tables = {}
+        for source, keytype, number, virtual_number in self.mapping:
+            table = tables.setdefault(source, {}).setdefault(keytype, [])
+            if number >= len(table):
+                table.extend([None] * (number + 1 - len(table)))
+            table[number] = virtual_number
+
+        self.tables = tables
+        self.init_keys()
+
+    def bind(self, joy):
+        """Return the remap table for the given physical joystick or None if it is not a source joystick."""
+        for source in self.sources:
+            if joy is not self and joy.matches(source):
+                return self.tables[source]
+        return None
+
+    def remap_key(self, key, table):
+        """Return the virtual key for the source key using the bound remap table.
+
+        Returns:
+            key (Key)[None]: Virtual key, the source key if passthrough, or None if the source input is not mapped.
+        """
+        try:
+            number = table[key.keytype][key.number]
+        except (KeyError, IndexError, TypeError):
+            number = None
+
+        if number is None:
+            if self.passthrough:
+                return key
+            return None
+
+        new_key = Key(key.keytype, number, key.raw_value, self, is_repeat=key.is_repeat, override=key.override)
+        new_key.source_key = key
+        return new_key
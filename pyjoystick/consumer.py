@@ -0,0 +1,174 @@
+import threading
+import traceback
+from collections import OrderedDict
+
+from pyjoystick.interface import Key
+from pyjoystick.coalesce import CoalescePolicy, LatestValue, KeepAll
+
+
+__all__ = ['Consumer']
+
+
+class Consumer(object):
+    """Independent receiver of an event manager's key events with its own bounded buffer and delivery thread.
+
+    The event thread saves each key in every consumer's buffer by reference. A consumer with a callback delivers the
+    saved keys on its own thread, so a slow consumer does not hold up the other consumers or the manager's handlers.
+    A consumer without a callback is pulled with poll().
+
+    .. code-block:: python
+
+        ui = mngr.add_consumer(Consumer(update_ui, name='ui'))
+        recorder = mngr.add_consumer(Consumer(write_keys, batch=True, coalesce_policies={Key.AXIS: KeepAll()}))
+        network = mngr.add_consumer(Consumer(name='network'))  # network.poll() on its own schedule
+
+    Overflow Policies (when a joystick has queue_limit ordered events waiting):
+        * 'drop_oldest' - Remove the oldest waiting event.
+        * 'drop_newest' - Do not save the new event.
+    """
+
+    DROP_OLDEST = 'drop_oldest'
+    DROP_NEWEST = 'drop_newest'
+
+    def __init__(self, callback=None, name='pyjoystick-Consumer', queue_limit=1024, overflow=DROP_OLDEST,
+                 coalesce_policies=None, batch=False, hold_timeout=0.01):
+        """Initialize the consumer.
+
+        Args:
+            callback (callable/function)[None]: Called with each key (or a list of keys if batch) on the delivery
+                thread. If None the consumer does not start a thread and the keys are pulled with poll().
+            name (str)['pyjoystick-Consumer']: Delivery thread name.
+            queue_limit (int)[1024]: Maximum number of ordered events waiting for each joystick. 0 for no limit.
+            overflow (str)['drop_oldest']: 'drop_oldest' or 'drop_newest' when a joystick's events are full.
+            coalesce_policies (dict)[None]: {keytype: CoalescePolicy} for this consumer. By default axes keep the
+                latest value and other keys keep every event.
+            batch (bool)[False]: If True call the callback once with the list of keys for each delivery.
+            hold_timeout (float)[0.01]: Seconds between checking for held coalesced events that are due.
+        """
+        if overflow not in (self.DROP_OLDEST, self.DROP_NEWEST):
+            raise ValueError('Invalid overflow policy {!r}'.format(overflow))
+
+        self.callback = callback
+        self.name = name
+        self.queue_limit = queue_limit
+        self.overflow = overflow
+        self.batch = batch
+        self.hold_timeout = hold_timeout
+
+        self.coalesce_policies = {Key.AXIS: LatestValue(), Key.BUTTON: KeepAll(), Key.HAT: KeepAll(),
+                                  Key.BALL: KeepAll()}
+        if coalesce_policies is not None:
+            self.coalesce_policies.update(coalesce_policies)
+        self._holds_events = any(type(policy).pop_due is not CoalescePolicy.pop_due
+                                 for policy in self.coalesce_policies.values())
+
+        self.lock = threading.Condition()
+        self.events = {}  # {joystick: {'events': {key: value}, 'buttons': [key]}}
+        self.ready = False  # If events were saved since the last delivery
+        self.dropped = 0
+        self.delivered = 0
+
+        self.alive = threading.Event()
+        self.thread = None
+
+    def put(self, key):
+        """Save the key in this consumer's buffer. This is called on the event thread."""
+        with self.lock:
+            items = self.events.get(key.joystick, None)
+            if items is None:
+                items = self.events[key.joystick] = {'events': OrderedDict(), 'buttons': []}
+            try:
+                policy = self.coalesce_policies[key.keytype]
+            except KeyError:
+                policy = self.coalesce_policies.setdefault(key.keytype, KeepAll())
+            policy.save(items, key, key.value)
+
+            buttons = items['buttons']
+            if self.queue_limit and len(buttons) > self.queue_limit:
+                if self.overflow == self.DROP_OLDEST:
+                    del buttons[0]
+                else:
+                    buttons.pop()
+                self.dropped += 1
+
+            self.ready = True
+            self.lock.notify()
+
+    def poll(self):
+        """Return and clear the saved events as {joystick: {'events': {key: value}, 'buttons': [key]}}."""
+        with self.lock:
+            events, self.events = self.events, {}
+            self.ready = False
+            if self._holds_events:
+                for policy in set(self.coalesce_policies.values()):
+                    for key, value in policy.pop_due():
+                        items = events.get(key.joystick, None)
+                        if items is None:
+                            items = events[key.joystick] = {'events': OrderedDict(), 'buttons': []}
+                        items['events'][key] = value
+        return events
+
+    def poll_keys(self):
+        """Return and clear the saved events as a list of keys with the latest values then the ordered events."""
+        keys = []
+        for joystick, items in self.poll().items():
+            for key, value in items['events'].items():
+                if key.value != value:
+                    # Keys are shared with the other consumers, so do not change the saved key's value
+                    key = key.copy()
+                    key.value = value
+                keys.append(key)
+            keys.extend(items['buttons'])
+        return keys
+
+    def deliver(self):
+        """Call the callback with the saved keys."""
+        keys = self.poll_keys()
+        if not keys:
+            return
+
+        try:
+            if self.batch:
+                self.callback(keys)
+            else:
+                for key in keys:
+                    self.callback(key)
+        except Exception:
+            traceback.print_exc()
+        self.delivered += len(keys)
+
+    def run(self):
+        """Deliver the saved keys as soon as they are saved until the consumer is stopped."""
+        timeout = self.hold_timeout if self._holds_events else None
+        while self.alive.is_set():
+            with self.lock:
+                if not self.ready:
+                    self.lock.wait(timeout)
+            if self.alive.is_set():
+                self.deliver()
+
+    def is_running(self):
+        """Return if the delivery thread is running."""
+        return self.alive.is_set()
+
+    def start(self):
+        """Start the delivery thread if there is a callback."""
+        if self.callback is None or self.is_running():
+            return self
+        self.alive.set()
+        self.thread = threading.Thread(target=self.run, name=self.name)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the delivery thread."""
+        self.alive.clear()
+        with self.lock:
+            self.lock.notify_all()
+        try:
+            self.thread.join(0)
+        except (AttributeError, Exception):
+            pass
+        self.thread = None
+        return self
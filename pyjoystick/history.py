@@ -0,0 +1,186 @@
+import time
+import threading
+from array import array
+
+
+__all__ = ['ChannelHistory', 'DeviceHistory', 'HistoryRecorder']
+
+
+class ChannelHistory(object):
+    """Fixed capacity ring of (time, value) samples for one key of a device.
+
+    Samples are stored in preallocated array('d') buffers. Times must be added in increasing order, so time window
+    queries are binary searches.
+    """
+
+    def __init__(self, capacity=4096):
+        """Initialize the ring.
+
+        Args:
+            capacity (int)[4096]: Number of samples to keep.
+        """
+        self.capacity = int(capacity)
+        self.times = array('d', bytes(8 * self.capacity))
+        self.values = array('d', bytes(8 * self.capacity))
+        self.count = 0  # Total samples added
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, timestamp, value):
+        """Add a sample."""
+        i = self.count % self.capacity
+        self.times[i] = timestamp
+        self.values[i] = value
+        self.count += 1
+
+    def clear(self):
+        """Remove all samples."""
+        self.count = 0
+
+    def _bisect(self, timestamp, right=True):
+        """Return the index (oldest is 0) of the first sample after (right) or at (left) the timestamp."""
+        capacity = self.capacity
+        first = self.count - len(self)
+        times = self.times
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            t = times[(first + mid) % capacity]
+            if t < timestamp or (right and t == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _slice(self, buffer, i, j):
+        """Return the samples i to j (oldest is 0) from the buffer as a new array."""
+        length = j - i
+        if length <= 0:
+            return array('d')
+        start = (self.count - len(self) + i) % self.capacity
+        end = start + length
+        if end <= self.capacity:
+            return buffer[start:end]
+        return buffer[start:] + buffer[:end - self.capacity]
+
+    def window(self, start=None, end=None):
+        """Return the (times, values) arrays of the samples from the start time to the end time (inclusive)."""
+        i = 0 if start is None else self._bisect(start, right=False)
+        j = len(self) if end is None else self._bisect(end, right=True)
+        return self._slice(self.times, i, j), self._slice(self.values, i, j)
+
+    def value_at(self, timestamp, default=None):
+        """Return the value of the latest sample at or before the timestamp."""
+        i = self._bisect(timestamp) - 1
+        if i < 0:
+            return default
+        return self.values[(self.count - len(self) + i) % self.capacity]
+
+
+class DeviceHistory(object):
+    """History of the key values for one device. Each key has its own ChannelHistory ring."""
+
+    def __init__(self, capacity=4096, clock=time.perf_counter):
+        """Initialize the device history.
+
+        Args:
+            capacity (int)[4096]: Number of samples to keep for each key.
+            clock (callable)[time.perf_counter]: Function that returns the time in seconds.
+        """
+        self.capacity = capacity
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.channels = {}  # {(keytype, number): ChannelHistory}
+
+    def record(self, keytype, number, value, timestamp=None):
+        """Add a sample of the key value. Values that are not numbers are saved as NaN."""
+        if timestamp is None:
+            timestamp = self.clock()
+        if not isinstance(value, (int, float)):
+            value = float('nan')
+        with self.lock:
+            channel = self.channels.get((keytype, number), None)
+            if channel is None:
+                channel = self.channels[(keytype, number)] = ChannelHistory(self.capacity)
+            channel.append(timestamp, value)
+
+    def window(self, keytype, number, seconds=None, start=None, end=None):
+        """Return the (times, values) arrays for the key.
+
+        Args:
+            keytype (str): Key type (Key.AXIS, Key.BUTTON, Key.HAT, Key.BALL).
+            number (int): Key number.
+            seconds (float)[None]: Return the last seconds of samples before end (or now).
+            start (float)[None]: Start time. If None and seconds is None return from the oldest sample.
+            end (float)[None]: End time. If None return to the newest sample.
+        """
+        if seconds is not None:
+            start = (self.clock() if end is None else end) - seconds
+        with self.lock:
+            channel = self.channels.get((keytype, number), None)
+            if channel is None:
+                return array('d'), array('d')
+            return channel.window(start, end)
+
+    def value_at(self, keytype, number, timestamp, default=None):
+        """Return the key value at the given time."""
+        with self.lock:
+            channel = self.channels.get((keytype, number), None)
+            if channel is None:
+                return default
+            return channel.value_at(timestamp, default)
+
+    def state_at(self, timestamp):
+        """Return the {(keytype, number): value} of every key that had a value at the given time."""
+        state = {}
+        with self.lock:
+            for k, channel in self.channels.items():
+                value = channel.value_at(timestamp)
+                if value is not None:
+                    state[k] = value
+        return state
+
+    def clear(self):
+        """Remove all samples."""
+        with self.lock:
+            self.channels = {}
+
+
+class HistoryRecorder(object):
+    """Record the processed key values of each joystick in a DeviceHistory.
+
+    .. code-block:: python
+
+        mngr = ThreadEventManager(run_event_loop, record_history=True)
+        ...
+        history = mngr.history.get(joy)
+        times, values = history.window(Key.AXIS, 3, seconds=2)  # Last 2 seconds of axis 3
+        state = history.state_at(time.perf_counter() - 0.5)  # {(keytype, number): value} half a second ago
+    """
+
+    def __init__(self, capacity=4096, clock=time.perf_counter):
+        """Initialize the recorder.
+
+        Args:
+            capacity (int)[4096]: Number of samples to keep for each key of each joystick.
+            clock (callable)[time.perf_counter]: Function that returns the time in seconds.
+        """
+        self.capacity = capacity
+        self.clock = clock
+        self.devices = {}  # {joystick: DeviceHistory}
+
+    def record(self, key):
+        """Add a sample of the key value to the key's joystick history."""
+        history = self.devices.get(key.joystick, None)
+        if history is None:
+            history = self.devices.setdefault(key.joystick, DeviceHistory(self.capacity, self.clock))
+        history.record(key.keytype, key.number, key.value)
+
+    def get(self, joystick, default=None):
+        """Return the DeviceHistory for the joystick."""
+        return self.devices.get(joystick, default)
+
+    def clear(self):
+        """Remove the history for all joysticks."""
+        self.devices = {}
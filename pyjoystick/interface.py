@@ -1,7 +1,12 @@
+import copy
+import collections
+import functools
+import weakref
+
 from .stash import Stash
 
 
-__all__ = ['KeyTypes', 'HatValues', 'Key', 'Joystick']
+__all__ = ['KeyTypes', 'HatValues', 'Key', 'KeyTemplate', 'Joystick', 'JoystickStash']
 
 
 class KeyTypes:
@@ -12,6 +17,20 @@ class KeyTypes:
     BALL = "Ball"
     ALL_KEYTYPES = ','.join((AXIS, BUTTON, HAT, BALL))
 
+    # Small integer codes used to serialize a key type
+    TYPE_CODES = {AXIS: 0, BUTTON: 1, HAT: 2, BALL: 3}
+    CODE_TYPES = {code: keytype for keytype, code in TYPE_CODES.items()}
+
+    @classmethod
+    def to_code(cls, keytype):
+        """Return the integer code for the given keytype. Unknown keytypes are returned as is."""
+        return cls.TYPE_CODES.get(keytype, keytype)
+
+    @classmethod
+    def from_code(cls, code):
+        """Return the keytype for the given integer code. Unknown codes are returned as is."""
+        return cls.CODE_TYPES.get(code, code)
+
     @classmethod
     def has_keytype(cls, keytype, key_types):
         try:
@@ -162,6 +181,10 @@ class Key(object):
     convert_to_hat_value = staticmethod(HatValues.convert_to_hat_value)
     convert_to_hat_range = staticmethod(HatValues.as_range)
 
+    # Serialization flags
+    FLAG_REPEAT = 1
+    FLAG_OVERRIDE = 2
+
     def __init__(self, keytype, number, value=None, joystick=None, is_repeat=False, override=False):
         self.keytype = keytype
         self.number = number
@@ -221,6 +244,10 @@ class Key(object):
         return self.__class__(self.keytype, self.number, self.value, self.joystick,
                               is_repeat=False, override=self.override)
 
+    # Rendered keynames by (keytype, number, negative or hat value)
+    KEYNAME_CACHE_SIZE = 1024
+    _keyname_cache = {}
+
     @classmethod
     def to_keyname(cls, key):
         """Return this key as a string keyname.
@@ -233,7 +260,31 @@ class Key(object):
             * "-Axis 1" - For an Axis Key that has a negative value and needs to be inverted.
             * "Button 0" - Buttons wont have negative values
             * "Hat 0 [Left Up]" - Hat values also give the key value as a hat name.
+
+        Note:
+            Keynames are cached, so the same keyname is not formatted every time.
         """
+        if key.keytype == cls.HAT:
+            cache_key = (key.keytype, key.number, key.raw_value)
+        else:
+            cache_key = (key.keytype, key.number, bool(key.value and key.value < 0))
+
+        try:
+            return cls._keyname_cache[cache_key]
+        except KeyError:
+            pass
+        except TypeError:  # Unhashable value
+            return cls.format_keyname(key)
+
+        keyname = cls.format_keyname(key)
+        if len(cls._keyname_cache) >= cls.KEYNAME_CACHE_SIZE:
+            cls._keyname_cache.clear()
+        cls._keyname_cache[cache_key] = keyname
+        return keyname
+
+    @classmethod
+    def format_keyname(cls, key):
+        """Format and return the keyname without using the cache. See to_keyname for the format."""
         prefix = ''
         if key.value and key.value < 0:
             prefix = '-'
@@ -243,30 +294,18 @@ class Key(object):
         else:
             return '{}{} {}'.format(prefix, key.keytype, key.number)
 
+    @staticmethod
+    def parse_keyname(keyname):
+        """Return an immutable KeyTemplate(keytype, number, value) for the given string keyname.
+
+        Results are memoized, so keynames loaded from a config are only parsed once.
+        """
+        return _parse_keyname(str(keyname))
+
     @classmethod
     def from_keyname(cls, keyname, joystick=None):
         """Return a new key from the given keyname."""
-        # Remove any joystick name attached
-        keyname = str(keyname)
-        if ':' in keyname:
-            keyname = keyname.split(':', 1)[-1].strip()
-
-        # Split the keyname
-        keytype, number = keyname.split(' ', 1)
-
-        # Check if the keyname starts with a negative.
-        value = None
-        if keytype.startswith('-'):
-            value = -1
-            keytype = keytype[1:].strip()
-
-        # Check if the number has '['
-        if '[' in number:
-            number, hat_name = number.split('[', 1)
-            number = number.strip()
-            value = int(cls.convert_to_hat_value(hat_name.replace(']', '').strip()))
-        number = int(number)
-
+        keytype, number, value = cls.parse_keyname(keyname)
         return Key(keytype, number, value, joystick=joystick)
 
     @property
@@ -297,6 +336,44 @@ class Key(object):
     def __hash__(self):
         return hash('{} {}'.format(self.keytype, self.number))
 
+    _REDUCE_ATTRS = ('keytype', 'number', 'raw_value', 'joystick', 'is_repeat', 'override')
+
+    def __reduce__(self):
+        """Pickle as (device id, type code, number, value, flags) instead of the whole joystick graph.
+
+        The device id is the joystick's (identifier, name). The joystick is resolved against the registered joysticks
+        when unpickled. If the joystick is not registered the key gets a lightweight joystick reference.
+        """
+        try:
+            device_id = self.joystick._identity
+        except (AttributeError, Exception):
+            device_id = None
+        flags = 0
+        if self.is_repeat:
+            flags |= self.FLAG_REPEAT
+        if self.override:
+            flags |= self.FLAG_OVERRIDE
+
+        args = (device_id, KeyTypes.to_code(self.keytype), self.number, self.raw_value, flags)
+
+        # Keep extra attributes (controller_key_name) without the standard attributes
+        state = {k: v for k, v in self.__dict__.items() if k not in self._REDUCE_ATTRS}
+        if self.__class__ is not Key:
+            return _restore_key, args + (self.__class__,), state or None
+        return _restore_key, args, state or None
+
+    def __copy__(self):
+        """Copy the key with the same joystick. Copies do not use the pickled reference or the registry."""
+        key = object.__new__(self.__class__)
+        key.__dict__.update(self.__dict__)
+        return key
+
+    def __deepcopy__(self, memo):
+        key = object.__new__(self.__class__)
+        memo[id(self)] = key
+        key.__dict__.update(copy.deepcopy(self.__dict__, memo))
+        return key
+
     def __eq__(self, other):
         try:
             if other.keytype == self.keytype and other.number == self.number:
@@ -313,7 +390,56 @@ class Key(object):
             return False
 
 
+KeyTemplate = collections.namedtuple('KeyTemplate', 'keytype number value')
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_keyname(keyname):
+    """Parse the string keyname and return a KeyTemplate."""
+    # Remove any joystick name attached
+    if ':' in keyname:
+        keyname = keyname.split(':', 1)[-1].strip()
+
+    # Split the keyname
+    keytype, number = keyname.split(' ', 1)
+
+    # Check if the keyname starts with a negative.
+    value = None
+    if keytype.startswith('-'):
+        value = -1
+        keytype = keytype[1:].strip()
+
+    # Check if the number has '['
+    if '[' in number:
+        number, hat_name = number.split('[', 1)
+        number = number.strip()
+        value = int(HatValues.convert_to_hat_value(hat_name.replace(']', '').strip()))
+    number = int(number)
+
+    return KeyTemplate(keytype, number, value)
+
+
+def _restore_key(device_id, type_code, number, value, flags, cls=Key):
+    """Create a key from the values given by Key.__reduce__."""
+    joystick = None
+    if device_id is not None:
+        identifier, name = device_id
+        joystick = Joystick.get_registered(identifier, name)
+        if joystick is None:
+            joystick = _new_joystick_reference(Joystick, identifier, name)
+    return cls(KeyTypes.from_code(type_code), number, value, joystick=joystick,
+               is_repeat=bool(flags & Key.FLAG_REPEAT), override=bool(flags & Key.FLAG_OVERRIDE))
+
+
 class Joystick(object):
+    _identifier = -1
+    _name = ''
+    _identity = (-1, '')
+    _hash = hash(_identity)
+
+    # Joysticks by (identifier, name) for resolving pickled references. Use register() and get_registered().
+    REGISTRY = weakref.WeakValueDictionary()
+
     @classmethod
     def get_joysticks(cls):
         """Return a list of available joysticks."""
@@ -341,6 +467,12 @@ class Joystick(object):
 
         self.deadband = getattr(self, 'deadband', 0.2)
 
+        # Axis change threshold (hysteresis) to ignore jitter
+        self.axis_threshold = getattr(self, 'axis_threshold', 0)
+        self.axis_thresholds = getattr(self, 'axis_thresholds', {})  # {axis number: threshold}
+        self.suppressed_events = getattr(self, 'suppressed_events', 0)
+        self._forwarded_axes = {}  # {axis number: last forwarded value}
+
         self.init_keys()
 
     def init_keys(self):
@@ -420,18 +552,91 @@ class Joystick(object):
         """Return the deadband for this joystick axis."""
         self.deadband = value
 
+    def get_axis_threshold(self, number=None):
+        """Return the change threshold for the given axis number or the joystick's default threshold."""
+        if number is None:
+            return self.axis_threshold
+        return self.axis_thresholds.get(number, self.axis_threshold)
+
+    def set_axis_threshold(self, value, number=None):
+        """Set the change threshold for the given axis number or the joystick's default threshold.
+
+        Axis values that changed less than the threshold since the last forwarded value are suppressed.
+        Use None with an axis number to use the joystick's default threshold for that axis.
+        """
+        if number is None:
+            self.axis_threshold = value
+        elif value is None:
+            self.axis_thresholds.pop(number, None)
+        else:
+            self.axis_thresholds[number] = value
+
+    def check_axis_change(self, number, value):
+        """Return True if the axis value should be forwarded or False if it changed less than the axis threshold.
+
+        A value of 0 (at rest) is always forwarded if it changed. Suppressed values are counted in suppressed_events.
+        """
+        last = self._forwarded_axes.get(number, None)
+        if last is not None and last != value and value != 0:
+            try:
+                if abs(value - last) < self.axis_thresholds.get(number, self.axis_threshold):
+                    self.suppressed_events += 1
+                    return False
+            except TypeError:
+                pass
+        self._forwarded_axes[number] = value
+        return True
+
+    @property
+    def identifier(self):
+        """Joystick id. Setting the id updates the cached identity."""
+        return self._identifier
+
+    @identifier.setter
+    def identifier(self, value):
+        self._identifier = value
+        self._update_identity()
+
+    @property
+    def name(self):
+        """Joystick name. Setting the name updates the cached identity."""
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = value
+        self._update_identity()
+
+    def _update_identity(self):
+        """Cache the (identifier, name) identity and the hash used for equality."""
+        self._identity = (self._identifier, self._name)
+        self._hash = hash(self._identity)
+
+    def matches(self, other):
+        """Return if the other value refers to this joystick.
+
+        This is a loose match by joystick name, joystick id, or internal joystick object. Use == for an exact match.
+
+        Args:
+            other (Joystick/str/int/object): Joystick, name, id, or internal joystick object.
+        """
+        joystick = self.joystick
+        if isinstance(other, Joystick):
+            return (self == other or self.get_name() == other.get_name() or
+                    (joystick is not None and joystick == other.joystick))
+        elif isinstance(other, str):
+            return self.get_name() == other
+        elif isinstance(other, int) and not isinstance(other, bool):
+            return self.get_id() == other
+        return joystick is not None and joystick == other
+
     def __eq__(self, other):
-        name, my_id, joystick = self.get_name(), self.get_id(), self.joystick
-        try:
-            return name == other.get_name() or my_id == other or (joystick == other.joystick and joystick is not None)
-        except:
-            pass
-        try:
-            is_id = not isinstance(other, bool) and my_id == other
-            return is_id or name == other or (joystick == other and joystick is not None)
-        except:
-            pass
-        return False
+        """Return if the other joystick has the same identifier and name. Use matches() for a loose match."""
+        if other is self:
+            return True
+        elif isinstance(other, Joystick):
+            return self._hash == other._hash and self._identity == other._identity
+        return NotImplemented
 
     def __int__(self):
         return self.get_id()
@@ -440,27 +645,126 @@ class Joystick(object):
         return self.get_name()
 
     def __hash__(self):
-        return hash('{} {}'.format(self.identifier, self.name))
-
-    def __getstate__(self):
-        return {
-            'joystick': None,
-            'identifier': self.identifier,
-            'name': self.name,
-            'numaxes': self.numaxes,
-            'numbuttons': self.numbuttons,
-            'numhats': self.numhats,
-            'numballs': self.numballs,
-
-            'axis': self.axis,
-            'button': self.button,
-            'hat': self.hat,
-            'ball': self.ball,
-            'keys': self.keys,
-
-            'deadband': self.deadband
-            }
-
-    def __setstate__(self, state):
-        for k, v in state.items():
-            setattr(self, k, v)
+        return self._hash
+
+    def register(self):
+        """Register this joystick so pickled keys and joysticks with the same identifier and name resolve to this
+        object.
+        """
+        self.REGISTRY[self._identity] = self
+        return self
+
+    def unregister(self):
+        """Remove this joystick from the registered joysticks."""
+        try:
+            if self.REGISTRY[self._identity] is self:
+                del self.REGISTRY[self._identity]
+        except (KeyError, Exception):
+            pass
+
+    @classmethod
+    def get_registered(cls, identifier, name=None, default=None):
+        """Return the registered joystick for the given identifier and name or the default value.
+
+        If name is None return any registered joystick with the identifier.
+        """
+        if name is not None:
+            return cls.REGISTRY.get((identifier, name), default)
+        for (reg_id, _), joy in list(cls.REGISTRY.items()):
+            if reg_id == identifier:
+                return joy
+        return default
+
+    def __reduce__(self):
+        """Pickle as a lightweight reference. The keys and the internal joystick object are not sent."""
+        return _restore_joystick, (self.__class__, self.identifier, self.name, self.numaxes, self.numbuttons,
+                                   self.numhats, self.numballs, self.deadband)
+
+    def __copy__(self):
+        """Copy the joystick. Copies do not use the pickled reference or the registry."""
+        joy = object.__new__(self.__class__)
+        joy.__dict__.update(self.__dict__)
+        return joy
+
+    def __deepcopy__(self, memo):
+        joy = object.__new__(self.__class__)
+        memo[id(self)] = joy
+        joy.__dict__.update(copy.deepcopy(self.__dict__, memo))
+        return joy
+
+
+class JoystickStash(Stash):
+    """Stash that finds joysticks with a loose match by joystick, name, id, or internal joystick object.
+
+    A Joystick key is first checked for an exact match (same identifier and name) with every joystick, so two
+    joysticks of the same model do not resolve to the first one.
+    """
+
+    @staticmethod
+    def compare(list_item, key):
+        """Compare each list item with the given key to find the right object in the list."""
+        if isinstance(list_item, Joystick):
+            return list_item.matches(key)
+        elif isinstance(key, Joystick):
+            return key.matches(list_item)
+        return list_item == key
+
+    def _exact_index(self, key):
+        """Return the index of the joystick with the same identifier and name as the given joystick or -1."""
+        if isinstance(key, Joystick):
+            for i, list_item in enumerate(self):
+                if key == list_item:
+                    return i
+        return -1
+
+    def __getitem__(self, key):
+        i = self._exact_index(key)
+        if i >= 0:
+            return list.__getitem__(self, i)
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        i = self._exact_index(key)
+        if i >= 0:
+            return list.__setitem__(self, i, value)
+        return super().__setitem__(key, value)
+
+    def __contains__(self, key):
+        return self._exact_index(key) >= 0 or super().__contains__(key)
+
+    def pop(self, key, default=None):
+        i = self._exact_index(key)
+        if i >= 0:
+            return list.pop(self, i)
+        return super().pop(key, default)
+
+    def remove(self, key):
+        i = self._exact_index(key)
+        if i >= 0:
+            return list.pop(self, i)
+        return super().remove(key)
+
+
+def _new_joystick_reference(cls, identifier, name, numaxes=-1, numbuttons=-1, numhats=-1, numballs=-1,
+                            deadband=0.2):
+    """Create a lightweight joystick object without opening a device or registering it."""
+    # Do not call cls() which may try to open a device (SDL, pygame)
+    joy = object.__new__(cls)
+    joy.joystick = None
+    joy.identifier = identifier
+    joy.name = name
+    joy.numaxes = numaxes
+    joy.numbuttons = numbuttons
+    joy.numhats = numhats
+    joy.numballs = numballs
+    joy.deadband = deadband
+    Joystick.__init__(joy)
+    return joy
+
+
+def _restore_joystick(cls, identifier, name, numaxes, numbuttons, numhats, numballs, deadband):
+    """Return the registered joystick for the reference or create and register a new joystick object."""
+    joy = Joystick.get_registered(identifier, name)
+    if joy is not None:
+        return joy
+    return _new_joystick_reference(cls, identifier, name, numaxes, numbuttons, numhats, numballs, deadband).register()
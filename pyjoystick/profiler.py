@@ -0,0 +1,146 @@
+import sys
+import time
+import threading
+import warnings
+
+
+__all__ = ['SlowHandlerWarning', 'HandlerProfiler']
+
+
+class SlowHandlerWarning(RuntimeWarning):
+    """Warning for a handler call that took longer than the profiler budget."""
+    pass
+
+
+class HandlerProfiler(object):
+    """Time each handler call and aggregate the results for each callable.
+
+    .. code-block:: python
+
+        profiler = HandlerProfiler(budget=0.005)
+        mngr = ThreadEventManager(run_event_loop, handle_key_event=handle_key_event, profiler=profiler)
+        ...
+        profiler.dump(10)
+    """
+
+    def __init__(self, budget=None, on_slow=None):
+        """Initialize the profiler.
+
+        Args:
+            budget (float)[None]: Seconds a single call may take before it is reported as slow. None to not report.
+            on_slow (callable/function)[None]: Called with (func, duration_ns) for a slow call. If None warn with a
+                SlowHandlerWarning.
+        """
+        self.budget_ns = None
+        self.budget = budget
+        self.on_slow = on_slow
+        self.lock = threading.Lock()
+        self.records = {}  # {func: [calls, total_ns, max_ns, slow_calls]}
+
+    @property
+    def budget(self):
+        """Seconds a single call may take before it is reported as slow."""
+        if self.budget_ns is None:
+            return None
+        return self.budget_ns / 1e9
+
+    @budget.setter
+    def budget(self, value):
+        self.budget_ns = None if value is None else int(value * 1e9)
+
+    def call(self, func, *args, **kwargs):
+        """Call the function with the args and record how long the call took."""
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.record(func, time.perf_counter_ns() - start)
+
+    def wrap(self, func):
+        """Return a function that calls and times the given function."""
+        if func is None:
+            return None
+
+        def profiled(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+        profiled.__wrapped__ = func
+        return profiled
+
+    def record(self, func, duration_ns):
+        """Save the duration of a call to the function and report the call if it was over budget."""
+        is_slow = self.budget_ns is not None and duration_ns > self.budget_ns
+        with self.lock:
+            rec = self.records.get(func, None)
+            if rec is None:
+                rec = self.records[func] = [0, 0, 0, 0]
+            rec[0] += 1
+            rec[1] += duration_ns
+            if duration_ns > rec[2]:
+                rec[2] = duration_ns
+            if is_slow:
+                rec[3] += 1
+
+        if is_slow:
+            self.report_slow(func, duration_ns)
+
+    def report_slow(self, func, duration_ns):
+        """Report a call that was over budget."""
+        if self.on_slow is not None:
+            self.on_slow(func, duration_ns)
+        else:
+            warnings.warn('{} took {:.3f} ms (budget {:.3f} ms)'.format(
+                self.get_name(func), duration_ns / 1e6, self.budget_ns / 1e6), SlowHandlerWarning, stacklevel=3)
+
+    @staticmethod
+    def get_name(func):
+        """Return a readable name for the callable."""
+        name = getattr(func, '__qualname__', None) or getattr(func, '__name__', None)
+        if name is None:
+            return repr(func)
+        module = getattr(func, '__module__', None)
+        if module and module != '__main__':
+            return '{}.{}'.format(module, name)
+        return name
+
+    def reset(self):
+        """Clear all of the recorded calls."""
+        with self.lock:
+            self.records = {}
+
+    def top(self, n=10, sort='total'):
+        """Return a list of the n callables with the highest times.
+
+        Args:
+            n (int)[10]: Number of callables to return. If None return all callables.
+            sort (str)['total']: 'total', 'max', 'mean', 'calls', or 'slow' to sort by.
+
+        Returns:
+            rows (list): List of dictionaries with the 'func', 'name', 'calls', 'total_ns', 'mean_ns', 'max_ns', and
+                'slow' calls.
+        """
+        with self.lock:
+            items = [(func, list(rec)) for func, rec in self.records.items()]
+
+        rows = [{'func': func, 'name': self.get_name(func), 'calls': calls, 'total_ns': total,
+                 'mean_ns': total / calls, 'max_ns': max_ns, 'slow': slow}
+                for func, (calls, total, max_ns, slow) in items]
+        sort_key = {'total': 'total_ns', 'max': 'max_ns', 'mean': 'mean_ns'}.get(sort, sort)
+        rows.sort(key=lambda row: row[sort_key], reverse=True)
+        if n is not None:
+            rows = rows[:n]
+        return rows
+
+    def format_top(self, n=10, sort='total'):
+        """Return the top n callables as a text table with times in milliseconds."""
+        lines = ['{:>8} {:>12} {:>10} {:>10} {:>6}  {}'.format('calls', 'total ms', 'mean ms', 'max ms', 'slow', 'name')]
+        for row in self.top(n, sort):
+            lines.append('{:>8} {:>12.3f} {:>10.3f} {:>10.3f} {:>6}  {}'.format(
+                row['calls'], row['total_ns'] / 1e6, row['mean_ns'] / 1e6, row['max_ns'] / 1e6, row['slow'],
+                row['name']))
+        return '\n'.join(lines)
+
+    def dump(self, n=10, sort='total', file=None):
+        """Print the top n callables table."""
+        if file is None:
+            file = sys.stdout
+        print(self.format_top(n, sort), file=file, flush=True)
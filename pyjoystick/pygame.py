@@ -7,8 +7,7 @@ from pyjoystick.utils import rescale
 
 import pygame
 
-from pyjoystick.stash import Stash
-from pyjoystick.interface import HatValues, Key, Joystick as BaseJoystick
+from pyjoystick.interface import HatValues, Key, JoystickStash, Joystick as BaseJoystick
 
 
 __all__ = ['Key', 'Joystick', 'run_event_loop', 'stop_event_wait',
@@ -27,7 +26,7 @@ class Joystick(BaseJoystick):
         if not get_init():
             init()
 
-        return Stash(cls(i) for i in range(pygame.joystick.get_count()))
+        return JoystickStash(cls(i) for i in range(pygame.joystick.get_count()))
 
     def __new__(cls, identifier=None, *args, **kwargs):
         # Check init
@@ -167,7 +166,7 @@ def refresh_joysticks(joysticks=None):
     """Refresh the joystick list and return a list of all of the joysticks, new joysticks, and removed joysticks.
 
     Args:
-        joysticks (list/Stash): List of pygame.joystick.Joystick objects.
+        joysticks (list/JoystickStash): List of pygame.joystick.Joystick objects.
 
     Returns:
         sticks (list): List of all pygame.joystick.Joystick objects.
@@ -175,9 +174,11 @@ def refresh_joysticks(joysticks=None):
         removed (list): List of removed joysticks that were in the given list of joysticks, but were not found.
     """
     if joysticks is None:
-        joysticks = []
+        joysticks = JoystickStash()
+    elif not isinstance(joysticks, JoystickStash):
+        joysticks = JoystickStash(joysticks)  # Find joysticks by name
 
-    sticks = Stash()
+    sticks = JoystickStash()
     new = {}
     removed = {}
 
@@ -232,7 +233,7 @@ def run_event_loop(add_joystick, remove_joystick, handle_key_event, alive=None,
     if alive is None:
         alive = lambda: True
 
-    joysticks = Stash()
+    joysticks = JoystickStash()
     last_refresh = 0  # For disconnect and reconnect
 
     if not get_init():
@@ -0,0 +1,90 @@
+
+
+__all__ = ['RingBuffer']
+
+
+class RingBuffer(object):
+    """Preallocated single producer single consumer ring buffer.
+
+    One thread calls `put()` and one thread calls `drain()`. Neither side takes a lock. The producer only writes the
+    write index and the consumer only writes the read index.
+
+    Overflow Policies:
+        * 'drop_newest' - Do not add new items when the ring is full.
+        * 'drop_oldest' - Overwrite the oldest items. The consumer skips the overwritten items. When the ring is
+          full the consumer also skips the oldest item, because the producer may be overwriting it.
+    """
+
+    DROP_NEWEST = 'drop_newest'
+    DROP_OLDEST = 'drop_oldest'
+
+    def __init__(self, capacity=1024, overflow=DROP_NEWEST):
+        """Initialize the ring buffer.
+
+        Args:
+            capacity (int)[1024]: Number of items the ring can hold.
+            overflow (str)['drop_newest']: What to do when the ring is full ('drop_newest', 'drop_oldest').
+        """
+        if overflow not in (self.DROP_NEWEST, self.DROP_OLDEST):
+            raise ValueError('Invalid overflow policy {!r}'.format(overflow))
+
+        self.capacity = int(capacity)
+        self.overflow = overflow
+        self.items = [None] * self.capacity
+        self.write_index = 0  # Total items put. Only changed by the producer
+        self.read_index = 0  # Total items drained. Only changed by the consumer
+        self.dropped = 0  # Items the producer did not add
+        self.overwritten = 0  # Items the consumer skipped because the producer overwrote them
+
+    def __len__(self):
+        return min(self.write_index - self.read_index, self.capacity)
+
+    def put(self, item):
+        """Add an item to the ring. Return False if the item was dropped."""
+        index = self.write_index
+        if index - self.read_index >= self.capacity and self.overflow == self.DROP_NEWEST:
+            self.dropped += 1
+            return False
+
+        self.items[index % self.capacity] = item
+        self.write_index = index + 1  # Publish the item
+        return True
+
+    def peek_overwrite(self):
+        """Return the unread item the next put() overwrites or None. This should only be called by the producer."""
+        index = self.write_index
+        if self.overflow == self.DROP_OLDEST and index - self.read_index >= self.capacity:
+            return self.items[index % self.capacity]
+        return None
+
+    def drain(self):
+        """Remove and return a list of all available items in order."""
+        start = self.read_index
+        end = self.write_index
+        if end - start > self.capacity:
+            start = end - self.capacity  # Oldest items were overwritten
+
+        capacity = self.capacity
+        i, j = start % capacity, end % capacity
+        if end - start == 0:
+            items = []
+        elif i < j:
+            items = self.items[i:j]
+        else:
+            items = self.items[i:] + self.items[:j]
+
+        # The producer may have overwritten items while they were copied
+        if self.overflow == self.DROP_OLDEST:
+            # The producer stores slot W % capacity before it publishes write_index W + 1, so the item at W - capacity
+            # may already be overwritten.
+            valid = min(self.write_index - capacity + 1, end)
+            if valid > start:
+                del items[:valid - start]
+                start = valid
+            self.overwritten += start - self.read_index
+        self.read_index = end
+        return items
+
+    def clear(self):
+        """Remove all items. This should only be called by the consumer."""
+        self.drain()
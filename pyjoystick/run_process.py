@@ -2,27 +2,157 @@ import traceback
 import time
 import threading
 import multiprocessing as mp
-from queue import Empty
+from collections import deque
+from queue import Empty, Full
 
 from pyjoystick.stash import Stash
-from pyjoystick.utils import PeriodicThread
 from pyjoystick.run_thread import ThreadEventManager
 
 
 class MultiprocessingEventManager(ThreadEventManager):
     def __init__(self, event_loop=None, add_joystick=None, remove_joystick=None, handle_key_event=None, alive=None,
-                 button_repeater=None, activity_timeout=0.01):
+                 button_repeater=None, activity_timeout=0.01, dispatch_mode=ThreadEventManager.DISPATCH_PERIODIC,
+                 batch_timeout=0, queue_limit=0, buffer_overflow=ThreadEventManager.OVERFLOW_DROP_OLDEST,
+                 block_timeout=1, collect_stats=False, profiler=None):
+        """Initialize the event manager.
+
+        Args:
+            queue_limit (int)[0]: Maximum number of commands waiting in the queue to the main process. If 0 the queue
+                is not bounded. Key events that do not fit are handled with buffer_overflow and counted in
+                dropped_events. Joystick add and remove commands are never dropped.
+            buffer_overflow (str)['drop_oldest']: 'drop_oldest', 'drop_newest', or 'block' when the queue is full.
+                'drop_oldest' keeps the commands in an outbox in the event process that a sender thread moves to the
+                queue. When queue_limit key events are waiting in the outbox the oldest waiting key event is dropped.
+            block_timeout (float)[1]: Seconds the 'block' overflow policy waits for room before dropping the event.
+            collect_stats (bool)[False]: If True collect stats() in the main process. Enable stats before start() to
+                measure the latency from the event process.
+            profiler (HandlerProfiler)[None]: Profiler to time the callbacks in the main process.
+
+        See ThreadEventManager for the other arguments.
+        """
         if alive is None:
             alive = mp.Event()
         self.proc = None
-        self.queue = mp.Queue()
+        self.queue_limit = queue_limit
+        self.queue = mp.Queue(queue_limit)
+        self._unsent_dropped = {}  # {joystick: count} dropped in the event process and not sent yet
+        self._outbox = None  # deque of (cmd, is key event) for the 'drop_oldest' policy
+        self._outbox_ready = None  # Condition notified when a command is added to the outbox
+        self._outbox_keys = 0  # Number of key event commands in the outbox
         super().__init__(event_loop=event_loop, add_joystick=add_joystick, remove_joystick=remove_joystick,
                          handle_key_event=handle_key_event, alive=alive, button_repeater=button_repeater,
-                         activity_timeout=activity_timeout)
+                         activity_timeout=activity_timeout, dispatch_mode=dispatch_mode, batch_timeout=batch_timeout,
+                         buffer_overflow=buffer_overflow, block_timeout=block_timeout, collect_stats=collect_stats,
+                         profiler=profiler)
 
     def send_cmd(self, name, *args, **kwars):
         """Send a command to the main process."""
-        self.queue.put((name, args, kwars))
+        if self._outbox is not None:
+            self._post_cmd((name, args, kwars))  # Keep the order with the key events waiting in the outbox
+        else:
+            self.queue.put((name, args, kwars))
+
+    def _post_cmd(self, cmd, is_key=False):
+        """Add the command to the outbox. If too many key events are waiting drop the oldest key event."""
+        if self._outbox is None:
+            self._start_sender()
+
+        with self._outbox_ready:
+            outbox = self._outbox
+            outbox.append((cmd, is_key))
+            if is_key:
+                self._outbox_keys += 1
+                if self._outbox_keys > self.queue_limit:
+                    for i, (old_cmd, old_is_key) in enumerate(outbox):
+                        if old_is_key:  # Never drop joystick commands
+                            del outbox[i]
+                            self._outbox_keys -= 1
+                            self._count_unsent(old_cmd[1][0])
+                            break
+            self._outbox_ready.notify()
+
+    def _start_sender(self):
+        """Create the outbox and start the thread that moves its commands to the queue."""
+        self._outbox = deque()
+        self._outbox_ready = threading.Condition()
+        self._outbox_keys = 0
+        sender = threading.Thread(target=self._send_outbox, name='pyjoystick-send_outbox')
+        sender.daemon = True
+        sender.start()
+
+    def _send_outbox(self):
+        """Move the outbox commands to the queue in order followed by the dropped event counts. Waits while the
+        queue is full.
+        """
+        outbox = self._outbox
+        while True:
+            with self._outbox_ready:
+                while not outbox:
+                    self._outbox_ready.wait()
+                cmd, is_key = outbox.popleft()
+                if is_key:
+                    self._outbox_keys -= 1
+                dropped, self._unsent_dropped = self._unsent_dropped, {}
+            self.queue.put(cmd)
+            if dropped:
+                self.queue.put(('receive_dropped_events', (dropped,), {}))
+
+    def send_key_cmd(self, name, key):
+        """Send a key event command to the main process using the overflow policy if the queue is full.
+
+        Returns:
+            success (bool): True if the command was put on the queue.
+        """
+        cmd = (name, (key,), {})
+        if not self.queue_limit:
+            self.queue.put(cmd)
+            return True
+
+        if self.buffer_overflow == self.OVERFLOW_BLOCK:
+            try:
+                self.queue.put(cmd, timeout=self.block_timeout)
+                return True
+            except Full:
+                pass
+
+        elif self.buffer_overflow == self.OVERFLOW_DROP_OLDEST:
+            # Never take commands back off of the queue. That would change the order of the commands.
+            self._post_cmd(cmd, is_key=True)
+            return True
+
+        else:
+            try:
+                self.queue.put_nowait(cmd)
+                return True
+            except Full:
+                pass
+
+        self._count_unsent(key)
+        return False
+
+    def _count_unsent(self, key):
+        """Count a key event that was dropped in the event process."""
+        try:
+            joystick = key.joystick
+        except AttributeError:
+            joystick = None
+        self._unsent_dropped[joystick] = self._unsent_dropped.get(joystick, 0) + 1
+
+    def _send_dropped_events(self):
+        """Send the dropped event counts to the main process if there is room in the queue."""
+        if self._outbox is not None:
+            return  # The outbox sender sends the counts
+        dropped, self._unsent_dropped = self._unsent_dropped, {}
+        try:
+            self.queue.put_nowait(('receive_dropped_events', (dropped,), {}))
+        except Full:
+            for joystick, count in dropped.items():
+                self._unsent_dropped[joystick] = self._unsent_dropped.get(joystick, 0) + count
+
+    def receive_dropped_events(self, dropped):
+        """Add the {joystick: count} of key events the event process dropped to dropped_events."""
+        for joystick, count in dropped.items():
+            self.count_dropped(joystick, count)
 
     def _save_joystick(self, joy):
         self.save_joystick(joy)
@@ -34,13 +164,57 @@ class MultiprocessingEventManager(ThreadEventManager):
 
     def _handle_key_event(self, key):
         """Function to handle key event happens"""
-        self.send_cmd('handle_key_event', key)
+        # Send the saved joystick's identity, which the main process registered, not the event's joystick identity
+        self.resolve_key_joystick(key)
+
+        # Apply the composite remap, axis tables, deadband, and axis threshold before the key crosses the process
+        # boundary, so axis jitter is not sent. Calls queue_key_event.
+        self.process_key_event(key)
+
+    def queue_key_event(self, key):
+        """Send the processed key to the main process. This is called in the event process."""
+        try:
+            key.joystick.update_key(key)  # The axis checks compare with the event process joystick
+        except (AttributeError, Exception):
+            pass
+        if self.send_key_cmd('receive_key_event', key) and self._unsent_dropped:
+            self._send_dropped_events()
+
+    def receive_key_event(self, key):
+        """Update the main process joystick with the received key and handle the key event.
+
+        Keys are pickled as (device id, type code, number, value, flags) and resolve to the registered joystick.
+        """
+        self.resolve_key_joystick(key)
+        stats = self.event_stats
+        if stats is not None:
+            stats.add_received(key)
+        if (stats is not None or self.batch_columns) and getattr(key, 'timestamp', None) is None:
+            key.timestamp = time.perf_counter()
+
+        if self.history is not None:
+            self.history.record(key)
+
+        for consumer in self.consumers:
+            consumer.put(key)
+
+        if self.dispatch_mode == self.DISPATCH_POLL:
+            self._update_key_event(key)  # Save for poll()
+            return
+
+        try:
+            key.joystick.update_key(key)
+        except (AttributeError, Exception):
+            pass
+        self.dispatch_keys([key])
 
     def process_queue(self):
         """Continually process the Queue data."""
         while self.is_running():
             try:
                 func_name, args, kwargs = self.queue.get(timeout=2)
+                if self.event_stats is not None:
+                    self._add_queue_depth(self.event_stats)
                 func = getattr(self, func_name, None)
                 if func:
                     func(*args, **kwargs)
@@ -49,6 +223,13 @@ class MultiprocessingEventManager(ThreadEventManager):
             except Exception:
                 traceback.print_exc()
 
+    def _add_queue_depth(self, stats):
+        """Save the queue depth high-water mark including the command that was just received."""
+        try:
+            stats.add_depth('queue', self.queue.qsize() + 1)
+        except NotImplementedError:
+            pass  # qsize is not available on macOS
+
     def run(self, event_loop, add_joystick, remove_joystick, handle_key_event, alive=None, button_repeater=None,
             queue=None):
         """Run the an event loop to process SDL Events.
@@ -66,11 +247,8 @@ class MultiprocessingEventManager(ThreadEventManager):
         self.button_repeater = button_repeater
         self.queue = queue
 
-        # Run process events on a timer
-        self.worker = PeriodicThread(self.activity_timeout, self.process_events)
-        self.worker.alive = self.alive  # stop when this event stops
-        self.worker.daemon = True
-        self.worker.start()
+        # Run process events on a timer or when key events are saved
+        self.worker = self.start_dispatcher()
 
         if button_repeater is not None:
             button_repeater.start()
@@ -93,4 +271,16 @@ class MultiprocessingEventManager(ThreadEventManager):
         self.worker = threading.Thread(target=self.process_queue, name='pyjoystick-process_queue')
         self.worker.daemon = True
         self.worker.start()
+
+        for consumer in self.consumers:
+            consumer.start()
         return self
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['queue_limit'] = self.queue_limit
+        state['_unsent_dropped'] = {}
+        state['_outbox'] = None
+        state['_outbox_ready'] = None
+        state['_outbox_keys'] = 0
+        return state
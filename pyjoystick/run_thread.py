@@ -1,34 +1,190 @@
 import contextlib
 import time
+import queue
 import threading
 from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeoutError
 
 from pyjoystick.stash import Stash
-from pyjoystick.utils import PeriodicThread, deadband
+from pyjoystick.interface import KeyTypes, Key, JoystickStash
+from pyjoystick.ring_buffer import RingBuffer
+from pyjoystick.coalesce import CoalescePolicy, LatestValue, KeepAll
+from pyjoystick.stats import EventStats
+from pyjoystick.batch import keys_to_columns
+from pyjoystick.history import HistoryRecorder
+from pyjoystick.consumer import Consumer
+from pyjoystick.utils import PeriodicThread, AdaptiveInterval, OrderedExecutor, deadband
 
 
 class ThreadEventManager(object):
 
     JOYSTICK_PROXY = None
 
+    # Dispatch modes
+    DISPATCH_PERIODIC = 'periodic'  # Process events every activity_timeout
+    DISPATCH_EVENT = 'event'  # Process events as soon as a key event is saved
+    DISPATCH_POLL = 'poll'  # No dispatcher. The application calls poll() to get the saved events
+    DISPATCH_ADAPTIVE = 'adaptive'  # Process events with an interval that follows the event rate
+
+    # Transports between the event thread and the dispatcher
+    TRANSPORT_BUFFER = 'buffer'  # Locked double buffered dictionaries
+    TRANSPORT_RING = 'ring'  # Lock free single producer single consumer ring of event records
+
+    # Handler ordering for the handler thread pool
+    ORDER_JOYSTICK = 'joystick'  # Key events for the same joystick are handled in order
+    ORDER_KEY = 'key'  # Key events for the same key are handled in order
+
+    # Overflow policies for bounded event buffers
+    OVERFLOW_DROP_OLDEST = 'drop_oldest'  # Remove the oldest buffered event to make room
+    OVERFLOW_DROP_NEWEST = 'drop_newest'  # Do not save the new event
+    OVERFLOW_BLOCK = 'block'  # Wait for the dispatcher to make room, then drop the new event after block_timeout
+
     def __init__(self, event_loop=None, add_joystick=None, remove_joystick=None, handle_key_event=None, alive=None,
-                 button_repeater=None, activity_timeout=1/30):
+                 button_repeater=None, activity_timeout=1/30, dispatch_mode=DISPATCH_PERIODIC, batch_timeout=0,
+                 transport=TRANSPORT_BUFFER, ring_capacity=1024, ring_overflow=RingBuffer.DROP_NEWEST,
+                 coalesce_policies=None, handler_workers=0, handler_order=ORDER_JOYSTICK, handler_queue_limit=256,
+                 priority_keys=None, priority_limit=256, buffer_limit=0, buffer_overflow=OVERFLOW_DROP_OLDEST,
+                 block_timeout=1, collect_stats=False, profiler=None, handle_key_events=None, batch_per_device=False,
+                 batch_columns=False, record_history=False, history_capacity=4096, min_interval=0.002,
+                 max_interval=0.1, sleep_when_idle=True):
+        """Initialize the event manager.
+
+        Args:
+            event_loop (callable/function)[None]: Event loop function to run.
+            add_joystick (callable/function)[None]: Called when a new Joystick is found!
+            remove_joystick (callable/function)[None]: Called when a Joystick is removed!
+            handle_key_event (callable/function)[None]: Called when a new key event occurs!
+            alive (threading.Event)[None]: Event that is set while running.
+            button_repeater (ButtonRepeater)[None]: Thread which will monitor button keys and trigger repeating.
+            activity_timeout (float)[1/30]: Seconds between processing events for the 'periodic' dispatch mode. The
+                'event' dispatch mode also wakes this often while a coalesce policy holds back key events.
+            dispatch_mode (str)['periodic']: 'periodic' to process events every activity_timeout, 'event' to
+                process events as soon as a key event is saved without waking up while idle, 'adaptive' to process
+                events with an interval that shrinks while events are flowing and grows while idle, or 'poll' to not
+                run a dispatcher and get the saved events with poll().
+            batch_timeout (float)[0]: Seconds to wait after the first key event in the 'event' dispatch mode to
+                batch (coalesce) axis events.
+            transport (str)['buffer']: 'buffer' to save key events in locked dictionaries or 'ring' to save event
+                records (device index, type code, number, value, timestamp) in a lock free ring buffer.
+            ring_capacity (int)[1024]: Number of event records the 'ring' transport holds.
+            ring_overflow (str)['drop_newest']: 'drop_newest' or 'drop_oldest' when the ring is full.
+                Dropped records are counted in ring.dropped and ring.overwritten.
+            coalesce_policies (dict)[None]: {keytype: CoalescePolicy} to change how key events are saved until the
+                next dispatch. By default axes keep the latest value and other keys keep every event.
+            handler_workers (int)[0]: If greater than 0 run handle_key_event and the subscribed callbacks on a thread
+                pool with this many threads instead of on the dispatch thread.
+            handler_order (str)['joystick']: 'joystick' to handle events for the same joystick in order or 'key' to
+                handle events for the same key in order. Other events are handled in parallel.
+            handler_queue_limit (int)[256]: Number of events that can wait for each ordering key before the
+                dispatcher blocks.
+            priority_keys (list)[None]: Keytypes (Key.BUTTON) or (keytype, number) keys to dispatch right away on the
+                priority lane instead of waiting for the next dispatch. Priority keys are handled on their own
+                thread, so the handlers can be called at the same time as the dispatcher. See add_priority_key.
+            priority_limit (int)[256]: Number of keys that can wait on the priority lane. Keys that do not fit are
+                handled with buffer_overflow. 0 for no limit.
+            buffer_limit (int)[0]: Maximum number of ordered events ('buttons') buffered for each joystick between
+                dispatches. If 0 the buffers are not bounded.
+            buffer_overflow (str)['drop_oldest']: 'drop_oldest', 'drop_newest', or 'block' when a buffer is full.
+                Dropped events are counted for each joystick in dropped_events.
+            block_timeout (float)[1]: Seconds the 'block' overflow policy waits for room before dropping the event.
+            collect_stats (bool)[False]: If True collect counters and timing for stats(). See enable_stats.
+            profiler (HandlerProfiler)[None]: Profiler to time the add_joystick, remove_joystick, handle_key_event,
+                subscribed, and button repeater callbacks.
+            handle_key_events (callable/function)[None]: Called once per dispatch with the batch of key events.
+            batch_per_device (bool)[False]: If True call handle_key_events once per joystick instead of once per
+                dispatch.
+            batch_columns (bool)[False]: If True handle_key_events receives a KeyColumns batch of arrays instead of
+                a list of keys. Keys are timestamped when they are received for the timestamps column.
+            record_history (bool)[False]: If True record the processed key values of each joystick in history.
+            history_capacity (int)[4096]: Number of samples to keep for each key of each joystick.
+            min_interval (float)[0.002]: Shortest seconds between processing events for the 'adaptive' dispatch mode.
+            max_interval (float)[0.1]: Longest seconds between processing events for the 'adaptive' dispatch mode.
+            sleep_when_idle (bool)[True]: If True the 'adaptive' dispatch mode stops waking at max_interval while
+                idle and waits for the next key event.
+        """
         super().__init__()
 
         if alive is None:
             alive = threading.Event()
 
         self.activity_timeout = activity_timeout
+        self.dispatch_mode = dispatch_mode
+        self.scheduler = AdaptiveInterval(min_interval, max_interval, activity_timeout,
+                                          sleep_when_idle=sleep_when_idle)
+        self.batch_timeout = batch_timeout
+        self.events_ready = threading.Event()  # Set when key events are saved
         self._button_repeater = None
+        self._profiler = profiler
 
         self.event_loop = event_loop
-        self.joysticks = Stash()
+        self.joysticks = JoystickStash()
+        self._saved_joysticks = {}  # {joystick: saved joystick} to find the saved joystick for a key exactly
         self.alive = alive
         self.proc = None
         self.worker = None
+        self._run_during_lock = threading.Lock()
+        self._run_during_users = 0  # Number of run_during calls that are waiting
+        self._run_during_started = False  # If run_during started the manager
 
         self.event_lock = threading.RLock()
-        self.joystick_events = {}
+        self.drain_lock = threading.RLock()  # Held while the drained (back) buffer is used
+        self.joystick_events = {}  # Front buffer the event thread writes to
+        self._back_events = {}  # Back buffer the dispatcher drains
+
+        if buffer_overflow not in (self.OVERFLOW_DROP_OLDEST, self.OVERFLOW_DROP_NEWEST, self.OVERFLOW_BLOCK):
+            raise ValueError('Invalid overflow policy {!r}'.format(buffer_overflow))
+        self.buffer_limit = buffer_limit
+        self.buffer_overflow = buffer_overflow
+        self.block_timeout = block_timeout
+        self.buffer_space = threading.Condition(self.event_lock)  # Notified when the buffers are swapped
+        self.dropped_events = {}  # {joystick: number of dropped key events}
+
+        self.event_stats = None
+        if collect_stats:
+            self.enable_stats()
+
+        self.history = None  # HistoryRecorder
+        if record_history:
+            self.enable_history(capacity=history_capacity)
+
+        self.consumers = ()  # Replaced (not changed) when a consumer is added or removed
+
+        self.coalesce_policies = {Key.AXIS: LatestValue(), Key.BUTTON: KeepAll(), Key.HAT: KeepAll(),
+                                  Key.BALL: KeepAll()}
+        if coalesce_policies is not None:
+            self.coalesce_policies.update(coalesce_policies)
+        self.joystick_policies = {}  # {joystick: {keytype: CoalescePolicy}}
+        self.axis_tables = {}  # {joystick: AxisTable}
+
+        self.handler_order = handler_order
+        self.executor = None
+        if handler_workers:
+            self.executor = OrderedExecutor(handler_workers, handler_queue_limit, name='pyjoystick-handle_key_event')
+
+        # Priority lane
+        self.priority_keytypes = set()
+        self.priority_numbers = set()  # {(keytype, number)}
+        self.priority_limit = priority_limit
+        self.priority_queue = queue.Queue(priority_limit)
+        self.priority_worker = None
+        for item in (priority_keys or ()):
+            if isinstance(item, (list, tuple)):
+                self.add_priority_key(*item)
+            else:
+                self.add_priority_key(item)
+
+        # Subscription index of ({(joystick, keytype, number): callbacks}, patterns)
+        self._subscriptions = ({}, ())
+
+        self.composites = []
+        self._composite_tables = {}  # {source joystick: (composite, remap table)}
+
+        self.transport = transport
+        self.ring = None
+        if transport == self.TRANSPORT_RING:
+            self.ring = RingBuffer(ring_capacity, ring_overflow)
+        self.devices = []  # Saved joysticks by device index
+        self._device_index = {}  # {joystick: device index}
 
         if add_joystick is not None:
             self.add_joystick = add_joystick
@@ -36,6 +192,10 @@ class ThreadEventManager(object):
             self.remove_joystick = remove_joystick
         if handle_key_event is not None:
             self.handle_key_event = handle_key_event
+        if handle_key_events is not None:
+            self.handle_key_events = handle_key_events
+        self.batch_per_device = batch_per_device
+        self.batch_columns = batch_columns
         if button_repeater is not None:
             self.set_button_repeater(button_repeater)
 
@@ -51,6 +211,226 @@ class ThreadEventManager(object):
         """Function to handle key event happens"""
         pass
 
+    def handle_key_events(self, batch):
+        """Function to handle a batch of key events. This receives a list of keys or a KeyColumns batch."""
+        pass
+
+    def has_batch_handler(self):
+        """Return if handle_key_events was given or overridden."""
+        return ('handle_key_events' in self.__dict__ or
+                type(self).handle_key_events is not ThreadEventManager.handle_key_events)
+
+    def has_key_handlers(self):
+        """Return if handle_key_event was given or overridden or if there are subscribed callbacks."""
+        return ('handle_key_event' in self.__dict__ or self._subscriptions[1] or
+                type(self).handle_key_event is not ThreadEventManager.handle_key_event)
+
+    def dispatch_keys(self, keys):
+        """Call handle_key_events with the ordered keys, then call the per key handlers for each key.
+
+        The per key handlers are only called if handle_key_event was given or there are subscribed callbacks.
+        """
+        if self.has_batch_handler():
+            if self.batch_columns:
+                self.call_handler(self.handle_key_events, keys_to_columns(keys, self._device_index))
+            else:
+                self.call_handler(self.handle_key_events, keys)
+
+            if not self.has_key_handlers():
+                return
+
+        for key in keys:
+            self.dispatch_key(key)
+
+    def dispatch_key(self, key):
+        """Call handle_key_event and the subscribed callbacks that match the key on the handler thread pool or now."""
+        executor = self.executor
+        if executor is None:
+            self.call_key_handlers(key)
+            return
+        elif self.handler_order == self.ORDER_KEY:
+            executor.submit((key.joystick, key.keytype, key.number), self.call_key_handlers, key)
+        else:
+            executor.submit(key.joystick, self.call_key_handlers, key)
+
+        stats = self.event_stats
+        if stats is not None:
+            stats.add_depth('handlers', executor.pending())
+
+    def call_key_handlers(self, key):
+        """Call handle_key_event and the subscribed callbacks that match the key."""
+        stats = self.event_stats
+        if stats is not None:
+            stats.add_handler_call(key)
+
+        profiler = self._profiler
+        if profiler is None:
+            self.handle_key_event(key)
+        else:
+            profiler.call(self.handle_key_event, key)
+
+        subscriptions, patterns = self._subscriptions
+        if patterns:
+            joystick, keytype, number = key.joystick, key.keytype, key.number
+            for use_joystick, use_keytype, use_number in patterns:
+                callbacks = subscriptions.get((joystick if use_joystick else None, keytype if use_keytype else None,
+                                               number if use_number else None), None)
+                if callbacks:
+                    for callback in callbacks:
+                        if profiler is None:
+                            callback(key)
+                        else:
+                            profiler.call(callback, key)
+
+    def call_handler(self, func, *args):
+        """Call the handler function with the args and time the call if profiling."""
+        profiler = self._profiler
+        if profiler is None:
+            return func(*args)
+        return profiler.call(func, *args)
+
+    def subscribe(self, callback=None, joystick=None, keytype=None, number=None):
+        """Call the callback for key events that match the given joystick, keytype, and number.
+
+        Args:
+            callback (callable/function)[None]: Function that takes in a Key. If None return a decorator function.
+            joystick (Joystick)[None]: Only call for this joystick. If None call for all joysticks.
+            keytype (str)[None]: Only call for this keytype (Key.AXIS, Key.BUTTON, Key.HAT, Key.BALL).
+            number (int)[None]: Only call for this key number.
+
+        Returns:
+            callback (callable/function): Returns a decorator function if the given callback was None or returns the
+                given callback.
+        """
+        if callback is None:
+            def decorator(callback):
+                return self.subscribe(callback, joystick=joystick, keytype=keytype, number=number)
+            return decorator
+
+        index = (joystick, keytype, number)
+        with self.event_lock:
+            subscriptions = dict(self._subscriptions[0])  # Copy so dispatch_key does not need the lock
+            subscriptions[index] = subscriptions.get(index, ()) + (callback,)
+            self._set_subscriptions(subscriptions)
+        return callback
+
+    def unsubscribe(self, callback, joystick=None, keytype=None, number=None):
+        """Stop calling the callback that was subscribed with the given joystick, keytype, and number.
+
+        Returns:
+            success (bool): True if the callback was subscribed and removed.
+        """
+        index = (joystick, keytype, number)
+        with self.event_lock:
+            subscriptions = dict(self._subscriptions[0])
+            callbacks = list(subscriptions.get(index, ()))
+            try:
+                callbacks.remove(callback)
+            except ValueError:
+                return False
+
+            if callbacks:
+                subscriptions[index] = tuple(callbacks)
+            else:
+                subscriptions.pop(index, None)
+            self._set_subscriptions(subscriptions)
+        return True
+
+    def _set_subscriptions(self, subscriptions):
+        """Save the subscription index with the (joystick, keytype, number) patterns that are used."""
+        patterns = tuple(set((joy is not None, keytype is not None, number is not None)
+                             for joy, keytype, number in subscriptions))
+        self._subscriptions = (subscriptions, patterns)
+
+    def enable_stats(self, enabled=True):
+        """Start or stop collecting counters and timing for stats().
+
+        While disabled each collection point only checks for None. Latency is measured from when the manager receives
+        a key to when the key handlers are called. Repeated keys from the button repeater are counted as handler
+        calls without a latency.
+        """
+        if not enabled:
+            self.event_stats = None
+        elif self.event_stats is None:
+            self.event_stats = EventStats()
+
+    def enable_history(self, enabled=True, capacity=4096):
+        """Start or stop recording the processed key values of each joystick in history (a HistoryRecorder).
+
+        Args:
+            enabled (bool)[True]: If False stop recording and remove the history.
+            capacity (int)[4096]: Number of samples to keep for each key of each joystick.
+        """
+        if not enabled:
+            self.history = None
+        elif self.history is None:
+            self.history = HistoryRecorder(capacity)
+
+    def add_consumer(self, consumer=None, **kwargs):
+        """Add a Consumer that receives every processed key event in its own buffer.
+
+        Each consumer has its own bounded buffer, coalesce policies, and delivery thread (or poll() pull interface),
+        so a slow consumer does not hold up the other consumers or handle_key_event.
+
+        Args:
+            consumer (Consumer/callable)[None]: Consumer object or a callback to create a Consumer with.
+            **kwargs (object): Keyword arguments to create the Consumer with.
+
+        Returns:
+            consumer (Consumer): The added consumer.
+        """
+        if not isinstance(consumer, Consumer):
+            consumer = Consumer(consumer, **kwargs)
+        with self.event_lock:
+            if consumer not in self.consumers:
+                self.consumers = self.consumers + (consumer,)
+        if self.is_running():
+            consumer.start()
+        return consumer
+
+    def remove_consumer(self, consumer):
+        """Stop and remove the consumer."""
+        with self.event_lock:
+            self.consumers = tuple(c for c in self.consumers if c is not consumer)
+        consumer.stop()
+
+    def reset_stats(self):
+        """Reset the stats counters and the dropped event counters."""
+        with self.event_lock:
+            self.dropped_events = {}
+        if self.event_stats is not None:
+            self.event_stats.reset()
+
+    def stats(self):
+        """Return a snapshot of the collected stats.
+
+        Returns:
+            stats (dict): Dictionary with the items
+                * 'enabled' - If stats are being collected. If False only 'dropped' is given.
+                * 'elapsed' - Seconds since the stats were reset.
+                * 'received' - {joystick: {keytype: count}} of key events received.
+                * 'coalesced' - Number of key events merged with a buffered event or filtered by a coalesce policy.
+                * 'dropped' - {joystick: count} of key events dropped by a full buffer or queue.
+                * 'handler_calls' - Number of times the key handlers were called.
+                * 'high_water' - {queue name: max depth} for 'buffer', 'ring', 'priority', 'handlers', and 'queue'.
+                * 'tick' - Dispatch tick duration histogram in nanoseconds with the 'last' duration.
+                * 'latency' - Receive to handler latency histogram in nanoseconds.
+                * 'dispatch' - AdaptiveInterval snapshot with the current 'interval' and the reasons for each
+                  adjustment. Only given for the 'adaptive' dispatch mode.
+                * 'consumers' - {consumer name: {'delivered': count, 'dropped': count}} if consumers were added.
+        """
+        stats = self.event_stats
+        snapshot = {'enabled': stats is not None}
+        if stats is not None:
+            snapshot.update(stats.snapshot())
+        with self.event_lock:
+            snapshot['dropped'] = dict(self.dropped_events)
+        if self.dispatch_mode == self.DISPATCH_ADAPTIVE:
+            snapshot['dispatch'] = self.scheduler.snapshot()
+        if self.consumers:
+            snapshot['consumers'] = {c.name: {'delivered': c.delivered, 'dropped': c.dropped} for c in self.consumers}
+        return snapshot
+
     def get_button_repeater(self):
         """Return the button repeater."""
         return self._button_repeater
@@ -59,12 +439,27 @@ class ThreadEventManager(object):
         """Set the button repeater."""
         self._button_repeater = value
         try:
-            self._button_repeater.key_repeated = self._update_key_event
+            if self._profiler is None:
+                self._button_repeater.key_repeated = self._update_key_event
+            else:
+                self._button_repeater.key_repeated = self._profiler.wrap(self._update_key_event)
         except:
             pass
 
     button_repeater = property(get_button_repeater, set_button_repeater)
 
+    def get_profiler(self):
+        """Return the HandlerProfiler that times the callbacks or None."""
+        return self._profiler
+
+    def set_profiler(self, value):
+        """Set the HandlerProfiler that times the callbacks. None to stop profiling."""
+        self._profiler = value
+        if self._button_repeater is not None:
+            self.set_button_repeater(self._button_repeater)
+
+    profiler = property(get_profiler, set_profiler)
+
     def clear_joystick_events(self, joy=None):
         """Clear and Return the current joystick events.
 
@@ -73,71 +468,332 @@ class ThreadEventManager(object):
 
         Returns:
             events (dict): Event dictionary of {joystick: {'events': {}, 'buttons': []}}
+
+        Note:
+            Events are double buffered. If joy is None the returned dictionary is reused and cleared on the next call.
         """
+        if joy is None:
+            with self.drain_lock:
+                # Clear the buffer that was drained last time and swap it with the buffer being written to.
+                back = self._back_events
+                for items in back.values():
+                    items['events'].clear()
+                    items['buttons'].clear()
+                with self.event_lock:
+                    self._back_events, self.joystick_events = self.joystick_events, back
+                    self.buffer_space.notify_all()
+                return self._back_events
+
         with self.event_lock:
-            if joy is None:
-                events = self.joystick_events.copy()
-                for joy in self.joystick_events:
-                    self.joystick_events[joy] = {'events': OrderedDict(), 'buttons': Stash()}
-            else:
-                events = {joy: self.joystick_events.get(joy, {'events': OrderedDict(), 'buttons': Stash()})}
-                self.joystick_events[joy] = {'events': OrderedDict(), 'buttons': Stash()}
+            events = {joy: self.joystick_events.get(joy, self.new_joystick_events())}
+            self.joystick_events[joy] = self.new_joystick_events()
+            self.buffer_space.notify_all()
 
         return events
 
+    @staticmethod
+    def new_joystick_events():
+        """Return a new event dictionary for a joystick {'events': {}, 'buttons': []}."""
+        return {'events': OrderedDict(), 'buttons': Stash()}
+
     def save_joystick(self, joy):
         """Save the added joystick."""
         if self.JOYSTICK_PROXY:
             joy = self.JOYSTICK_PROXY(joy)
         self.joysticks.append(joy)
+        self._saved_joysticks[joy] = joy
+        try:
+            joy.register()  # Resolve pickled keys to this joystick
+        except (AttributeError, Exception):
+            pass
+        index = self._device_index.setdefault(joy, len(self.devices))
+        if index == len(self.devices):
+            self.devices.append(joy)
+        else:
+            self.devices[index] = joy  # Reconnected
 
         # Event handlers
         self.clear_joystick_events(joy)
 
         # Run the callback handler
-        self.add_joystick(joy)
+        self.call_handler(self.add_joystick, joy)
+
+        self._bind_composites(joy)
+
+    def add_composite(self, composite):
+        """Add a CompositeJoystick that merges key events from its source joysticks into one virtual joystick."""
+        self.composites.append(composite)
+        if composite not in self.joysticks:
+            self.save_joystick(composite)
+        for joy in list(self.joysticks):
+            self._bind_composites(joy)
+
+    def remove_composite(self, composite):
+        """Remove the CompositeJoystick. Source joystick key events are no longer remapped."""
+        try:
+            self.composites.remove(composite)
+        except ValueError:
+            return
+        self._composite_tables = {joy: value for joy, value in self._composite_tables.items()
+                                  if value[0] is not composite}
+        self.delete_joystick(composite)
+
+    def _bind_composites(self, joy):
+        """Bind the composite remap table if the given joystick is a composite source joystick."""
+        for composite in self.composites:
+            table = composite.bind(joy)
+            if table is not None:
+                self._composite_tables[joy] = (composite, table)
+                return
 
     def delete_joystick(self, joy):
         """Delete the removed joystick."""
         try:
-            self.joysticks.remove(joy)
+            joy = self.joysticks.remove(joy)
+            if self._saved_joysticks.get(joy, None) is joy:
+                del self._saved_joysticks[joy]
+            joy.unregister()  # Unregister the saved joystick object
+            self._composite_tables.pop(joy, None)
         except:
             pass
 
         # Run the callback handler
-        self.remove_joystick(joy)
+        self.call_handler(self.remove_joystick, joy)
         try:
             self.clear_joystick_events(joy)
         except:
             pass
 
-    def save_key_event(self, key):
-        """Save the initial key event."""
+    def resolve_key_joystick(self, key):
+        """Set the key's joystick to the saved joystick object for the same device if the joystick was saved."""
         try:
-            joy = self.joysticks[key.joystick]
+            joy = self._saved_joysticks.get(key.joystick, None)  # Same identifier and name
+            if joy is None:
+                joy = self.joysticks[key.joystick]  # Loose match by name, id, or internal joystick object
             key.joystick = joy
         except:
             pass
+        return key
+
+    def save_key_event(self, key):
+        """Save the initial key event."""
+        self.resolve_key_joystick(key)
+
+        stats = self.event_stats
+        if stats is not None:
+            stats.add_received(key)
+
+        self.process_key_event(key)
+
+    def process_key_event(self, key):
+        """Remap the key to its composite and apply the axis table, deadband, and axis threshold.
+
+        The processed key (and the partner axis key of an X/Y pair) is given to queue_key_event.
+        """
+        # Remap source joystick keys to the composite joystick
+        if self._composite_tables:
+            try:
+                composite, table = self._composite_tables[key.joystick]
+            except (KeyError, TypeError):
+                pass
+            else:
+                key = composite.remap_key(key, table)
+                if key is None:
+                    return
+
+        # Receive time for the stats latency and the KeyColumns timestamps
+        stamp = self.event_stats is not None or self.batch_columns
+        if stamp:
+            key.timestamp = time.perf_counter()
 
-        # Calculate deadband after a static joystick was set
         if key.keytype == key.AXIS:
-            dead = getattr(key.joystick, 'deadband', 0)
+            joy = key.joystick
+            axis_table = self.axis_tables.get(joy, None) if self.axis_tables else None
+            if axis_table is not None:
+                # Per axis response. X/Y pairs also update the partner axis.
+                key.value, number, value = axis_table.process(key.number, key.value)
+                if self.check_axis_key(key):
+                    self.queue_key_event(key)
+                try:
+                    if number is not None and value != joy.get_axis(number):
+                        partner = Key(Key.AXIS, number, value, joy)
+                        if stamp:
+                            partner.timestamp = key.timestamp
+                        if self.check_axis_key(partner):
+                            self.queue_key_event(partner)
+                except (AttributeError, IndexError, Exception):
+                    pass
+                return
+
+            # Calculate deadband after a static joystick was set
+            dead = getattr(joy, 'deadband', 0)
             if dead:
                 key.value = deadband(key.value, dead)
 
-            # Check if axis is still at 0 (No change due to deadband) to reduce number of events
-            try:
-                if key.value == 0 and key.joystick.get_axis(key.number) == 0:
-                    return
-            except (AttributeError, IndexError, Exception):
-                pass
+            if not self.check_axis_key(key):
+                return
+
+        self.queue_key_event(key)
+
+    def check_axis_key(self, key):
+        """Return True if the processed axis key should be saved or False if it did not change enough."""
+        # Check if axis is still at 0 (No change due to deadband) to reduce number of events
+        joy = key.joystick
+        try:
+            if key.value == 0 and joy.get_axis(key.number) == 0:
+                return False
+        except (AttributeError, IndexError, Exception):
+            pass
+
+        # Suppress axis jitter smaller than the joystick's axis threshold
+        try:
+            if (joy.axis_threshold or joy.axis_thresholds) and not joy.check_axis_change(key.number, key.value):
+                return False
+        except AttributeError:
+            pass
+        return True
+
+    def queue_key_event(self, key):
+        """Send the processed key to the button repeater and save it on the priority lane, ring, or event buffer."""
+        history = self.history
+        if history is not None:
+            history.record(key)
+
+        for consumer in self.consumers:
+            consumer.put(key)
 
         try:
             self.button_repeater.set(key)
         except:
             pass
 
-        self._update_key_event(key)
+        if (self.priority_keytypes or self.priority_numbers) and self.is_priority_key(key):
+            self._put_priority_event(key)
+        elif self.ring is not None:
+            self._put_ring_event(key)
+        else:
+            self._update_key_event(key)
+
+    def add_priority_key(self, keytype, number=None):
+        """Dispatch key events for the keytype (and number) right away on the priority lane.
+
+        Priority keys skip the coalesce policies and are dispatched by a dedicated thread as soon as they are saved.
+        Priority keys are handled in order with each other, but may be handled before buffered events that were
+        saved earlier (axis events waiting for the next dispatch). Repeated keys from the button repeater use the
+        normal lane.
+
+        Warning:
+            handle_key_event, handle_key_events, and the subscribed callbacks are called from both the priority lane
+            thread and the dispatcher thread, so they can run at the same time and must be thread safe. Use
+            handler_workers with the 'joystick' handler_order if the calls for one joystick must not overlap.
+
+        Args:
+            keytype (str): Key type (Key.AXIS, Key.BUTTON, Key.HAT, Key.BALL).
+            number (int)[None]: Key number. If None all keys of the keytype are priority keys.
+        """
+        if number is None:
+            self.priority_keytypes.add(keytype)
+        else:
+            self.priority_numbers.add((keytype, number))
+
+        if self.is_running():
+            self.start_priority_worker()
+
+    def remove_priority_key(self, keytype, number=None):
+        """Remove the keytype (and number) from the priority lane."""
+        if number is None:
+            self.priority_keytypes.discard(keytype)
+        else:
+            self.priority_numbers.discard((keytype, number))
+
+    def is_priority_key(self, key):
+        """Return if the key is dispatched on the priority lane."""
+        return key.keytype in self.priority_keytypes or (key.keytype, key.number) in self.priority_numbers
+
+    def _put_priority_event(self, key):
+        """Dispatch the key on the priority lane. If the manager is not running dispatch the key now."""
+        try:
+            key.joystick.update_key(key)
+        except:
+            pass
+
+        if self.priority_worker is None:
+            if not self.is_running():
+                self.dispatch_keys([key])
+                return
+            self.start_priority_worker()
+
+        lane = self.priority_queue
+        if self.buffer_overflow == self.OVERFLOW_BLOCK:
+            try:
+                lane.put(key, timeout=self.block_timeout)
+            except queue.Full:
+                self.count_dropped(key.joystick)
+        else:
+            try:
+                lane.put_nowait(key)
+            except queue.Full:
+                dropped = key
+                if self.buffer_overflow == self.OVERFLOW_DROP_OLDEST:
+                    try:
+                        dropped = lane.get_nowait()
+                        lane.put_nowait(key)
+                    except (queue.Empty, queue.Full):
+                        pass
+                try:
+                    self.count_dropped(dropped.joystick)
+                except AttributeError:
+                    pass
+
+        stats = self.event_stats
+        if stats is not None:
+            stats.add_depth('priority', lane.qsize())
+
+    def start_priority_worker(self):
+        """Start the priority lane thread if it is not running."""
+        with self.event_lock:
+            if self.priority_worker is not None:
+                return
+            self.priority_worker = threading.Thread(target=self.dispatch_priority_events,
+                                                    name='pyjoystick-dispatch_priority_events')
+            self.priority_worker.daemon = True
+            self.priority_worker.start()
+
+    def dispatch_priority_events(self):
+        """Dispatch the priority lane keys as soon as they are saved until the manager stops running."""
+        while self.is_running():
+            key = self.priority_queue.get()
+            if key is None:
+                continue  # Check if still running
+            self.dispatch_keys([key])
+
+    def _put_ring_event(self, key):
+        """Save the key event as a compact record in the ring buffer without taking a lock."""
+        joystick = key.joystick
+        try:
+            index = self._device_index[joystick]
+        except (KeyError, TypeError):
+            # Joystick not found. Add the joystick through the locked event buffer.
+            self._update_key_event(key)
+            return
+
+        try:
+            joystick.update_key(key)
+        except:
+            pass
+
+        ring = self.ring
+        overwritten = ring.peek_overwrite()
+        if overwritten is not None:
+            # 'drop_oldest' overwrites the oldest record. Count it for the record's device.
+            try:
+                self.count_dropped(self.devices[overwritten[0]])
+            except (IndexError, TypeError):
+                pass
+        if not ring.put((index, KeyTypes.to_code(key.keytype), key.number, key.value, time.perf_counter())):
+            self.count_dropped(joystick)
+        if not self.events_ready.is_set():  # Only lock when the dispatcher needs to wake up
+            self.events_ready.set()
 
     def _update_key_event(self, key):
         """Update the event list from the key event."""
@@ -150,40 +806,380 @@ class ThreadEventManager(object):
                 pass
 
             try:
-                # Save the key event
-                if key.keytype == key.AXIS:
-                    self.joystick_events[joystick]['events'][key] = value
-                else:
-                    self.joystick_events[joystick]['buttons'].append(key)
+                items = self.joystick_events[joystick]
             except KeyError:
-                # Joystick not found. Show as being added.
-                self.save_joystick(joystick)
+                if joystick in self._back_events:
+                    # Joystick was saved before the buffers were swapped
+                    items = self.joystick_events[joystick] = self.new_joystick_events()
+                else:
+                    # Joystick not found. Show as being added.
+                    self.save_joystick(joystick)
+                    items = self.joystick_events[joystick]
+
+            # Save the key event
+            stats = self.event_stats
+            if stats is None:
+                self.get_coalesce_policy(key.keytype, joystick).save(items, key, value)
+            else:
+                self._save_with_stats(stats, items, key, value, 'buffer')
+
+            # Apply the overflow policy if the ordered events are over the limit
+            if self.buffer_limit and len(items['buttons']) > self.buffer_limit:
+                self._buffer_overflow(joystick, items)
+
+        self.events_ready.set()
+
+    def _save_with_stats(self, stats, items, key, value, name=None):
+        """Save the key event with the coalesce policy and count if it was coalesced. The event_lock is held."""
+        depth = len(items['events']) + len(items['buttons'])
+        self.get_coalesce_policy(key.keytype, key.joystick).save(items, key, value)
+        new_depth = len(items['events']) + len(items['buttons'])
+        if new_depth <= depth:
+            stats.add_coalesced()
+        if name is not None:
+            stats.add_depth(name, new_depth)
+
+    def _buffer_overflow(self, joystick, items):
+        """Apply the overflow policy to the joystick's event buffer that is over the limit. The event_lock is held."""
+        buttons = items['buttons']
+        limit = self.buffer_limit
+        if self.buffer_overflow == self.OVERFLOW_DROP_OLDEST:
+            count = len(buttons) - limit
+            del buttons[:count]
+            self.count_dropped(joystick, count)
+            return
+
+        key = buttons.pop(-1)  # Remove the newest event
+        if self.buffer_overflow == self.OVERFLOW_BLOCK:
+            # Wait for the dispatcher to swap the buffers. Do not wait if the dispatcher is not running.
+            end = time.monotonic() + self.block_timeout
+            while self.is_running():
+                remaining = end - time.monotonic()
+                if remaining <= 0 or not self.buffer_space.wait(remaining):
+                    break
+                try:
+                    buttons = self.joystick_events[joystick]['buttons']
+                except KeyError:
+                    buttons = (self.joystick_events.setdefault(joystick, self.new_joystick_events()))['buttons']
+                if len(buttons) < limit:
+                    buttons.append(key)
+                    return
+
+        self.count_dropped(joystick)
 
-                # Save the key event
-                if key.keytype == key.AXIS:
-                    self.joystick_events[joystick]['events'][key] = value
+    def count_dropped(self, joystick, count=1):
+        """Add to the number of dropped key events for the joystick."""
+        with self.event_lock:
+            self.dropped_events[joystick] = self.dropped_events.get(joystick, 0) + count
+
+    def get_dropped_events(self, joystick=None):
+        """Return the number of dropped key events for the joystick or for all joysticks if None."""
+        if joystick is None:
+            return sum(self.dropped_events.values())
+        return self.dropped_events.get(joystick, 0)
+
+    def get_coalesce_policy(self, keytype, joystick=None):
+        """Return the coalesce policy for the keytype and joystick."""
+        if joystick is not None and self.joystick_policies:
+            try:
+                return self.joystick_policies[joystick][keytype]
+            except (KeyError, TypeError):
+                pass
+        try:
+            return self.coalesce_policies[keytype]
+        except KeyError:
+            return self.coalesce_policies.setdefault(keytype, KeepAll())
+
+    def set_coalesce_policy(self, keytype, policy, joystick=None):
+        """Set how key events of the keytype are saved until the next dispatch.
+
+        Args:
+            keytype (str): Key type (Key.AXIS, Key.BUTTON, Key.HAT, Key.BALL).
+            policy (CoalescePolicy): Policy like LatestValue(), KeepAll(), RateLimited(30), or MinDelta(0.01).
+                If None remove the joystick's policy to use the keytype policy.
+            joystick (Joystick)[None]: Only use the policy for this joystick.
+        """
+        with self.event_lock:
+            if joystick is None:
+                self.coalesce_policies[keytype] = policy
+            elif policy is None:
+                self.joystick_policies.get(joystick, {}).pop(keytype, None)
+            else:
+                self.joystick_policies.setdefault(joystick, {})[keytype] = policy
+
+    def set_axis_table(self, joystick, table):
+        """Set the AxisTable that processes the joystick's axis values instead of the joystick deadband.
+
+        Args:
+            joystick (Joystick): Joystick (or CompositeJoystick) to process axis values for.
+            table (AxisTable): Per axis response table. If None use the joystick deadband.
+        """
+        with self.event_lock:
+            if table is None:
+                self.axis_tables.pop(joystick, None)
+            else:
+                self.axis_tables[joystick] = table
+
+    def get_axis_table(self, joystick):
+        """Return the AxisTable for the joystick or None."""
+        return self.axis_tables.get(joystick, None)
+
+    def _pop_held_events(self):
+        """Return a list of (key, value) that coalesce policies held back and are now due."""
+        policies = list(self.coalesce_policies.values())
+        for joy_policies in self.joystick_policies.values():
+            policies.extend(joy_policies.values())
+
+        due = []
+        with self.event_lock:
+            for policy in set(policies):
+                due.extend(policy.pop_due())
+        return due
+
+    def process_ring_events(self):
+        """Drain the ring buffer in bulk and process the event records with the coalesce policies.
+
+        Keys are created from the records, so attributes set by the event loop (controller_key_name) are not
+        available.
+        """
+        events = self._drain_ring_events()
+        if events:
+            self.dispatch_joystick_events(events)
+
+    def _drain_ring_events(self):
+        """Drain the ring buffer and return the event dictionary of {joystick: {'events': {}, 'buttons': []}}."""
+        records = self.ring.drain()
+        if not records:
+            return None
+
+        stats = self.event_stats
+        if stats is not None:
+            stats.add_depth('ring', len(records))
+
+        events = {}
+        devices = self.devices
+        with self.event_lock:
+            for index, code, number, value, timestamp in records:
+                joystick = devices[index]
+                try:
+                    items = events[joystick]
+                except KeyError:
+                    items = events[joystick] = self.new_joystick_events()
+
+                key = Key(KeyTypes.from_code(code), number, value, joystick)
+                key.timestamp = timestamp
+                if stats is None:
+                    self.get_coalesce_policy(key.keytype, joystick).save(items, key, value)
                 else:
-                    self.joystick_events[joystick]['buttons'].append(key)
+                    self._save_with_stats(stats, items, key, value)
 
-    def process_events(self):
-        """Process all of the saved events."""
-        events = self.clear_joystick_events()
+        return events
+
+    def dispatch_joystick_events(self, events, keys=None):
+        """Call the handlers for the event dictionary of {joystick: {'events': {}, 'buttons': []}}.
+
+        Args:
+            events (dict): Event dictionary to dispatch.
+            keys (list)[None]: Keys to dispatch before the event dictionary (held coalesced keys).
+        """
+        if not self.has_batch_handler():
+            for key in (keys or ()):
+                self.dispatch_key(key)
+            for joystick, items in events.items():
+                for key, value in items['events'].items():
+                    key.value = value  # Value needs to be updated for the key. The key is only used as hash
+                    self.dispatch_key(key)
+                for key in items['buttons']:
+                    self.dispatch_key(key)
+            return
+
+        # Batch the keys for the whole dispatch or for each joystick
+        batch = list(keys or ())
+        per_device = self.batch_per_device
+        if per_device and batch:
+            for joystick in list(dict.fromkeys(key.joystick for key in batch)):
+                self.dispatch_keys([key for key in batch if key.joystick == joystick])
+            batch = []
         for joystick, items in events.items():
             for key, value in items['events'].items():
-                key.value = value  # Value needs to be updated for the key. The key is only used as hash
-                self.handle_key_event(key)
-            for key in items['buttons']:
-                self.handle_key_event(key)
+                key.value = value
+                batch.append(key)
+            batch.extend(items['buttons'])
+            if per_device and batch:
+                self.dispatch_keys(batch)
+                batch = []
+        if batch:
+            self.dispatch_keys(batch)
+
+    def process_events(self):
+        """Process all of the saved events and return the number of key events that were dispatched."""
+        stats = self.event_stats
+        if stats is not None:
+            start = time.perf_counter_ns()
+            count = self._process_events()
+            stats.add_tick(time.perf_counter_ns() - start)
+            return count
+        return self._process_events()
+
+    def _process_events(self):
+        """Process all of the saved events and return the number of key events that were dispatched."""
+        with self.drain_lock:
+            held = []
+            for key, value in self._pop_held_events():
+                key.value = value
+                held.append(key)
+
+            ring_events = self._drain_ring_events() if self.ring is not None else None
+            events = self.clear_joystick_events()
+            if ring_events:
+                self._merge_events(events, ring_events)
+
+            count = len(held)
+            for items in events.values():
+                count += len(items['events']) + len(items['buttons'])
+
+            self.dispatch_joystick_events(events, held)
+            return count
+
+    def poll(self):
+        """Return the key events that were saved since the last poll without calling any handlers.
+
+        The buffers are swapped with one lock, so this is cheap to call once per frame of a game loop. Use the 'poll'
+        dispatch mode so no dispatcher thread takes the events.
+
+        .. code-block:: python
+
+            mngr = ThreadEventManager(run_event_loop, dispatch_mode=ThreadEventManager.DISPATCH_POLL)
+            mngr.start()
+            while running:
+                for joy, items in mngr.poll().items():
+                    for key, value in items['events'].items():  # Latest axis values
+                        ...
+                    for key in items['buttons']:  # Button, hat, and ball events in order
+                        ...
+
+        Returns:
+            events (dict): Event dictionary of {joystick: {'events': {key: value}, 'buttons': [key]}}. The dictionary
+                is reused and cleared on the next call.
+        """
+        with self.drain_lock:
+            ring_events = self._drain_ring_events() if self.ring is not None else None
+            held = self._pop_held_events() if self.has_held_events() else None
+            events = self.clear_joystick_events()
+
+            if ring_events:
+                self._merge_events(events, ring_events)
+            if held:
+                for key, value in held:
+                    items = events.get(key.joystick, None)
+                    if items is None:
+                        items = events[key.joystick] = self.new_joystick_events()
+                    items['events'][key] = value
+        return events
+
+    @staticmethod
+    def _merge_events(events, other):
+        """Add the other event dictionary's events after the events in the event dictionary."""
+        for joystick, other_items in other.items():
+            items = events.get(joystick, None)
+            if items is None:
+                events[joystick] = other_items
+            else:
+                items['events'].update(other_items['events'])
+                items['buttons'].extend(other_items['buttons'])
+
+    def has_held_events(self):
+        """Return if a coalesce policy may be holding back key events."""
+        policies = list(self.coalesce_policies.values())
+        for joy_policies in self.joystick_policies.values():
+            policies.extend(joy_policies.values())
+        for policy in policies:
+            held = getattr(policy, 'held', None)
+            if held or (held is None and type(policy).pop_due is not CoalescePolicy.pop_due):
+                return True
+        return False
+
+    def dispatch_events(self):
+        """Wait for key events and process them as soon as they are saved until the manager stops running.
+
+        While a coalesce policy holds back key events the dispatcher also wakes every activity_timeout to dispatch
+        the held events that are due.
+        """
+        while self.is_running():
+            timeout = self.activity_timeout if self.has_held_events() else None
+            saved = self.events_ready.wait(timeout)
+            if not self.is_running():
+                break
+
+            # Give axis events a chance to coalesce
+            if saved and self.batch_timeout:
+                time.sleep(self.batch_timeout)
+
+            self.events_ready.clear()
+            self.process_events()
+
+    def dispatch_adaptive(self):
+        """Process events with the scheduler's interval until the manager stops running.
+
+        While the scheduler is sleeping the dispatcher waits for the next key event instead of waking up.
+        """
+        scheduler = self.scheduler
+        scheduler.reset()
+        last_dropped = self.get_dropped_events()
+        while self.is_running():
+            if scheduler.sleeping:
+                self.events_ready.wait()
+                if not self.is_running():
+                    break
+                scheduler.wake()
+
+            self.events_ready.clear()
+            count = self.process_events()
+
+            with self.event_lock:
+                dropped = self.get_dropped_events()
+            interval = scheduler.update(count, max(dropped - last_dropped, 0), not count and self.has_held_events())
+            last_dropped = dropped
+            if interval is not None:
+                time.sleep(interval)
+
+    def start_dispatcher(self):
+        """Create and start the thread that processes the saved events for the dispatch mode."""
+        if self.dispatch_mode == self.DISPATCH_POLL:
+            return None
+        elif self.dispatch_mode == self.DISPATCH_EVENT:
+            self.events_ready.clear()
+            worker = threading.Thread(target=self.dispatch_events, name='pyjoystick-dispatch_events')
+        elif self.dispatch_mode == self.DISPATCH_ADAPTIVE:
+            worker = threading.Thread(target=self.dispatch_adaptive, name='pyjoystick-dispatch_adaptive')
+        else:
+            worker = PeriodicThread(self.activity_timeout, self.process_events, name='pyjoystick-process_events')
+            worker.alive = self.alive  # stop when this event stops
+        worker.daemon = True
+        worker.start()
+        return worker
 
     @contextlib.contextmanager
     def run_during(self):
-        """Context manager to temporarily run the manager if the manager is not already running."""
-        if not self.is_running():
-            self.start()
-            yield
-            self.stop()
-        else:
+        """Context manager to temporarily run the manager if the manager is not already running.
+
+        Nested and concurrent users (find_key from several threads) share the run. The manager is only stopped when
+        the last user exits and the manager was started by run_during.
+        """
+        with self._run_during_lock:
+            if self._run_during_users == 0:
+                self._run_during_started = not self.is_running()
+                if self._run_during_started:
+                    self.start()
+            self._run_during_users += 1
+        try:
             yield
+        finally:
+            with self._run_during_lock:
+                self._run_during_users -= 1
+                if self._run_during_users == 0 and self._run_during_started:
+                    self._run_during_started = False
+                    self.stop()
 
     def wait(self, conditional=None, timeout=float('inf'), sleep_func=None):
         """Wait for the given timeout or conditional function to return false.
@@ -207,50 +1203,78 @@ class ThreadEventManager(object):
         except (ValueError, TypeError, Exception):  # If any error occurs stop waiting.
             pass
 
-    def find_key(self, joysticks=None, key_types=None, timeout=float("inf"), sleep_func=None):
-        """Wait and return the next key that is pressed.
+    def find_key_future(self, joysticks=None, key_types=None):
+        """Return a Future that resolves with the next key that is pressed.
+
+        This is a one-shot subscription, so normal dispatch keeps running and any number of futures can wait at the
+        same time. Cancel the future to stop waiting. The manager must be running to find keys.
 
         Args:
-            joysticks (list/Joystick)[None]: Joystick(s) to allow events for.
+            joysticks (list/Joystick)[None]: Joystick(s) to allow events for (Joystick, name, or id).
             key_types (list/KeyTypes)[None]: List of key type. Found with Key.KeyTypes.Axis
-            timeout (float/int)[float('inf')]: Timeout to wait.
-            sleep_func (callable)[None]: How to sleep and wait (time.sleep(0.01)).
 
         Returns:
-            key (Key)[None]: If found return the first Key else return None.
+            future (concurrent.futures.Future): Future that resolves with the found Key.
         """
         if joysticks is None:
-            joysticks = []
-        elif not isinstance(joysticks, list):
-            try:
-                joysticks = list(joysticks)  # convert tuple to list
-            except (TypeError, Exception):
-                joysticks = [joysticks]  # Put a single object in a list
+            joysticks = JoystickStash()
+        elif not isinstance(joysticks, (list, tuple, set)):
+            joysticks = JoystickStash([joysticks])  # Put a single object in a list
+        else:
+            joysticks = JoystickStash(joysticks)  # Loose match by joystick, name, or id
         if key_types is None:
             key_types = []
 
-        data = {'found key': None}
+        future = Future()
 
         def filter_find_key(key):
-            is_joystick = len(joysticks) == 0 or key.joystick in joysticks
-            is_key_type = len(key_types) == 0 or key.has_keytype(key.keytype, key_types)
-            is_valid_value = abs(key.value) > 0.5
-            if is_joystick and is_key_type and is_valid_value and data['found key'] is None:
-                data['found key'] = key
-
-        def is_not_found():
-            return data['found key'] is None
+            if future.done():
+                return
+            try:
+                is_joystick = len(joysticks) == 0 or key.joystick in joysticks
+                is_key_type = len(key_types) == 0 or key.has_keytype(key.keytype, key_types)
+                is_valid_value = abs(key.value) > 0.5
+            except (TypeError, ValueError, Exception):
+                return
+            if is_joystick and is_key_type and is_valid_value:
+                try:
+                    future.set_result(key)
+                except InvalidStateError:
+                    pass  # Already found or cancelled
+
+        self.subscribe(filter_find_key)
+        future.add_done_callback(lambda f: self.unsubscribe(filter_find_key))
+        return future
 
-        # Change the event handler
-        old_handle_key_event, self.handle_key_event = self.handle_key_event, filter_find_key
+    def find_key(self, joysticks=None, key_types=None, timeout=float("inf"), sleep_func=None):
+        """Wait and return the next key that is pressed.
 
-        with self.run_during():
-            self.wait(is_not_found, timeout, sleep_func)
+        Args:
+            joysticks (list/Joystick)[None]: Joystick(s) to allow events for.
+            key_types (list/KeyTypes)[None]: List of key type. Found with Key.KeyTypes.Axis
+            timeout (float/int)[float('inf')]: Timeout to wait.
+            sleep_func (callable)[None]: How to sleep and wait (ex. process GUI events). If None wait for the key
+                without polling.
 
-        # Reset event handler
-        self.handle_key_event = old_handle_key_event
+        Returns:
+            key (Key)[None]: If found return the first Key else return None.
+        """
+        future = self.find_key_future(joysticks, key_types)
+        try:
+            with self.run_during():
+                if sleep_func is not None:
+                    self.wait(lambda: not future.done(), timeout, sleep_func)
+                else:
+                    try:
+                        future.result(timeout=None if timeout == float('inf') else timeout)
+                    except FutureTimeoutError:
+                        pass
+        finally:
+            future.cancel()  # Stop waiting if not found
 
-        return data['found key']
+        if future.cancelled():
+            return None
+        return future.result()
 
     def run(self, event_loop, add_joystick, remove_joystick, handle_key_event, alive=None, button_repeater=None):
         """Run the an event loop to process SDL Events.
@@ -288,10 +1312,13 @@ class ThreadEventManager(object):
         self.proc.daemon = True
         self.proc.start()
 
-        self.worker = PeriodicThread(self.activity_timeout, self.process_events, name='pyjoystick-process_events')
-        self.worker.alive = self.alive  # stop when this event stops
-        self.worker.daemon = True
-        self.worker.start()
+        self.worker = self.start_dispatcher()
+
+        for consumer in self.consumers:
+            consumer.start()
+
+        if self.priority_keytypes or self.priority_numbers:
+            self.start_priority_worker()
         return self
 
     def stop(self):
@@ -300,6 +1327,10 @@ class ThreadEventManager(object):
             self.alive.clear()
         except:
             pass
+        try:
+            self.events_ready.set()  # Wake the event dispatcher to stop
+        except:
+            pass
         try:
             self.button_repeater.stop()
         except (AttributeError, Exception):
@@ -319,6 +1350,23 @@ class ThreadEventManager(object):
         except:
             pass
         self.worker = None
+        try:
+            # Wake the priority lane to stop. Make room if the lane is full.
+            while True:
+                try:
+                    self.priority_queue.put_nowait(None)
+                    break
+                except queue.Full:
+                    try:
+                        self.priority_queue.get_nowait()
+                    except queue.Empty:
+                        pass
+            self.priority_worker.join(0)
+        except:
+            pass
+        self.priority_worker = None
+        for consumer in self.consumers:
+            consumer.stop()
         try:
             self.clear_joystick_events()
         except:
@@ -336,28 +1384,78 @@ class ThreadEventManager(object):
 
     def __getstate__(self):
         return {'activity_timeout': self.activity_timeout,
+                'dispatch_mode': self.dispatch_mode,
+                'scheduler': self.scheduler,
+                'batch_timeout': self.batch_timeout,
+                'buffer_limit': self.buffer_limit,
+                'buffer_overflow': self.buffer_overflow,
+                'block_timeout': self.block_timeout,
+                'dropped_events': {},
+                'collect_stats': self.event_stats is not None,
+                '_profiler': None,
                 'button_repeater': self.button_repeater,
                 'event_loop': self.event_loop,
-                'joysticks': Stash(),
+                '_subscriptions': ({}, ()),  # Callbacks are only called in the main process
+                'priority_keytypes': self.priority_keytypes,
+                'priority_numbers': self.priority_numbers,
+                'priority_limit': self.priority_limit,
+                'priority_worker': None,
+                'handler_order': self.handler_order,
+                'executor': None,
+                'coalesce_policies': self.coalesce_policies,
+                'joystick_policies': {},
+                'axis_tables': self.axis_tables,
+                'batch_per_device': self.batch_per_device,
+                'batch_columns': self.batch_columns,
+                'history': None,
+                'consumers': (),
+                'transport': self.transport,
+                'ring': self.ring,
+                'devices': [],
+                '_device_index': {},
+                'joysticks': JoystickStash(),
+                '_saved_joysticks': {},
+                'composites': self.composites,
+                '_composite_tables': {},
                 'alive': self.alive,
                 'proc': None,
                 'worker': None,
+                '_run_during_users': 0,
+                '_run_during_started': False,
                 'event_buttons': Stash(),
                 'event_latest': {},
                 }
 
     def __setstate__(self, state):
+        state = dict(state)
+        collect_stats = state.pop('collect_stats', False)
         for k, v in state.items():
             setattr(self, k, v)
 
         if getattr(self, 'event_lock', None) is None:
             self.event_lock = threading.RLock()
+        if getattr(self, 'drain_lock', None) is None:
+            self.drain_lock = threading.RLock()
+        if getattr(self, 'joystick_events', None) is None:
+            self.joystick_events = {}
+        if getattr(self, '_back_events', None) is None:
+            self._back_events = {}
+        if getattr(self, 'events_ready', None) is None:
+            self.events_ready = threading.Event()
+        if getattr(self, '_run_during_lock', None) is None:
+            self._run_during_lock = threading.Lock()
+        if getattr(self, 'buffer_space', None) is None:
+            self.buffer_space = threading.Condition(self.event_lock)
+        if getattr(self, 'event_stats', None) is None:
+            self.event_stats = EventStats() if collect_stats else None
+        if getattr(self, 'priority_queue', None) is None:
+            self.priority_queue = queue.Queue(getattr(self, 'priority_limit', 0))
 
 
 if __name__ == '__main__':
     import time
     import argparse
-    from pyjoystick import Key, ButtonRepeater, HatRepeater, ButtonHatRepeater
+    from pyjoystick import ButtonRepeater, HatRepeater, ButtonHatRepeater
     # try:
     from pyjoystick.sdl2 import Joystick as SDLJoystick, run_event_loop as run_sdl_loop
     # except (ImportError, Exception) as err:
@@ -404,10 +1502,10 @@ if __name__ == '__main__':
     def key_received(key):
         if DEVICE is None:
             print(key, '==', key.value)
-        elif key.joystick == DEVICE:
-            DEVICE.update_key(key)
+        elif key.joystick.matches(DEVICE):
+            key.joystick.update_key(key)
 
-            keys = '\t'.join((format_key(k) for k in DEVICE.keys if k.keytype in KEYTYPES))
+            keys = '\t'.join((format_key(k) for k in key.joystick.keys if k.keytype in KEYTYPES))
             print('\r', keys, end='', flush=True)
 
     def format_key(key):
@@ -5,8 +5,7 @@ import ctypes
 import threading
 
 from pyjoystick.utils import is_64_bit, check_os, rescale
-from pyjoystick.stash import Stash
-from pyjoystick.interface import Key, Joystick as BaseJoystick
+from pyjoystick.interface import Key, JoystickStash, Joystick as BaseJoystick
 
 # ========== SDL2 Pathing ==========
 # Find SDL2 resource files properly.
@@ -40,7 +39,7 @@ class Joystick(BaseJoystick):
         if not get_init():
             init()
 
-        return Stash(cls(i) for i in range(sdl2.SDL_NumJoysticks()))  # Use identifier not instance id.
+        return JoystickStash(cls(i) for i in range(sdl2.SDL_NumJoysticks()))  # Use identifier not instance id.
 
     def __new__(cls, identifier=None, instance_id=None, *args, **kwargs):
         # Check init
@@ -583,6 +582,8 @@ class EventLoop:
                 if key is not None:
                     handle_key_event(key)
     """
+    profiler = None  # HandlerProfiler to time the callbacks
+
     def __init__(self, alive=None, event=None, timeout=2000, **kwargs):
         """Initialize the event loop.
 
@@ -591,6 +592,7 @@ class EventLoop:
                 is alive when set.
             event (sdl2.SDL_Event)[None]: Event object memory to continually populate with new events.
             timeout (int)[2000]: Milliseconds to wait for an event.
+            profiler (HandlerProfiler)[None]: Keyword argument to time each callback call.
         """
         if alive is None:
             alive = threading.Event()
@@ -643,6 +645,13 @@ class EventLoop:
         if callable(func):
             return func(event)
 
+    def call_callback(self, func, *args):
+        """Call the callback function with the args and time the call if there is a profiler."""
+        profiler = self.profiler
+        if profiler is None:
+            return func(*args)
+        return profiler.call(func, *args)
+
     def start(self):
         """Run the event loop."""
         self.run()
@@ -736,20 +745,20 @@ class JoystickEventLoop(EventLoop):
 
     def on_add(self, event):
         try:
-            self.add(self.get_joystick(event))
+            self.call_callback(self.add, self.get_joystick(event))
         except:
             pass
 
     def on_remove(self, event):
         try:
-            self.remove(self.get_joystick(event))
+            self.call_callback(self.remove, self.get_joystick(event))
         except:
             pass
 
     def on_key_event(self, event):
         key = self.key_from_event(event, self.get_joystick(event))
         if key is not None:
-            self.handle_key(key)
+            self.call_callback(self.handle_key, key)
 
 
 class ControllerEventLoop(JoystickEventLoop):
@@ -801,6 +810,7 @@ def run_event_loop(add_joystick, remove_joystick, handle_key_event, alive=None,
         handle_key_event (callable/function): Called when a new key event occurs!
         alive (callable/function)[None]: Function to return True to continue running. If None run forever
         key_from_event (callable/function)[None]: Take in event, joystick and return a key or None for the event.
+        profiler (HandlerProfiler)[None]: Keyword argument to time each callback call.
     """
     event_loop = JoystickEventLoop(add_joystick, remove_joystick, handle_key_event,
                                    alive=alive, key_from_event=key_from_event, **kwargs)
@@ -0,0 +1,158 @@
+import time
+import threading
+
+
+__all__ = ['LatencyHistogram', 'EventStats']
+
+
+class LatencyHistogram(object):
+    """Histogram of nanosecond durations with HDR style buckets.
+
+    Each bucket keeps `significant_bits` of precision, so the bucket width grows with the value and the relative error
+    stays below 2 ** (1 - significant_bits) for any duration.
+    """
+
+    def __init__(self, significant_bits=4):
+        """Initialize the histogram.
+
+        Args:
+            significant_bits (int)[4]: Number of significant bits to keep for each bucket.
+        """
+        self.significant_bits = significant_bits
+        self.buckets = {}  # {bucket lower bound: count}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def bucket(self, value):
+        """Return the (lower, upper) bounds of the bucket for the value."""
+        shift = max(value.bit_length() - self.significant_bits, 0)
+        lower = (value >> shift) << shift
+        return lower, lower + (1 << shift) - 1
+
+    def record(self, value):
+        """Record a duration in nanoseconds."""
+        value = max(int(value), 0)
+        shift = max(value.bit_length() - self.significant_bits, 0)
+        lower = (value >> shift) << shift
+        self.buckets[lower] = self.buckets.get(lower, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """Return the upper bound of the bucket that holds the given percentile (0 - 100) or None if empty."""
+        if not self.count:
+            return None
+        target = max(self.count * percent / 100, 1)
+        seen = 0
+        for lower in sorted(self.buckets):
+            seen += self.buckets[lower]
+            if seen >= target:
+                return min(self.bucket(lower)[1], self.max)
+        return self.max
+
+    def reset(self):
+        """Clear all recorded values."""
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def snapshot(self):
+        """Return a dictionary of the count, min, max, mean, percentiles, and [(lower, upper, count)] buckets."""
+        return {'count': self.count,
+                'min': self.min,
+                'max': self.max,
+                'mean': self.total / self.count if self.count else None,
+                'p50': self.percentile(50),
+                'p90': self.percentile(90),
+                'p99': self.percentile(99),
+                'p999': self.percentile(99.9),
+                'buckets': [self.bucket(lower) + (self.buckets[lower],) for lower in sorted(self.buckets)],
+                }
+
+
+class EventStats(object):
+    """Counters an event manager collects while stats are enabled.
+
+    Durations are recorded in nanoseconds. Latency is measured from when the key was received by the manager
+    (key.timestamp from time.perf_counter) to when the key handlers are called.
+    """
+
+    def __init__(self, significant_bits=4):
+        """Initialize the stats.
+
+        Args:
+            significant_bits (int)[4]: Number of significant bits for the histogram buckets.
+        """
+        self.lock = threading.Lock()
+        self.tick_histogram = LatencyHistogram(significant_bits)
+        self.latency_histogram = LatencyHistogram(significant_bits)
+        self.reset()
+
+    def reset(self):
+        """Reset all counters."""
+        with self.lock:
+            self.start_time = time.monotonic()
+            self.received = {}  # {joystick: {keytype: count}}
+            self.coalesced = 0
+            self.handler_calls = 0
+            self.high_water = {}  # {queue name: max depth}
+            self.last_tick = None
+            self.tick_histogram.reset()
+            self.latency_histogram.reset()
+
+    def add_received(self, key):
+        """Count a key event that the manager received."""
+        with self.lock:
+            counts = self.received.get(key.joystick, None)
+            if counts is None:
+                counts = self.received[key.joystick] = {}
+            counts[key.keytype] = counts.get(key.keytype, 0) + 1
+
+    def add_coalesced(self, count=1):
+        """Count key events that were merged with another buffered event or filtered by a coalesce policy."""
+        with self.lock:
+            self.coalesced += count
+
+    def add_handler_call(self, key):
+        """Count a call to the key handlers and record the latency from when the key was received."""
+        now = time.perf_counter()
+        with self.lock:
+            self.handler_calls += 1
+            timestamp = getattr(key, 'timestamp', None)
+            if timestamp is not None:
+                self.latency_histogram.record((now - timestamp) * 1e9)
+
+    def add_depth(self, name, depth):
+        """Save the queue depth if it is the highest depth for the queue name."""
+        if depth > self.high_water.get(name, 0):
+            with self.lock:
+                if depth > self.high_water.get(name, 0):
+                    self.high_water[name] = depth
+
+    def add_tick(self, duration):
+        """Record the nanosecond duration of a dispatch tick."""
+        with self.lock:
+            self.last_tick = duration
+            self.tick_histogram.record(duration)
+
+    def snapshot(self):
+        """Return a dictionary copy of the current stats."""
+        with self.lock:
+            tick = self.tick_histogram.snapshot()
+            tick['last'] = self.last_tick
+            return {'elapsed': time.monotonic() - self.start_time,
+                    'received': {joy: dict(counts) for joy, counts in self.received.items()},
+                    'coalesced': self.coalesced,
+                    'handler_calls': self.handler_calls,
+                    'high_water': dict(self.high_water),
+                    'tick': tick,
+                    'latency': self.latency_histogram.snapshot(),
+                    }
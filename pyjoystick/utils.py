@@ -3,10 +3,20 @@ import sys
 import platform
 import time
 import threading
+import traceback
 import contextlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
+try:
+    import numpy as np
+except (ImportError, Exception):
+    np = None
 
-__all__ = ['is_py27', 'is_64_bit', 'check_os', 'deadband', 'change_path', 'rescale', 'PeriodicThread']
+
+__all__ = ['is_py27', 'is_64_bit', 'check_os', 'deadband', 'change_path', 'rescale', 'PeriodicThread',
+           'AdaptiveInterval', 'OrderedExecutor', 'deadband_array', 'rescale_array', 'hat_to_range_array',
+           'hat_from_range_array']
 
 
 is_py27 = sys.version_info < (3, 0)
@@ -79,14 +89,148 @@ def rescale(value, curr_min, curr_max, new_min, new_max):
     return ((value - curr_min) / (curr_max - curr_min)) * (new_max - new_min) + new_min
 
 
+def _require_numpy(name):
+    """Raise an ImportError if NumPy is not installed."""
+    if np is None:
+        raise ImportError('NumPy is required to use {}'.format(name))
+
+
+def deadband_array(values, dead=0.2, scale=1, out=None):
+    """Return the deadband values for an array of controller axis values. This requires NumPy.
+
+    This has the same results as `deadband` for each value.
+
+    Args:
+        values (np.ndarray/list): Raw controller values -1 to 1.
+        dead (float)[0.2]: Deadband value
+        scale (int) [1]: 100, 10, 1 indicates the range -100 to 100 ...
+        out (np.ndarray)[None]: Float array to save the results in.
+
+    Returns:
+        values (np.ndarray): Float array of the deadband values.
+    """
+    _require_numpy('deadband_array')
+    values = np.asarray(values, dtype=float)
+    dead = abs(float(dead))
+
+    # Check if the deadband is the same as the scale
+    if dead == scale:
+        dead = scale * 0.99
+
+    result = np.where(values >= dead, values - dead, np.where(values <= -dead, values + dead, 0.0))
+    result /= (scale - dead)
+    result *= scale
+    if out is None:
+        return result
+    out[...] = result
+    return out
+
+
+def rescale_array(values, curr_min, curr_max, new_min, new_max, out=None):
+    """Convert an array of values from one scale to a new scale. This requires NumPy.
+
+    This has the same results as `rescale` for each value.
+
+    Args:
+        values (np.ndarray/list): Values to convert to the new scale
+        curr_max (int/float): Current maximum value for the current scale.
+        curr_min (int/float): Current minimum value for the current scale.
+        new_max (int/float): New maximum value for the new scale.
+        new_min (int/float): New minimum value for the new scale.
+        out (np.ndarray)[None]: Float array to save the results in.
+
+    Returns:
+        values (np.ndarray): Float array of the values in the new scale.
+    """
+    _require_numpy('rescale_array')
+    values = np.asarray(values)
+    out = np.subtract(values, curr_min, out=out, dtype=float)
+    out /= (curr_max - curr_min)
+    out *= (new_max - new_min)
+    out += new_min
+    return out
+
+
+# Hat bit flags to (x, y) range. Invalid values (Up and Down) are marked with 2.
+_HAT_RANGE_TABLE = [(((v & 2) > 0) - ((v & 8) > 0), ((v & 1) > 0) - ((v & 4) > 0))
+                    if (v & 5) != 5 and (v & 10) != 10 else (2, 2) for v in range(16)]
+
+
+def hat_to_range_array(hats):
+    """Return an (N, 2) int array of (right[1]/left[-1], up[1]/down[-1]) for an array of hat values. This requires
+    NumPy.
+
+    This has the same results as `Key.convert_to_hat_range` for each valid hat value.
+
+    Raises:
+        ValueError: If a hat value is not a valid hat value.
+    """
+    _require_numpy('hat_to_range_array')
+    hats = np.asarray(hats)
+    if hats.size and (hats.min() < 0 or hats.max() > 15):
+        raise ValueError('Invalid hat values')
+    ranges = np.asarray(_HAT_RANGE_TABLE, dtype=np.int8)[hats.astype(np.intp)]
+    if (ranges == 2).any():
+        raise ValueError('Invalid hat values')
+    return ranges
+
+
+def hat_from_range_array(ranges):
+    """Return an int array of hat values for an (N, 2) array of (x, y) ranges. This requires NumPy.
+
+    This has the same results as `Key.HatValues.from_range` for each valid range.
+
+    Raises:
+        ValueError: If a range value is not -1, 0, or 1.
+    """
+    _require_numpy('hat_from_range_array')
+    ranges = np.asarray(ranges)
+    if ranges.size and (ranges.min() < -1 or ranges.max() > 1):
+        raise ValueError('Invalid hat ranges')
+    x = ranges[..., 0].astype(np.intp)
+    y = ranges[..., 1].astype(np.intp)
+    return (np.where(x > 0, 2, 0) | np.where(x < 0, 8, 0) | np.where(y > 0, 1, 0) | np.where(y < 0, 4, 0))
+
+
 class PeriodicThread(threading.Thread):
-    def __init__(self, interval, target=None, name=None, args=None, kwargs=None, daemon=None):
+    """Thread that runs a function every interval seconds.
+
+    Calls are scheduled on absolute deadlines from time.monotonic(), so the period does not drift with the run time of
+    the function or with wall clock changes. stop() and join() wake the thread right away.
+
+    Overrun Policies (when a call runs past the next deadline):
+        * 'skip' - Skip the missed deadlines and stay on the original schedule.
+        * 'catch_up' - Run the missed calls back to back until the schedule is caught up.
+        * 'realign' - Start a new schedule one interval after the late call finished.
+
+    Precision mode sleeps until spin_budget seconds before the deadline and then busy waits on time.perf_counter() for
+    the rest. This removes most of the sleep overshoot for short intervals at the cost of CPU time. Only use it for
+    tight control loops. See get_spin_cost().
+    """
+
+    SKIP = 'skip'
+    CATCH_UP = 'catch_up'
+    REALIGN = 'realign'
+
+    def __init__(self, interval, target=None, name=None, args=None, kwargs=None, daemon=None, overrun=SKIP,
+                 precision=False, spin_budget=0.002):
         """Create a thread that will run a function periodically.
         Args:
             interval (int/float): How often to run a function in seconds.
+            overrun (str)['skip']: 'skip', 'catch_up', or 'realign' when a call runs past the next deadline.
+            precision (bool)[False]: If True sleep coarsely then spin until the deadline.
+            spin_budget (float)[0.002]: Seconds before the deadline to stop sleeping and start spinning.
         """
+        if overrun not in (self.SKIP, self.CATCH_UP, self.REALIGN):
+            raise ValueError('Invalid overrun policy {!r}'.format(overrun))
+
         self.interval = interval
+        self.overrun = overrun
+        self.precision = precision
+        self.spin_budget = spin_budget
         self.alive = threading.Event()
+        self._wake = threading.Event()  # Set to stop sleeping
+        self.reset_jitter()
         if args is None:
             args = tuple()
         if kwargs is None:
@@ -106,6 +250,7 @@ class PeriodicThread(threading.Thread):
 
     def start(self):
         """Start running the thread."""
+        self._wake.clear()
         self.alive.set()
         if not self._started.is_set():
             super(PeriodicThread, self).start()
@@ -116,21 +261,99 @@ class PeriodicThread(threading.Thread):
             self.alive.clear()
         except:
             pass
+        self._wake.set()
+
+    def reset_jitter(self):
+        """Reset the measured jitter."""
+        self.jitter_count = 0  # Number of calls measured
+        self.jitter_total = 0.0
+        self.last_jitter = 0.0  # Seconds the last call started after its deadline
+        self.max_jitter = 0.0
+        self.missed = 0  # Deadlines skipped by the 'skip' overrun policy
+        self.spin_time = 0.0  # Seconds spent spinning in precision mode
+        self.run_start = time.monotonic()
+
+    def get_jitter(self):
+        """Return a dictionary of the 'last', 'mean', and 'max' seconds calls started after their deadline with the
+        number of calls 'count' and 'missed' deadlines.
+        """
+        count = self.jitter_count
+        return {'last': self.last_jitter,
+                'mean': self.jitter_total / count if count else 0.0,
+                'max': self.max_jitter,
+                'count': count,
+                'missed': self.missed}
+
+    def get_spin_cost(self):
+        """Return the CPU cost of precision mode.
+
+        Returns:
+            cost (dict): Dictionary of the seconds spent spinning 'spin_time', the measured fraction of one CPU spent
+                spinning 'measured', and the 'estimate' fraction of one CPU from spin_budget / interval.
+        """
+        elapsed = time.monotonic() - self.run_start
+        estimate = 0.0
+        if self.precision and self.interval > 0:
+            estimate = min(self.spin_budget / self.interval, 1.0)
+        return {'spin_time': self.spin_time,
+                'measured': self.spin_time / elapsed if elapsed > 0 else 0.0,
+                'estimate': estimate}
+
+    def next_deadline(self, deadline, now):
+        """Return the next deadline after the call for the given deadline finished at now."""
+        interval = self.interval
+        if interval <= 0:
+            return now  # Run back to back
+        deadline += interval
+        if deadline > now:
+            return deadline
+
+        if self.overrun == self.SKIP:
+            missed = int((now - deadline) // interval) + 1
+            self.missed += missed
+            return deadline + missed * interval
+        elif self.overrun == self.REALIGN:
+            return now + interval
+        return deadline  # Run back to back
+
+    def sleep_until(self, deadline):
+        """Sleep until the monotonic deadline or until the thread is stopped."""
+        remaining = deadline - time.monotonic()
+        if not self.precision:
+            if remaining > 0:
+                self._wake.wait(remaining)
+            return
+
+        # Sleep coarsely then spin for the rest
+        end = time.perf_counter() + remaining
+        if remaining > self.spin_budget and self._wake.wait(remaining - self.spin_budget):
+            return
+
+        start = now = time.perf_counter()
+        wake = self._wake
+        while now < end and not wake.is_set():
+            now = time.perf_counter()
+        self.spin_time += now - start
 
     def run(self):
         """The thread will loop through running the set _target method (default _run()). This
         method can be paused and restarted.
         """
+        deadline = self.run_start = time.monotonic()
         while self.alive.is_set():
+            # Measure how late the call started
+            late = time.monotonic() - deadline
+            self.last_jitter = late
+            self.jitter_total += late
+            self.jitter_count += 1
+            if late > self.max_jitter:
+                self.max_jitter = late
+
             # Run the thread method
-            start = time.time()
             self._target(*self._args, **self._kwargs)
-            try:
-                sleep = self.interval - (time.time() - start)
-                if sleep > 0:
-                    time.sleep(sleep)
-            except ValueError:
-                pass  # sleep time less than 0
+
+            deadline = self.next_deadline(deadline, time.monotonic())
+            self.sleep_until(deadline)
 
     def join(self, timeout=None):
         """Join the thread closing it."""
@@ -150,3 +373,242 @@ class PeriodicThread(threading.Thread):
             pass
 
         return ttype is None  # Return False if there was an error
+
+
+class AdaptiveInterval(object):
+    """Choose the time to wait before the next dispatch from how many events the last dispatch handled.
+
+    The interval shrinks while events are flowing and grows after several idle dispatches. Once the interval reaches
+    max_interval the dispatcher can stop waking until the next event. The interval always stays between min_interval
+    and max_interval.
+
+    Adjustment Reasons:
+        * 'events' - Events were dispatched, so the interval shrinks by the shrink factor.
+        * 'busy' - At least busy_events were dispatched at once, so the interval drops to min_interval.
+        * 'dropped' - Events were dropped by a full buffer, so the interval drops to min_interval.
+        * 'idle' - idle_ticks dispatches in a row had no events, so the interval grows by the grow factor.
+        * 'sleep' - The interval is max_interval and the dispatcher waits for the next event instead of waking.
+        * 'wake' - An event woke the sleeping dispatcher, so the interval drops to min_interval.
+    """
+
+    def __init__(self, min_interval=0.002, max_interval=0.1, interval=None, shrink=0.5, grow=1.5, idle_ticks=3,
+                 busy_events=64, sleep_when_idle=True, history=32):
+        """Initialize the scheduler.
+
+        Args:
+            min_interval (float)[0.002]: Shortest interval in seconds.
+            max_interval (float)[0.1]: Longest interval in seconds.
+            interval (float)[None]: Starting interval. If None start at max_interval.
+            shrink (float)[0.5]: Multiply the interval by this when events are dispatched.
+            grow (float)[1.5]: Multiply the interval by this when idle.
+            idle_ticks (int)[3]: Number of dispatches in a row without events before the interval grows.
+            busy_events (int)[64]: Number of events in one dispatch that drops the interval to min_interval.
+            sleep_when_idle (bool)[True]: If True stop waking when idle at max_interval.
+            history (int)[32]: Number of recent adjustments to keep.
+        """
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError('Invalid interval bounds ({}, {})'.format(min_interval, max_interval))
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.shrink = shrink
+        self.grow = grow
+        self.idle_ticks = idle_ticks
+        self.busy_events = busy_events
+        self.sleep_when_idle = sleep_when_idle
+        self.history = history
+
+        if interval is None:
+            interval = max_interval
+        self.start_interval = self.clamp(interval)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def clamp(self, interval):
+        """Return the interval inside the min and max bounds."""
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def reset(self):
+        """Reset the interval to the starting interval and clear the adjustment counters."""
+        with self.lock:
+            self.interval = self.start_interval
+            self.sleeping = False
+            self.idle_count = 0  # Dispatches in a row without events
+            self.last_reason = None
+            self.adjustments = {}  # {reason: count}
+            self.recent = deque(maxlen=self.history)  # (time.monotonic(), interval, reason)
+
+    def adjust(self, interval, reason):
+        """Set the interval and record the reason if the interval or sleep state changed."""
+        interval = self.clamp(interval)
+        sleeping = reason == 'sleep'
+        if interval == self.interval and sleeping == self.sleeping:
+            return
+        with self.lock:
+            self.interval = interval
+            self.sleeping = sleeping
+            self.last_reason = reason
+            self.adjustments[reason] = self.adjustments.get(reason, 0) + 1
+            self.recent.append((time.monotonic(), interval, reason))
+
+    def update(self, count, dropped=0, held=False):
+        """Adjust the interval after a dispatch.
+
+        Args:
+            count (int): Number of events the dispatch handled.
+            dropped (int)[0]: Number of events dropped since the last dispatch.
+            held (bool)[False]: If events are held back for a later dispatch, so the dispatcher must not sleep.
+
+        Returns:
+            interval (float): Seconds to wait before the next dispatch or None to wait for the next event.
+        """
+        if dropped:
+            self.idle_count = 0
+            self.adjust(self.min_interval, 'dropped')
+        elif count >= self.busy_events:
+            self.idle_count = 0
+            self.adjust(self.min_interval, 'busy')
+        elif count:
+            self.idle_count = 0
+            self.adjust(self.interval * self.shrink, 'events')
+        else:
+            self.idle_count += 1
+            if self.idle_count >= self.idle_ticks:
+                if self.interval >= self.max_interval and self.sleep_when_idle and not held:
+                    self.adjust(self.interval, 'sleep')
+                else:
+                    self.adjust(self.interval * self.grow, 'idle')
+
+        if self.sleeping:
+            return None
+        return self.interval
+
+    def wake(self):
+        """Record that an event woke the sleeping dispatcher."""
+        self.idle_count = 0
+        self.adjust(self.min_interval, 'wake')
+
+    def snapshot(self):
+        """Return a dictionary of the 'interval', 'min_interval', 'max_interval', 'sleeping' state, 'last_reason',
+        {reason: count} 'adjustments', and the 'recent' list of (monotonic time, interval, reason) adjustments.
+        """
+        with self.lock:
+            return {'interval': self.interval,
+                    'min_interval': self.min_interval,
+                    'max_interval': self.max_interval,
+                    'sleeping': self.sleeping,
+                    'last_reason': self.last_reason,
+                    'adjustments': dict(self.adjustments),
+                    'recent': list(self.recent)}
+
+    def copy(self):
+        """Return a new scheduler with the same settings."""
+        return self.__class__(self.min_interval, self.max_interval, self.start_interval, self.shrink, self.grow,
+                              self.idle_ticks, self.busy_events, self.sleep_when_idle, self.history)
+
+    def __getstate__(self):
+        return {'min_interval': self.min_interval,
+                'max_interval': self.max_interval,
+                'start_interval': self.start_interval,
+                'shrink': self.shrink,
+                'grow': self.grow,
+                'idle_ticks': self.idle_ticks,
+                'busy_events': self.busy_events,
+                'sleep_when_idle': self.sleep_when_idle,
+                'history': self.history,
+                }
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+        self.lock = threading.Lock()
+        self.reset()
+
+
+class OrderedExecutor(object):
+    """Run calls on a thread pool. Calls with the same order key run one at a time in the order they were submitted.
+
+    Calls with different order keys run in parallel.
+
+    Overflow Policies (when an order key has queue_limit calls waiting):
+        * 'block' - Wait until the order key has room.
+        * 'drop_oldest' - Remove the oldest waiting call.
+        * 'drop_newest' - Do not add the new call.
+    """
+
+    BLOCK = 'block'
+    DROP_OLDEST = 'drop_oldest'
+    DROP_NEWEST = 'drop_newest'
+
+    def __init__(self, max_workers=4, queue_limit=256, overflow=BLOCK, name='pyjoystick-OrderedExecutor'):
+        """Initialize the executor.
+
+        Args:
+            max_workers (int)[4]: Number of threads in the pool.
+            queue_limit (int)[256]: Number of calls that can wait for each order key. 0 or None for no limit.
+            overflow (str)['block']: 'block', 'drop_oldest', or 'drop_newest' when an order key is full.
+            name (str)['pyjoystick-OrderedExecutor']: Thread name prefix.
+        """
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.overflow = overflow
+        self.dropped = 0
+        self.pool = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self._lock = threading.Condition()
+        self._queues = {}  # {order key: deque of (func, args)}. An order key in here has a running drain task.
+
+    def submit(self, order_key, func, *args):
+        """Run the function with the args after the calls that were submitted for the order key.
+
+        Returns:
+            success (bool): False if the call was dropped.
+        """
+        with self._lock:
+            while True:
+                queue = self._queues.get(order_key, None)
+                if queue is None:
+                    self._queues[order_key] = deque([(func, args)])
+                    self.pool.submit(self._run, order_key)
+                    return True
+                elif not self.queue_limit or len(queue) < self.queue_limit:
+                    queue.append((func, args))
+                    return True
+                elif self.overflow == self.DROP_OLDEST:
+                    queue.popleft()
+                    self.dropped += 1
+                elif self.overflow == self.DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                else:
+                    self._lock.wait()
+
+    def _run(self, order_key):
+        """Run the calls for the order key until there are no more calls."""
+        while True:
+            with self._lock:
+                queue = self._queues[order_key]
+                if not queue:
+                    del self._queues[order_key]
+                    self._lock.notify_all()
+                    return
+                func, args = queue.popleft()
+                self._lock.notify_all()
+
+            try:
+                func(*args)
+            except Exception:
+                traceback.print_exc()
+
+    def pending(self):
+        """Return the number of calls waiting to run."""
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def join(self, timeout=None):
+        """Wait until all submitted calls finished. Return False if the timeout expired."""
+        with self._lock:
+            return self._lock.wait_for(lambda: not self._queues, timeout)
+
+    def shutdown(self, wait=True):
+        """Stop the thread pool."""
+        self.pool.shutdown(wait=wait)
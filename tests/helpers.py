@@ -0,0 +1,13 @@
+def make_joystick(identifier=0, name='Test Joystick', numaxes=6, numbuttons=16, numhats=1, numballs=0):
+    """Return a Joystick with the given identity and key counts that does not open a device."""
+    from pyjoystick.interface import Joystick
+
+    joy = Joystick()
+    joy.identifier = identifier
+    joy.name = name
+    joy.numaxes = numaxes
+    joy.numbuttons = numbuttons
+    joy.numhats = numhats
+    joy.numballs = numballs
+    joy.init_keys()
+    return joy
@@ -48,7 +48,7 @@ if __name__ == '__main__':
     async def key_received(key):
         if monitor is None:
             print(key, '==', key.value)
-        elif key.joystick == monitor:
+        elif key.joystick.matches(monitor):
             await send('EVENT: ' + str(key))
             monitor.update_key(key)
 
@@ -27,7 +27,7 @@ if __name__ == '__main__':
     def key_received(key):
         if monitor is None:
             print(key, '==', key.value)
-        elif key.joystick == monitor:
+        elif key.joystick.matches(monitor):
             monitor.update_key(key)
 
             keys = '\t'.join((format_key(k) for k in monitor.keys if k.keytype in monitor_keytypes))
@@ -0,0 +1,43 @@
+
+def test_axis_table():
+    import math
+    from pyjoystick.utils import deadband
+    from pyjoystick.axis_response import AxisTable
+
+    table = AxisTable(deadband=0.2)
+    table.set_axis(2, deadband=0)
+    table.set_axis(3, deadband=0.1, expo=1)
+    table.set_axis(4, deadband=0, curve=lambda value: value / 2)
+
+    # Default matches the scalar deadband
+    for value in (-1, -0.75, -0.2, -0.1, 0, 0.1, 0.2, 0.21, 0.5, 0.9, 1):
+        assert math.isclose(table.process(0, value)[0], deadband(value, 0.2), abs_tol=1e-6), value
+    assert table.process(0, 0.5) == (table.process(0, 0.5)[0], None, None)
+
+    assert table.process(2, 0.05)[0] == 0.05
+    assert math.isclose(table.process(3, -0.55)[0], -0.125, abs_tol=1e-4)  # ((0.55 - 0.1) / 0.9) ** 3
+    assert math.isclose(table.process(4, 0.5)[0], 0.25, abs_tol=1e-6)
+    assert table.process(4, 1.5)[0] == 0.5  # Clamped
+
+    # Radial deadband for the stick pair
+    table.set_pair(0, 1, deadband=0.2)
+    assert table.process(0, 0.15) == (0.0, 1, 0.0)
+    value, partner, partner_value = table.process(1, 0.15)  # Magnitude is over the deadband
+    assert partner == 0 and value > 0 and math.isclose(value, partner_value)
+    expected = (math.hypot(0.15, 0.15) - 0.2) / 0.8 / math.sqrt(2)
+    assert math.isclose(value, expected, abs_tol=1e-4)
+
+    # Moving one axis changes the other axis
+    x, partner, y = table.process(0, 0.6)
+    assert partner == 1 and x > 0 and y > value  # The magnitude grew
+    x, partner, y = table.process(0, 1)
+    assert math.isclose(math.hypot(x, y), 1, abs_tol=1e-6)  # Square gate corners are clamped
+
+    table.remove_pair(1)
+    assert table.pairs == {} and table.process(0, 0.5)[1] is None
+
+
+if __name__ == '__main__':
+    test_axis_table()
+
+    print('All tests finished successfully!')
@@ -0,0 +1,25 @@
+
+def test_keys_to_columns():
+    import math
+    from pyjoystick.interface import Key, KeyTypes, Joystick
+    from pyjoystick.batch import keys_to_columns
+
+    joy, other = Joystick(), Joystick()
+    joy.identifier, other.identifier = 0, 1
+    keys = [Key(Key.AXIS, 1, 0.5, joy), Key(Key.BUTTON, 3, 1, other), Key(Key.BALL, 0, (1, 2), joy)]
+    keys[0].timestamp = 12.5
+
+    columns = keys_to_columns(keys, {joy: 0})
+    assert list(columns.devices) == [0, -1, 0]
+    assert [KeyTypes.from_code(code) for code in columns.types] == [Key.AXIS, Key.BUTTON, Key.BALL]
+    assert list(columns.numbers) == [1, 3, 0]
+    assert columns.values[:2].tolist() == [0.5, 1] and math.isnan(columns.values[2])
+    assert columns.timestamps[0] == 12.5 and math.isnan(columns.timestamps[1])
+
+    assert all(len(column) == 0 for column in keys_to_columns([]))
+
+
+if __name__ == '__main__':
+    test_keys_to_columns()
+
+    print('All tests finished successfully!')
@@ -0,0 +1,96 @@
+
+def make_items():
+    from collections import OrderedDict
+    from pyjoystick.stash import Stash
+    return {'events': OrderedDict(), 'buttons': Stash()}
+
+
+def test_policies():
+    from pyjoystick.interface import Key
+    from pyjoystick.coalesce import LatestValue, KeepAll, MinDelta
+
+    items = make_items()
+    policy = LatestValue()
+    for value in (0.1, 0.2, 0.3):
+        policy.save(items, Key(Key.AXIS, 0, value), value)
+    assert list(items['events'].values()) == [0.3] and len(items['buttons']) == 0
+
+    items = make_items()
+    policy = KeepAll()
+    for value in (0.1, 0.2, 0.3):
+        policy.save(items, Key(Key.AXIS, 0, value), value)
+    assert [k.value for k in items['buttons']] == [0.1, 0.2, 0.3] and len(items['events']) == 0
+
+    items = make_items()
+    policy = MinDelta(0.1)
+    for value in (0.1, 0.15, 0.25, 0.3, -0.5):
+        policy.save(items, Key(Key.AXIS, 0, value), value)
+        policy.save(items, Key(Key.AXIS, 1, value), value)
+    assert list(items['events'].values()) == [-0.5, -0.5]
+
+    items = make_items()
+    policy = MinDelta(0.1, keep_all=True)
+    for value in (0.1, 0.15, 0.25, 0.3, -0.5):
+        policy.save(items, Key(Key.AXIS, 0, value), value)
+    assert [k.value for k in items['buttons']] == [0.1, 0.25, -0.5]
+
+
+def test_rate_limited():
+    from pyjoystick.interface import Key
+    from pyjoystick.coalesce import RateLimited
+
+    now = [0]
+    policy = RateLimited(10, clock=lambda: now[0])
+
+    items = make_items()
+    policy.save(items, Key(Key.AXIS, 0, 0.1), 0.1)
+    now[0] = 0.05
+    policy.save(items, Key(Key.AXIS, 0, 0.2), 0.2)  # Too soon
+    policy.save(items, Key(Key.AXIS, 0, 0.3), 0.3)  # Too soon
+    assert list(items['events'].values()) == [0.1]
+    assert policy.pop_due() == []
+
+    now[0] = 0.1
+    due = policy.pop_due()
+    assert [value for key, value in due] == [0.3]
+    assert policy.pop_due() == []
+
+
+def test_manager_policies():
+    from pyjoystick.interface import Joystick, Key
+    from pyjoystick.coalesce import LatestValue, KeepAll
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy = Joystick()
+    joy.identifier, joy.name, joy.numaxes, joy.numhats = 0, 'Dashboard', 2, 1
+    joy.init_keys()
+    joy.set_deadband(0)
+    other = Joystick()
+    other.identifier, other.name, other.numaxes, other.numhats = 1, 'Recorder', 2, 1
+    other.init_keys()
+    other.set_deadband(0)
+
+    keys = []
+    mngr = ThreadEventManager(handle_key_event=lambda k: keys.append((k.joystick.name, k.keytype, k.value)),
+                              coalesce_policies={Key.HAT: LatestValue()})
+    mngr.set_coalesce_policy(Key.AXIS, KeepAll(), joystick=other)
+    mngr.save_joystick(joy)
+    mngr.save_joystick(other)
+
+    for joystick in (joy, other):
+        for value in (Key.HAT_UP, Key.HAT_LEFT):
+            mngr.save_key_event(Key(Key.HAT, 0, value, joystick))
+        for value in (0.5, 0.75):
+            mngr.save_key_event(Key(Key.AXIS, 0, value, joystick))
+    mngr.process_events()
+
+    assert keys == [('Dashboard', Key.HAT, Key.HAT_LEFT), ('Dashboard', Key.AXIS, 0.75),
+                    ('Recorder', Key.HAT, Key.HAT_LEFT), ('Recorder', Key.AXIS, 0.5), ('Recorder', Key.AXIS, 0.75)], keys
+
+
+if __name__ == '__main__':
+    test_policies()
+    test_rate_limited()
+    test_manager_policies()
+
+    print('All tests finished successfully!')
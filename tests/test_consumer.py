@@ -0,0 +1,66 @@
+def test_consumer_buffer():
+    from pyjoystick.interface import Key
+    from pyjoystick.coalesce import KeepAll
+    from pyjoystick.consumer import Consumer
+
+    joy = object()
+    consumer = Consumer(queue_limit=3)
+    for i in range(5):
+        consumer.put(Key(Key.BUTTON, i, 1, joy))
+    axis = Key(Key.AXIS, 0, 0.5, joy)
+    consumer.put(axis)
+    consumer.put(Key(Key.AXIS, 0, 0.8, joy))
+    assert consumer.dropped == 2
+
+    keys = consumer.poll_keys()
+    assert [(k.keytype, k.number, k.value) for k in keys] == [
+        (Key.AXIS, 0, 0.8), (Key.BUTTON, 2, 1), (Key.BUTTON, 3, 1), (Key.BUTTON, 4, 1)]
+    assert axis.value == 0.5  # The shared key is not changed
+    assert consumer.poll_keys() == []
+
+    # Drop newest with an axis policy that keeps every event
+    consumer = Consumer(queue_limit=2, overflow=Consumer.DROP_NEWEST, coalesce_policies={Key.AXIS: KeepAll()})
+    for i in range(4):
+        consumer.put(Key(Key.AXIS, 0, i / 4, joy))
+    assert [k.value for k in consumer.poll_keys()] == [0, 0.25] and consumer.dropped == 2
+
+    try:
+        Consumer(overflow='block')
+        raise AssertionError('Invalid overflow policy was accepted')
+    except ValueError:
+        pass
+
+
+def test_consumer_thread():
+    import threading
+    from pyjoystick.interface import Key
+    from pyjoystick.consumer import Consumer
+
+    joy = object()
+    received = []
+    delivered = threading.Event()
+
+    def callback(keys):
+        received.append(keys)
+        delivered.set()
+
+    consumer = Consumer(callback, batch=True).start()
+    try:
+        assert consumer.is_running()
+        consumer.put(Key(Key.BUTTON, 0, 1, joy))
+        assert delivered.wait(1)
+        assert [k.number for k in received[0]] == [0]
+        assert consumer.delivered == 1
+    finally:
+        consumer.stop()
+    assert not consumer.is_running()
+
+    # No callback uses the pull interface
+    assert not Consumer().start().is_running()
+
+
+if __name__ == '__main__':
+    test_consumer_buffer()
+    test_consumer_thread()
+
+    print('All tests finished successfully!')
@@ -0,0 +1,64 @@
+
+def test_channel_history():
+    from pyjoystick.history import ChannelHistory
+
+    channel = ChannelHistory(capacity=5)
+    assert len(channel) == 0 and channel.value_at(1) is None
+    assert [list(a) for a in channel.window()] == [[], []]
+
+    for i in range(8):  # Wraps around the ring
+        channel.append(float(i), i / 10)
+    assert len(channel) == 5 and channel.count == 8
+
+    times, values = channel.window()
+    assert times.tolist() == [3, 4, 5, 6, 7] and values.tolist() == [0.3, 0.4, 0.5, 0.6, 0.7]
+    times, values = channel.window(4, 6)
+    assert times.tolist() == [4, 5, 6] and values.tolist() == [0.4, 0.5, 0.6]
+    assert channel.window(4.5, 5.5)[0].tolist() == [5]
+    assert channel.window(10, 20)[0].tolist() == []
+
+    assert channel.value_at(2) is None  # Older than the history
+    assert channel.value_at(3) == 0.3
+    assert channel.value_at(5.9) == 0.5
+    assert channel.value_at(100) == 0.7
+
+    channel.clear()
+    assert len(channel) == 0
+
+
+def test_device_history():
+    import math
+    from pyjoystick.interface import Key, Joystick
+    from pyjoystick.history import HistoryRecorder
+
+    clock = [0.0]
+    joy = Joystick()
+    recorder = HistoryRecorder(capacity=100, clock=lambda: clock[0])
+    for i in range(20):
+        clock[0] = i / 10
+        recorder.record(Key(Key.AXIS, 3, i / 20, joy))
+        if i == 10:
+            recorder.record(Key(Key.BUTTON, 0, 1, joy))
+            recorder.record(Key(Key.BALL, 0, (1, 2), joy))
+
+    history = recorder.get(joy)
+    times, values = history.window(Key.AXIS, 3, seconds=0.45)
+    assert [round(t, 1) for t in times] == [1.5, 1.6, 1.7, 1.8, 1.9]
+    assert history.window(Key.AXIS, 3, start=0.05, end=0.25)[1].tolist() == [0.05, 0.1]
+    assert [list(a) for a in history.window(Key.HAT, 0)] == [[], []]
+
+    assert history.value_at(Key.AXIS, 3, 0.55) == 0.25
+    assert history.value_at(Key.BUTTON, 0, 0.5, default=0) == 0
+    state = history.state_at(1.25)
+    assert state[(Key.AXIS, 3)] == 0.6 and state[(Key.BUTTON, 0)] == 1 and math.isnan(state[(Key.BALL, 0)])
+    assert history.state_at(-1) == {}
+
+    recorder.clear()
+    assert recorder.get(joy) is None
+
+
+if __name__ == '__main__':
+    test_channel_history()
+    test_device_history()
+
+    print('All tests finished successfully!')
@@ -0,0 +1,163 @@
+from helpers import make_joystick
+
+
+def test_pickle_key():
+    import pickle
+    from pyjoystick.interface import Key, Joystick
+
+    joy = make_joystick(identifier=1001).register()
+    key = Key(Key.HAT, 0, Key.HAT_UP, joy, is_repeat=True)
+    key.controller_key_name = 'dpup'
+
+    data = pickle.dumps(key)
+    assert len(data) < 200, 'Key pickled the joystick graph {} bytes'.format(len(data))
+
+    new_key = pickle.loads(data)
+    assert new_key.joystick is joy, 'The key did not resolve the registered joystick!'
+    assert new_key.keytype == Key.HAT and new_key.number == 0 and new_key.value == Key.HAT_UP
+    assert new_key.is_repeat and not new_key.override
+    assert new_key.controller_key_name == 'dpup'
+
+    # Unregistered joystick references create a lightweight joystick
+    joy.unregister()
+    new_joy = pickle.loads(pickle.dumps(joy))
+    assert new_joy is not joy
+    assert new_joy.get_id() == 1001 and new_joy.get_name() == joy.get_name()
+    assert len(new_joy.axis) == 6 and len(new_joy.button) == 16 and len(new_joy.hat) == 1
+    assert Joystick.get_registered(1001) is new_joy
+    new_joy.unregister()
+
+    # Key without a joystick
+    new_key = pickle.loads(pickle.dumps(Key(Key.AXIS, 2, -0.5)))
+    assert new_key.joystick is None and new_key.keytype == Key.AXIS and new_key.value == -0.5
+
+    # Keys for an unregistered joystick get a lightweight reference that is not registered
+    new_key = pickle.loads(pickle.dumps(Key(Key.BUTTON, 1, 1, make_joystick(identifier=1002, name='Gone'))))
+    assert new_key.joystick is not None and new_key.joystick == make_joystick(identifier=1002, name='Gone')
+    assert Joystick.get_registered(1002) is None
+
+    # Joysticks with the same identifier resolve by name (other backends and composites at the default id)
+    first = make_joystick(identifier=-1, name='First').register()
+    second = make_joystick(identifier=-1, name='Second').register()
+    assert pickle.loads(pickle.dumps(Key(Key.BUTTON, 0, 1, first))).joystick is first
+    assert pickle.loads(pickle.dumps(Key(Key.BUTTON, 0, 1, second))).joystick is second
+    assert pickle.loads(pickle.dumps(second)) is second
+    first.unregister()
+    second.unregister()
+
+
+def test_copy_key():
+    import copy
+    from pyjoystick.interface import Key, Joystick
+
+    joy = make_joystick(identifier=1003, name='Copied')  # Not registered
+    key = Key(Key.AXIS, 1, 0.5, joy)
+    key.controller_key_name = 'lefty'
+
+    shallow = copy.copy(key)
+    assert shallow is not key and shallow.joystick is joy
+    assert shallow.value == 0.5 and shallow.controller_key_name == 'lefty'
+
+    deep = copy.deepcopy(key)
+    assert deep.joystick is not joy and deep.joystick == joy and deep.value == 0.5
+    assert deep.joystick.axis[1].joystick is deep.joystick
+
+    # Copying a joystick does not register it
+    registered = dict(Joystick.REGISTRY)
+    new_joy = copy.deepcopy(joy)
+    assert new_joy == joy and new_joy is not joy and len(new_joy.button) == 16
+    assert dict(Joystick.REGISTRY) == registered
+    assert copy.copy(joy).button is joy.button
+
+
+def test_keyname():
+    from pyjoystick.interface import Key, KeyTemplate
+
+    assert str(Key(Key.AXIS, 0, 0.5)) == 'Axis 0'
+    assert str(Key(Key.AXIS, 1, -0.5)) == '-Axis 1'
+    assert str(Key(Key.AXIS, 1, 0.25)) == 'Axis 1'  # Cached by sign not by value
+    assert str(Key(Key.BUTTON, 3, 1)) == 'Button 3'
+    assert str(Key(Key.HAT, 0, Key.HAT_UPLEFT)) == 'Hat 0 [Up Left]'
+    assert str(Key(Key.HAT, 0, Key.HAT_DOWN)) == 'Hat 0 [Down]'
+
+    key = Key(Key.HAT, 0, Key.HAT_UPLEFT)
+    assert Key.to_keyname(key) == Key.format_keyname(key)
+
+    template = Key.parse_keyname('Joystick Name: Hat 2 [Down Right]')
+    assert template == KeyTemplate(Key.HAT, 2, Key.HAT_DOWNRIGHT)
+    assert Key.parse_keyname('Joystick Name: Hat 2 [Down Right]') is template, 'parse_keyname is not memoized!'
+
+    key = Key.from_keyname('-Axis 4')
+    assert key.keytype == Key.AXIS and key.number == 4 and key.value == -1
+    key.value = 1
+    assert Key.from_keyname('-Axis 4').value == -1, 'from_keyname returned a shared key!'
+
+    key = Key.from_keyname(Key(Key.BUTTON, 5, 1))
+    assert key.keytype == Key.BUTTON and key.number == 5 and key.value == 0
+
+
+def test_joystick_identity():
+    from pyjoystick.interface import JoystickStash
+
+    joy = make_joystick(identifier=0, name='Gamepad')
+    same = make_joystick(identifier=0, name='Gamepad')
+    other = make_joystick(identifier=1, name='Gamepad')
+
+    assert joy == same and hash(joy) == hash(same)
+    assert joy != other and hash(joy) != hash(other)
+    assert {joy: 1}[same] == 1
+
+    # The cached identity follows the identifier and name
+    same.name = 'Renamed'
+    assert joy != same
+    same.name = 'Gamepad'
+    assert joy == same
+
+    # No loose matching with ==
+    assert joy != 'Gamepad'
+    assert joy != 0
+
+    # Explicit loose matching
+    assert joy.matches('Gamepad')
+    assert joy.matches(0)
+    assert not joy.matches(True)
+    assert joy.matches(other)  # Same name
+
+    sticks = JoystickStash([make_joystick(identifier=2, name='Stick'), joy])
+    assert sticks['Gamepad'] is joy
+    assert sticks[same] is joy
+    assert 'Stick' in sticks
+    assert 'Throttle' not in sticks
+
+    # Two joysticks of the same model resolve by identity before the loose match
+    pads = JoystickStash([joy, other])
+    assert pads[make_joystick(identifier=1, name='Gamepad')] is other
+    assert pads['Gamepad'] is joy
+    assert pads.remove(make_joystick(identifier=1, name='Gamepad')) is other and pads == [joy]
+
+
+def test_axis_threshold():
+    joy = make_joystick()
+    joy.set_axis_threshold(0.05)
+    joy.set_axis_threshold(0.2, 1)
+    assert joy.get_axis_threshold() == 0.05 and joy.get_axis_threshold(1) == 0.2 and joy.get_axis_threshold(0) == 0.05
+
+    forwarded = [v for v in (0.5, 0.51, 0.54, 0.56, 0.58, 0.62, 0.001, 0) if joy.check_axis_change(0, v)]
+    assert forwarded == [0.5, 0.56, 0.62, 0.001, 0], forwarded
+    assert joy.suppressed_events == 3
+
+    forwarded = [v for v in (0.5, 0.6, 0.69, 0.71) if joy.check_axis_change(1, v)]
+    assert forwarded == [0.5, 0.71], forwarded
+
+    joy.set_axis_threshold(None, 1)
+    assert joy.get_axis_threshold(1) == 0.05
+
+
+if __name__ == '__main__':
+    test_pickle_key()
+    test_copy_key()
+    test_keyname()
+    test_joystick_identity()
+    test_axis_threshold()
+
+    print('All tests finished successfully!')
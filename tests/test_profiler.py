@@ -0,0 +1,54 @@
+
+def test_handler_profiler():
+    import io
+    import time
+    import warnings
+    from pyjoystick.profiler import HandlerProfiler, SlowHandlerWarning
+
+    def fast(value):
+        return value + 1
+
+    def slow(value):
+        time.sleep(0.01)
+        return value
+
+    profiler = HandlerProfiler()
+    assert profiler.call(fast, 1) == 2
+    profiled = profiler.wrap(slow)
+    assert profiled(5) == 5 and profiled.__wrapped__ is slow
+    profiled(5)
+
+    rows = profiler.top()
+    assert [row['func'] for row in rows] == [slow, fast]
+    assert rows[0]['calls'] == 2 and rows[0]['max_ns'] >= 10000000 and rows[0]['slow'] == 0
+    assert rows[1]['calls'] == 1
+    assert [row['func'] for row in profiler.top(1, sort='calls')] == [slow]
+
+    out = io.StringIO()
+    profiler.dump(file=out)
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 3 and lines[1].endswith('test_handler_profiler.<locals>.slow')
+
+    # Over budget with a callback
+    found = []
+    profiler = HandlerProfiler(budget=0.005, on_slow=lambda func, duration: found.append((func, duration)))
+    profiler.call(fast, 1)
+    profiler.call(slow, 1)
+    assert len(found) == 1 and found[0][0] is slow and found[0][1] >= 5000000
+    assert profiler.top(sort='slow')[0]['slow'] == 1
+
+    # Over budget warning
+    profiler.on_slow = None
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        profiler.call(slow, 1)
+    assert len(caught) == 1 and issubclass(caught[0].category, SlowHandlerWarning)
+
+    profiler.reset()
+    assert profiler.top() == []
+
+
+if __name__ == '__main__':
+    test_handler_profiler()
+
+    print('All tests finished successfully!')
@@ -0,0 +1,69 @@
+
+def test_ring_buffer():
+    from pyjoystick.ring_buffer import RingBuffer
+
+    ring = RingBuffer(4)
+    assert ring.drain() == []
+    for i in range(3):
+        assert ring.put(i)
+    assert len(ring) == 3
+    assert ring.drain() == [0, 1, 2]
+
+    # Wrap around
+    for i in range(3, 9):
+        ring.put(i)
+    assert ring.drain() == [3, 4, 5, 6]
+    assert ring.dropped == 2
+    assert ring.drain() == []
+
+    # Overwrite the oldest items
+    ring = RingBuffer(4, RingBuffer.DROP_OLDEST)
+    assert ring.peek_overwrite() is None
+    for i in range(10):
+        assert ring.put(i)
+    assert ring.peek_overwrite() == 6
+    assert ring.drain() == [7, 8, 9]  # The producer may be overwriting 6 in the slot the next put writes
+    assert ring.overwritten == 7
+    ring.put(10)
+    assert ring.peek_overwrite() is None
+    assert ring.drain() == [10]
+
+    try:
+        RingBuffer(4, 'block')
+        raise AssertionError('Invalid overflow policy did not raise a ValueError!')
+    except ValueError:
+        pass
+
+
+def test_ring_buffer_threads():
+    import time
+    import threading
+    from pyjoystick.ring_buffer import RingBuffer
+
+    ring = RingBuffer(16)
+    count = 2000
+    found = []
+
+    def produce():
+        i = 0
+        while i < count:
+            if ring.put(i):
+                i += 1
+            else:
+                time.sleep(0)
+
+    th = threading.Thread(target=produce)
+    th.start()
+    while len(found) < count:
+        found.extend(ring.drain())
+        time.sleep(0)
+    th.join()
+
+    assert found == list(range(count))
+
+
+if __name__ == '__main__':
+    test_ring_buffer()
+    test_ring_buffer_threads()
+
+    print('All tests finished successfully!')
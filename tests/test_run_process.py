@@ -0,0 +1,216 @@
+from helpers import make_joystick
+
+
+
+def test_bounded_queue():
+    from queue import Empty
+    from pyjoystick.interface import Key
+    from pyjoystick.run_process import MultiprocessingEventManager
+
+    joy = make_joystick(0, 'Gamepad')
+
+    def get_cmds(mngr):
+        cmds = []
+        while len(cmds) < mngr.queue_limit:
+            cmds.append(mngr.queue.get(timeout=1))
+        return cmds
+
+    # Drop newest
+    mngr = MultiprocessingEventManager(queue_limit=2, buffer_overflow=MultiprocessingEventManager.OVERFLOW_DROP_NEWEST)
+    for i in range(4):
+        mngr._handle_key_event(Key(Key.BUTTON, i, 1, joy))
+    assert [args[0].number for name, args, kwargs in get_cmds(mngr)] == [0, 1]
+    assert mngr._unsent_dropped == {joy: 2}
+
+    # The dropped counts are sent with the next key event that fits
+    mngr._handle_key_event(Key(Key.BUTTON, 4, 1, joy))
+    name, args, kwargs = mngr.queue.get(timeout=1)
+    assert name == 'receive_key_event' and args[0].number == 4
+    name, args, kwargs = mngr.queue.get(timeout=1)
+    assert name == 'receive_dropped_events'
+    mngr.receive_dropped_events(*args)
+    assert mngr.get_dropped_events(joy) == 2 and mngr._unsent_dropped == {}
+
+    # Drop oldest keeps the command order and never drops joystick commands
+    mngr = MultiprocessingEventManager(queue_limit=3, buffer_overflow=MultiprocessingEventManager.OVERFLOW_DROP_OLDEST)
+    mngr.send_cmd('save_joystick', joy)
+    for i in range(20):
+        mngr._handle_key_event(Key(Key.BUTTON, i, 1, joy))
+    mngr.send_cmd('delete_joystick', joy)
+    names, numbers = [], []
+    while True:
+        try:
+            name, args, kwargs = mngr.queue.get(timeout=1 if 'delete_joystick' not in names else 0.1)
+        except Empty:
+            break
+        if name == 'receive_dropped_events':
+            mngr.receive_dropped_events(*args)
+        else:
+            names.append(name)
+            if name == 'receive_key_event':
+                numbers.append(args[0].number)
+    assert names[0] == 'save_joystick' and names[-1] == 'delete_joystick'
+    assert numbers == sorted(numbers) and numbers[-1] == 19  # The newest key is kept
+    assert len(numbers) + mngr.get_dropped_events(joy) == 20
+
+    # Block then drop after the timeout
+    mngr = MultiprocessingEventManager(queue_limit=1, buffer_overflow=MultiprocessingEventManager.OVERFLOW_BLOCK,
+                                       block_timeout=0.01)
+    assert mngr.send_key_cmd('receive_key_event', Key(Key.BUTTON, 0, 1, joy))
+    assert not mngr.send_key_cmd('receive_key_event', Key(Key.BUTTON, 1, 1, joy))
+    assert mngr._unsent_dropped == {joy: 1}
+
+
+def test_stats():
+    import pickle
+    from pyjoystick.interface import Key
+    from pyjoystick.run_process import MultiprocessingEventManager
+
+    joy = make_joystick(0, 'Gamepad')
+
+    handled = []
+    mngr = MultiprocessingEventManager(handle_key_event=handled.append, collect_stats=True)
+    mngr.save_joystick(joy)
+
+    # Keys are timestamped in the event process and received in the main process
+    mngr._handle_key_event(Key(Key.BUTTON, 0, 1, joy))
+    name, args, kwargs = mngr.queue.get(timeout=1)
+    getattr(mngr, name)(*pickle.loads(pickle.dumps(args)))
+
+    stats = mngr.stats()
+    assert stats['received'] == {joy: {Key.BUTTON: 1}}
+    assert stats['handler_calls'] == 1 and stats['latency']['count'] == 1
+    assert len(handled) == 1 and handled[0].joystick is joy
+
+    # Only a flag is sent to the event process, which builds its own EventStats
+    state = mngr.__getstate__()
+    assert state['collect_stats'] is True and 'event_stats' not in state
+    child = MultiprocessingEventManager.__new__(MultiprocessingEventManager)
+    child.__setstate__(state)
+    assert child.event_stats is not None and child.event_stats is not mngr.event_stats
+
+
+def test_key_joystick():
+    import pickle
+    from pyjoystick.interface import Key
+    from pyjoystick.run_process import MultiprocessingEventManager
+
+    saved = make_joystick(0, 'Gamepad')
+
+    # Event process
+    child = MultiprocessingEventManager(dispatch_mode=MultiprocessingEventManager.DISPATCH_POLL)
+    child._save_joystick(saved)
+    name, args, kwargs = child.queue.get(timeout=1)
+    data = pickle.dumps(args)
+    saved.unregister()  # The main process has its own registered joysticks
+
+    # Main process
+    main = MultiprocessingEventManager(dispatch_mode=MultiprocessingEventManager.DISPATCH_POLL)
+    getattr(main, name)(*pickle.loads(data))
+    main_joy = main.joysticks[0]
+    assert main_joy is not saved and main_joy == saved
+
+    # Key events give a new joystick object with the SDL instance id, not the saved device index
+    event_joy = make_joystick(5, 'Gamepad')
+    child._handle_key_event(Key(Key.BUTTON, 1, 1, event_joy))
+    name, args, kwargs = child.queue.get(timeout=1)
+    key = pickle.loads(pickle.dumps(args))[0]
+    assert key.joystick is main_joy
+
+    getattr(main, name)(key)
+    events = main.poll()
+    assert list(events) == [main_joy] and len(main.joysticks) == 1, 'The key was added as a new joystick!'
+    assert [str(k) for k in events[main_joy]['buttons']] == ['Button 1']
+    main_joy.unregister()
+
+
+def test_process_key_event():
+    from queue import Empty
+    from pyjoystick.interface import Key
+    from pyjoystick.composite import CompositeJoystick
+    from pyjoystick.axis_response import AxisTable
+    from pyjoystick.run_process import MultiprocessingEventManager
+
+    def sent():
+        values = []
+        while True:
+            try:
+                name, args, kwargs = mngr.queue.get(timeout=0.1)
+            except Empty:
+                return values
+            if name == 'receive_key_event':
+                values.append((str(args[0].joystick), args[0].keytype, args[0].number,
+                               round(args[0].value, 4)))
+
+    gamepad, stick, other = make_joystick(0, 'Gamepad'), make_joystick(1, 'Stick'), make_joystick(2, 'Other')
+    gamepad.set_deadband(0.2)
+    gamepad.set_axis_threshold(0.05)
+    flight = CompositeJoystick('Flight Controls', mapping=[('Stick', Key.BUTTON, 3, 5)])
+
+    # The event process applies the deadband, axis threshold, composite remap, and axis tables before sending
+    mngr = MultiprocessingEventManager()
+    mngr.add_composite(flight)
+    for joy in (gamepad, stick, other):
+        mngr._save_joystick(joy)
+    mngr.set_axis_table(other, AxisTable(deadband=0.1))
+    sent()
+
+    for value in (0.1, 0.5, 0.52, 0.53, 0.6):  # Inside the deadband then jitter
+        mngr._handle_key_event(Key(Key.AXIS, 0, value, make_joystick(0, 'Gamepad')))
+    mngr._handle_key_event(Key(Key.BUTTON, 3, 1, make_joystick(1, 'Stick')))
+    mngr._handle_key_event(Key(Key.AXIS, 2, 0.05, make_joystick(2, 'Other')))  # Inside the table deadband
+    mngr._handle_key_event(Key(Key.AXIS, 2, 0.55, make_joystick(2, 'Other')))
+    assert sent() == [('Gamepad', Key.AXIS, 0, 0.375), ('Gamepad', Key.AXIS, 0, 0.5),
+                      ('Flight Controls', Key.BUTTON, 5, 1), ('Other', Key.AXIS, 2, 0.5)]
+    assert gamepad.suppressed_events == 2
+
+
+def spawn_pickle(obj):
+    """Pickle the object the way the spawn start method pickles a Process."""
+    import io
+    from multiprocessing.context import set_spawning_popen
+    from multiprocessing.reduction import ForkingPickler
+
+    buf = io.BytesIO()
+    set_spawning_popen(object())
+    try:
+        ForkingPickler(buf).dump(obj)
+    finally:
+        set_spawning_popen(None)
+    return buf.getvalue()
+
+
+def test_pickle():
+    import pickle
+    import queue
+    import multiprocessing as mp
+    from pyjoystick.interface import Key
+    from pyjoystick.run_process import MultiprocessingEventManager
+
+    ctx = mp.get_context('spawn')
+    mngr = MultiprocessingEventManager(alive=ctx.Event(), collect_stats=True, queue_limit=8,
+                                       dispatch_mode=MultiprocessingEventManager.DISPATCH_ADAPTIVE)
+    mngr.add_priority_key(Key.BUTTON)
+    mngr.subscribe(lambda key: None, keytype=Key.BUTTON)  # Lambdas cannot be pickled
+
+    future = mngr.find_key_future()  # Pending find_key subscribes a local function
+
+    child = pickle.loads(spawn_pickle(mngr))
+    assert child._subscriptions == ({}, ()) and mngr._subscriptions[1]
+    assert child._run_during_lock is not mngr._run_during_lock and child._run_during_users == 0
+    future.cancel()
+    assert isinstance(child.priority_queue, queue.Queue) and child.priority_queue is not mngr.priority_queue
+    assert child.event_stats is not None and child.scheduler.interval == mngr.scheduler.interval
+    assert child.priority_keytypes == {Key.BUTTON} and child.queue_limit == 8
+    assert child.priority_queue.maxsize == mngr.priority_limit
+    assert child.event_lock is not mngr.event_lock and child.buffer_space is not None
+
+
+if __name__ == '__main__':
+    test_bounded_queue()
+    test_stats()
+    test_key_joystick()
+    test_process_key_event()
+    test_pickle()
+
+    print('All tests finished successfully!')
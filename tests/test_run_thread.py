@@ -0,0 +1,874 @@
+from helpers import make_joystick
+
+
+def test_composite_joystick():
+    from pyjoystick.interface import Key
+    from pyjoystick.composite import CompositeJoystick
+    from pyjoystick.run_thread import ThreadEventManager
+
+    keys = []
+    mngr = ThreadEventManager(handle_key_event=keys.append)
+
+    flight = CompositeJoystick('Flight Controls', mapping=[('Stick', Key.AXIS, 0), ('Stick', Key.AXIS, 1),
+                                                           ('Throttle', Key.AXIS, 0), ('Pedals', Key.AXIS, 2),
+                                                           ('Stick', Key.BUTTON, 3, 5)])
+    flight.set_deadband(0)
+    assert flight.get_numaxes() == 4 and flight.get_numbuttons() == 6
+
+    stick, throttle, pedals = make_joystick(0, 'Stick'), make_joystick(1, 'Throttle'), make_joystick(2, 'Pedals')
+    other = make_joystick(3, 'Gamepad')
+    mngr.save_joystick(stick)
+    mngr.add_composite(flight)
+    for joy in (throttle, pedals, other):
+        mngr.save_joystick(joy)
+
+    # New joystick objects for the same device like SDL events give
+    mngr.save_key_event(Key(Key.AXIS, 1, 0.5, make_joystick(0, 'Stick')))
+    mngr.save_key_event(Key(Key.AXIS, 0, 0.75, make_joystick(1, 'Throttle')))
+    mngr.save_key_event(Key(Key.AXIS, 2, -0.25, make_joystick(2, 'Pedals')))
+    mngr.save_key_event(Key(Key.BUTTON, 3, 1, make_joystick(0, 'Stick')))
+    mngr.save_key_event(Key(Key.BUTTON, 4, 1, make_joystick(0, 'Stick')))  # Not mapped
+    mngr.save_key_event(Key(Key.BUTTON, 4, 1, make_joystick(3, 'Gamepad')))
+    mngr.process_events()
+
+    found = sorted((str(k.joystick), k.keytype, k.number, k.value) for k in keys)
+    assert found == [('Flight Controls', Key.AXIS, 1, 0.5), ('Flight Controls', Key.AXIS, 2, 0.75),
+                     ('Flight Controls', Key.AXIS, 3, -0.25), ('Flight Controls', Key.BUTTON, 5, 1),
+                     ('Gamepad', Key.BUTTON, 4, 1)], found
+    assert flight.get_axis(2) == 0.75
+
+    # Removing a source joystick stops remapping
+    mngr.delete_joystick(make_joystick(1, 'Throttle'))
+    mngr.remove_composite(flight)
+    assert 'Flight Controls' not in mngr.joysticks
+
+    # Composites are sent to the event process with their mapping
+    import pickle
+    copied = pickle.loads(pickle.dumps(flight))
+    assert isinstance(copied, CompositeJoystick) and copied == flight
+    assert copied.mapping == flight.mapping and copied.tables == flight.tables and copied.sources == flight.sources
+    assert copied.get_numaxes() == 4 and copied.get_numbuttons() == 6 and not copied.passthrough
+
+    mngr.add_composite(flight)
+    state = {k: v for k, v in mngr.__getstate__().items() if k != 'alive'}
+    child = ThreadEventManager.__new__(ThreadEventManager)
+    child.__setstate__(pickle.loads(pickle.dumps(state)))
+    child.alive = mngr.alive
+    child.handle_key_event = keys.append
+    assert child.composites[0].sources == flight.sources
+    child.save_joystick(make_joystick(0, 'Stick'))  # Binds the composite remap table
+    keys.clear()
+    child.save_key_event(Key(Key.BUTTON, 3, 1, make_joystick(0, 'Stick')))
+    child.process_events()
+    assert [(str(k.joystick), k.number) for k in keys] == [('Flight Controls', 5)]
+
+
+def test_event_dispatch_mode():
+    import time
+    import threading
+    from pyjoystick.interface import Key
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy = make_joystick()
+    received = threading.Event()
+    times = []
+
+    def handle_key_event(key):
+        times.append(time.perf_counter() - key.sent)
+        received.set()
+
+    mngr = ThreadEventManager(handle_key_event=handle_key_event, dispatch_mode=ThreadEventManager.DISPATCH_EVENT,
+                              activity_timeout=10)
+    mngr.alive.set()
+    mngr.worker = mngr.start_dispatcher()
+    try:
+        mngr.save_joystick(joy)
+        for i in range(5):
+            received.clear()
+            key = Key(Key.BUTTON, 0, i % 2, joy)
+            key.sent = time.perf_counter()
+            mngr.save_key_event(key)
+            assert received.wait(1), 'Key event was not dispatched!'
+    finally:
+        mngr.stop()
+
+    assert len(times) == 5
+    assert max(times) < 0.1, times  # Not waiting for the activity_timeout
+
+
+def test_event_dispatch_held_events():
+    import time
+    from pyjoystick.interface import Key
+    from pyjoystick.coalesce import RateLimited
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy = make_joystick()
+    joy.set_deadband(0)
+    values = []
+    mngr = ThreadEventManager(handle_key_event=lambda key: values.append(key.value), activity_timeout=0.01,
+                              dispatch_mode=ThreadEventManager.DISPATCH_EVENT,
+                              coalesce_policies={Key.AXIS: RateLimited(20)})
+    mngr.save_joystick(joy)
+    mngr.alive.set()
+    mngr.worker = mngr.start_dispatcher()
+    try:
+        mngr.save_key_event(Key(Key.AXIS, 0, 0.5, joy))
+        mngr.save_key_event(Key(Key.AXIS, 0, 0.9, joy))  # Held back by the rate limit
+        start = time.time()
+        while len(values) < 2 and time.time() - start < 1:
+            time.sleep(0.01)
+    finally:
+        mngr.stop()
+
+    assert values == [0.5, 0.9]  # The held value is dispatched without another key event
+
+
+def test_double_buffered_events():
+    from pyjoystick.interface import Key
+    from pyjoystick.run_thread import ThreadEventManager
+
+    keys = []
+    mngr = ThreadEventManager(handle_key_event=lambda k: keys.append((k.keytype, k.number, k.value)))
+    joy = make_joystick()
+    joy.set_deadband(0)
+    mngr.save_joystick(joy)
+    buffers = {id(mngr.joystick_events), id(mngr._back_events)}
+
+    for i in range(3):
+        mngr.save_key_event(Key(Key.AXIS, 0, 0.5, joy))
+        mngr.save_key_event(Key(Key.AXIS, 0, 0.75, joy))  # Coalesced
+        mngr.save_key_event(Key(Key.BUTTON, i, 1, joy))
+        mngr.process_events()
+        assert keys == [(Key.AXIS, 0, 0.75), (Key.BUTTON, i, 1)], keys
+        keys.clear()
+
+        mngr.process_events()  # Nothing changed
+        assert keys == []
+
+    # The buffers are swapped and reused
+    assert {id(mngr.joystick_events), id(mngr._back_events)} == buffers
+
+    # Joysticks saved after a swap are not added again
+    added = []
+    mngr.add_joystick = added.append
+    mngr.save_key_event(Key(Key.BUTTON, 0, 0, make_joystick()))
+    mngr.process_events()
+    mngr.save_key_event(Key(Key.BUTTON, 0, 1, make_joystick()))
+    mngr.process_events()
+    assert added == []
+    assert keys == [(Key.BUTTON, 0, 0), (Key.BUTTON, 0, 1)]
+
+
+def test_ring_transport():
+    from pyjoystick.interface import Key
+    from pyjoystick.ring_buffer import RingBuffer
+    from pyjoystick.run_thread import ThreadEventManager
+
+    keys = []
+    mngr = ThreadEventManager(handle_key_event=keys.append, transport=ThreadEventManager.TRANSPORT_RING,
+                              ring_capacity=8)
+    joy, other = make_joystick(0, 'Gamepad'), make_joystick(1, 'Other')
+    joy.set_deadband(0)
+    mngr.save_joystick(joy)
+    mngr.save_joystick(other)
+
+    mngr.save_key_event(Key(Key.AXIS, 0, 0.5, make_joystick(0, 'Gamepad')))
+    mngr.save_key_event(Key(Key.BUTTON, 1, 1, joy))
+    mngr.save_key_event(Key(Key.AXIS, 0, 0.25, joy))
+    mngr.save_key_event(Key(Key.HAT, 0, Key.HAT_UP, other))
+    mngr.save_key_event(Key(Key.BUTTON, 1, 0, joy))
+    assert len(mngr.ring) == 5
+    mngr.process_events()
+
+    found = [(k.joystick, k.keytype, k.number, k.value) for k in keys]
+    assert found == [(joy, Key.AXIS, 0, 0.25), (joy, Key.BUTTON, 1, 1), (joy, Key.BUTTON, 1, 0),
+                     (other, Key.HAT, 0, Key.HAT_UP)], found
+    assert all(k.joystick is joy or k.joystick is other for k in keys)
+    assert joy.get_axis(0) == 0.25
+
+    # Overflow is counted
+    for i in range(10):
+        mngr.save_key_event(Key(Key.BUTTON, i, 1, joy))
+    assert mngr.ring.dropped == 2
+    assert mngr.get_dropped_events(joy) == 2
+
+    # Overwritten records are counted for their device
+    mngr = ThreadEventManager(transport=ThreadEventManager.TRANSPORT_RING, ring_capacity=4,
+                              ring_overflow=RingBuffer.DROP_OLDEST)
+    mngr.save_joystick(joy)
+    mngr.save_joystick(other)
+    mngr.save_key_event(Key(Key.BUTTON, 0, 1, other))
+    for i in range(5):
+        mngr.save_key_event(Key(Key.BUTTON, i, 1, joy))
+    assert mngr.get_dropped_events(other) == 1 and mngr.get_dropped_events(joy) == 1
+
+
+def test_subscribe():
+    from pyjoystick.interface import Key
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy, other = make_joystick(0, 'Gamepad'), make_joystick(1, 'Other')
+    every, found = [], []
+    mngr = ThreadEventManager(handle_key_event=every.append)
+    mngr.save_joystick(joy)
+    mngr.save_joystick(other)
+
+    def record(name):
+        return lambda key: found.append((name, str(key.joystick), str(key)))
+
+    mngr.subscribe(record('all'))
+    joy_buttons = mngr.subscribe(record('joy buttons'), joystick=joy, keytype=Key.BUTTON)
+    mngr.subscribe(record('button 1'), keytype=Key.BUTTON, number=1)
+
+    @mngr.subscribe(joystick=other)
+    def other_keys(key):
+        found.append(('other', str(key.joystick), str(key)))
+
+    mngr.save_key_event(Key(Key.BUTTON, 1, 1, joy))
+    mngr.save_key_event(Key(Key.BUTTON, 2, 1, other))
+    mngr.process_events()
+
+    assert len(every) == 2
+    assert sorted(found) == sorted([('all', 'Gamepad', 'Button 1'), ('joy buttons', 'Gamepad', 'Button 1'),
+                                    ('button 1', 'Gamepad', 'Button 1'),
+                                    ('all', 'Other', 'Button 2'), ('other', 'Other', 'Button 2')]), found
+
+    found.clear()
+    assert mngr.unsubscribe(joy_buttons, joystick=joy, keytype=Key.BUTTON)
+    assert not mngr.unsubscribe(joy_buttons, joystick=joy, keytype=Key.BUTTON)
+    assert mngr.unsubscribe(other_keys, joystick=other)
+    mngr.save_key_event(Key(Key.BUTTON, 1, 0, joy))
+    mngr.save_key_event(Key(Key.BUTTON, 2, 0, other))
+    mngr.process_events()
+    assert sorted(found) == sorted([('all', 'Gamepad', 'Button 1'), ('button 1', 'Gamepad', 'Button 1'),
+                                    ('all', 'Other', 'Button 2')]), found
+
+
+def test_handler_workers():
+    import time
+    from pyjoystick.interface import Key
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy, other = make_joystick(0, 'Slow'), make_joystick(1, 'Fast')
+    found = {joy: [], other: []}
+    finished = {}
+
+    def handle_key_event(key):
+        if key.joystick == joy:
+            time.sleep(0.01)
+        found[key.joystick].append(key.number)
+        finished[key.joystick] = time.perf_counter()
+
+    mngr = ThreadEventManager(handle_key_event=handle_key_event, handler_workers=2)
+    mngr.save_joystick(joy)
+    mngr.save_joystick(other)
+    for i in range(10):
+        mngr.save_key_event(Key(Key.BUTTON, i, 1, joy))
+        mngr.save_key_event(Key(Key.BUTTON, i, 1, other))
+
+    mngr.process_events()
+    assert mngr.executor.join(5)
+    assert found[joy] == list(range(10)) and found[other] == list(range(10))
+    assert finished[other] < finished[joy]
+
+
+def test_priority_lane():
+    import time
+    import threading
+    from pyjoystick.interface import Key
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy = make_joystick()
+    joy.set_deadband(0)
+    found = []
+    pressed = threading.Event()
+
+    def handle_key_event(key):
+        found.append(str(key))
+        if key.keytype == Key.BUTTON:
+            pressed.set()
+
+    def event_loop(add_joystick, remove_joystick, handle_key_event, alive=None):
+        add_joystick(joy)
+        for i in range(10):
+            handle_key_event(Key(Key.AXIS, 0, i / 10, joy))
+        handle_key_event(Key(Key.BUTTON, 0, 1, joy))
+        while alive():
+            time.sleep(0.01)
+
+    mngr = ThreadEventManager(event_loop, handle_key_event=handle_key_event, activity_timeout=10,
+                              priority_keys=[Key.BUTTON, (Key.HAT, 1)])
+    assert mngr.is_priority_key(Key(Key.HAT, 1, Key.HAT_UP)) and not mngr.is_priority_key(Key(Key.HAT, 0, 1))
+    with mngr:
+        assert pressed.wait(1), 'The priority key was not dispatched right away!'
+        time.sleep(0.05)
+
+    # The periodic dispatch processed the first axis event right away but the rest wait for the next dispatch
+    assert 'Button 0' in found
+    assert found.count('Axis 0') <= 1, found
+
+    # Not running dispatches right away
+    found.clear()
+    mngr.save_key_event(Key(Key.BUTTON, 1, 1, joy))
+    assert found == ['Button 1']
+
+    mngr.remove_priority_key(Key.BUTTON)
+    mngr.save_key_event(Key(Key.BUTTON, 2, 1, joy))
+    assert found == ['Button 1']
+
+
+def test_priority_lane_worker():
+    import time
+    import threading
+    from pyjoystick.interface import Key
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy = make_joystick()
+    entered = threading.Event()
+    release = threading.Event()
+    handled = []
+
+    def handle_key_event(key):
+        handled.append((key.number, threading.current_thread().name))
+        entered.set()
+        release.wait(1)
+
+    def event_loop(add_joystick, remove_joystick, handle_key_event, alive=None):
+        add_joystick(joy)
+        while alive():
+            time.sleep(0.01)
+
+    mngr = ThreadEventManager(event_loop, handle_key_event=handle_key_event, activity_timeout=10, priority_limit=2,
+                              buffer_overflow=ThreadEventManager.OVERFLOW_DROP_NEWEST)
+    with mngr:
+        # The priority lane starts when a priority key is added while running
+        assert mngr.priority_worker is None
+        mngr.add_priority_key(Key.BUTTON)
+        assert mngr.priority_worker is not None
+
+        mngr.save_key_event(Key(Key.BUTTON, 0, 1, joy))
+        assert entered.wait(1)
+        for i in range(1, 4):
+            mngr.save_key_event(Key(Key.BUTTON, i, 1, joy))  # Only 2 keys fit while the handler is busy
+        assert mngr.get_dropped_events(joy) == 1
+        release.set()
+        time.sleep(0.05)
+
+    assert [number for number, _ in handled] == [0, 1, 2]
+    assert all(name == 'pyjoystick-dispatch_priority_events' for _, name in handled)
+
+
+def test_find_key():
+    import time
+    import threading
+    from pyjoystick.interface import Key
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy, other = make_joystick(0, 'Gamepad'), make_joystick(1, 'Other')
+    handled = []
+    mngr = ThreadEventManager(handle_key_event=handled.append, dispatch_mode=ThreadEventManager.DISPATCH_EVENT)
+    mngr.save_joystick(joy)
+    mngr.save_joystick(other)
+
+    results = {}
+
+    def find(name, **kwargs):
+        results[name] = mngr.find_key(**kwargs)
+
+    mngr.alive.set()
+    mngr.worker = mngr.start_dispatcher()
+    try:
+        threads = [threading.Thread(target=find, args=('any',)),
+                   threading.Thread(target=find, args=('other',), kwargs={'joysticks': 'Other'}),
+                   threading.Thread(target=find, args=('hat',), kwargs={'key_types': [Key.HAT]}),
+                   threading.Thread(target=find, args=('timeout',), kwargs={'key_types': [Key.BALL], 'timeout': 0.1})]
+        for th in threads:
+            th.start()
+        time.sleep(0.05)
+
+        mngr.save_key_event(Key(Key.BUTTON, 0, 0, joy))  # Released buttons are not found
+        mngr.save_key_event(Key(Key.BUTTON, 1, 1, joy))
+        time.sleep(0.02)
+        mngr.save_key_event(Key(Key.BUTTON, 2, 1, other))
+        time.sleep(0.02)
+        mngr.save_key_event(Key(Key.HAT, 0, Key.HAT_UP, other))
+        for th in threads:
+            th.join(1)
+    finally:
+        mngr.stop()
+
+    assert str(results['any']) == 'Button 1' and results['any'].joystick is joy
+    assert str(results['other']) == 'Button 2' and results['other'].joystick is other
+    assert str(results['hat']) == 'Hat 0 [Up]'
+    assert results['timeout'] is None
+    assert len(handled) == 4, 'Normal dispatch stopped while finding keys!'
+    assert mngr._subscriptions == ({}, ())
+
+
+def test_find_key_run_during():
+    import time
+    import threading
+    from pyjoystick.interface import Key
+    from pyjoystick.run_thread import ThreadEventManager
+
+    def event_loop(add_joystick, remove_joystick, handle_key_event, alive=None):
+        while alive():
+            time.sleep(0.01)
+
+    joy = make_joystick(0, 'Gamepad')
+    mngr = ThreadEventManager(event_loop=event_loop, dispatch_mode=ThreadEventManager.DISPATCH_EVENT)
+    mngr.save_joystick(joy)
+
+    results = {}
+
+    def find(name, **kwargs):
+        results[name] = mngr.find_key(timeout=2, **kwargs)
+
+    # The first find_key starts the manager. The manager runs until the last find_key returns.
+    threads = [threading.Thread(target=find, args=('button',), kwargs={'key_types': [Key.BUTTON]}),
+               threading.Thread(target=find, args=('hat',), kwargs={'key_types': [Key.HAT]})]
+    for th in threads:
+        th.start()
+    time.sleep(0.05)
+    assert mngr.is_running()
+
+    mngr.save_key_event(Key(Key.BUTTON, 1, 1, joy))
+    threads[0].join(1)
+    assert str(results['button']) == 'Button 1'
+    assert mngr.is_running(), 'The manager stopped while another find_key was waiting!'
+
+    mngr.save_key_event(Key(Key.HAT, 0, Key.HAT_UP, joy))
+    threads[1].join(1)
+    assert str(results['hat']) == 'Hat 0 [Up]'
+    assert not mngr.is_running() and mngr._run_during_users == 0
+
+    # run_during does not stop a manager that was already running
+    mngr.start()
+    try:
+        with mngr.run_during():
+            pass
+        assert mngr.is_running()
+    finally:
+        mngr.stop()
+
+
+def test_bounded_buffers():
+    import time
+    import threading
+    from pyjoystick.interface import Key
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy, other = make_joystick(0, 'Gamepad'), make_joystick(1, 'Other')
+
+    # Drop oldest
+    mngr = ThreadEventManager(buffer_limit=3)
+    mngr.save_joystick(joy)
+    mngr.save_joystick(other)
+    for i in range(5):
+        mngr.save_key_event(Key(Key.BUTTON, i, 1, joy))
+    mngr.save_key_event(Key(Key.BUTTON, 0, 1, other))
+    mngr.save_key_event(Key(Key.AXIS, 0, 0.5, joy))  # Latest value axes are not bounded
+    events = mngr.clear_joystick_events()
+    assert [k.number for k in events[joy]['buttons']] == [2, 3, 4]
+    assert len(events[joy]['events']) == 1
+    assert mngr.get_dropped_events(joy) == 2 and mngr.get_dropped_events(other) == 0
+    assert mngr.get_dropped_events() == 2
+
+    # Drop newest
+    mngr = ThreadEventManager(buffer_limit=3, buffer_overflow=ThreadEventManager.OVERFLOW_DROP_NEWEST)
+    mngr.save_joystick(joy)
+    for i in range(5):
+        mngr.save_key_event(Key(Key.BUTTON, i, 1, joy))
+    assert [k.number for k in mngr.clear_joystick_events()[joy]['buttons']] == [0, 1, 2]
+    assert mngr.dropped_events == {joy: 2}
+
+    # Block until the dispatcher makes room or the timeout ends
+    mngr = ThreadEventManager(buffer_limit=2, buffer_overflow=ThreadEventManager.OVERFLOW_BLOCK, block_timeout=0.5)
+    mngr.save_joystick(joy)
+    mngr.alive.set()
+    try:
+        mngr.save_key_event(Key(Key.BUTTON, 0, 1, joy))
+        mngr.save_key_event(Key(Key.BUTTON, 1, 1, joy))
+        th = threading.Thread(target=mngr.save_key_event, args=(Key(Key.BUTTON, 2, 1, joy),))
+        th.start()
+        time.sleep(0.01)
+        assert th.is_alive(), 'The producer did not block!'
+        assert [k.number for k in mngr.clear_joystick_events()[joy]['buttons']] == [0, 1]
+        th.join(1)
+        assert [k.number for k in mngr.clear_joystick_events()[joy]['buttons']] == [2]
+        assert mngr.get_dropped_events(joy) == 0
+
+        mngr.block_timeout = 0.01
+        for i in range(3):
+            mngr.save_key_event(Key(Key.BUTTON, i, 1, joy))
+        assert mngr.get_dropped_events(joy) == 1
+    finally:
+        mngr.stop()
+
+    # Ring transport counts dropped records for each joystick
+    mngr = ThreadEventManager(transport=ThreadEventManager.TRANSPORT_RING, ring_capacity=2)
+    mngr.save_joystick(joy)
+    for i in range(3):
+        mngr.save_key_event(Key(Key.BUTTON, i, 1, joy))
+    assert mngr.get_dropped_events(joy) == 1 and mngr.ring.dropped == 1
+
+
+def test_stats():
+    from pyjoystick.interface import Key
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy = make_joystick()
+    joy.set_deadband(0)
+    handled = []
+    mngr = ThreadEventManager(handle_key_event=handled.append)
+    mngr.save_joystick(joy)
+
+    # Disabled
+    mngr.save_key_event(Key(Key.AXIS, 0, 0.5, joy))
+    mngr.process_events()
+    assert mngr.stats() == {'enabled': False, 'dropped': {}}
+
+    mngr.enable_stats()
+    for i in range(5):
+        mngr.save_key_event(Key(Key.AXIS, 0, i / 10 + 0.1, joy))
+    mngr.save_key_event(Key(Key.BUTTON, 0, 1, joy))
+    mngr.save_key_event(Key(Key.BUTTON, 0, 0, joy))
+    mngr.process_events()
+
+    stats = mngr.stats()
+    assert stats['enabled']
+    assert stats['received'] == {joy: {Key.AXIS: 5, Key.BUTTON: 2}}
+    assert stats['coalesced'] == 4
+    assert stats['handler_calls'] == 3 and len(handled) == 4
+    assert stats['high_water']['buffer'] == 3
+    assert stats['tick']['count'] == 1 and stats['tick']['last'] > 0
+    assert stats['latency']['count'] == 3 and stats['latency']['min'] > 0
+
+    mngr.reset_stats()
+    stats = mngr.stats()
+    assert stats['received'] == {} and stats['handler_calls'] == 0 and stats['latency']['count'] == 0
+
+    mngr.enable_stats(False)
+    assert mngr.event_stats is None
+
+
+def test_profiler():
+    from pyjoystick.interface import Key
+    from pyjoystick.button_repeater import ButtonRepeater
+    from pyjoystick.profiler import HandlerProfiler
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy = make_joystick()
+    added, handled, subscribed = [], [], []
+    profiler = HandlerProfiler()
+    mngr = ThreadEventManager(add_joystick=added.append, handle_key_event=handled.append,
+                              button_repeater=ButtonRepeater(), profiler=profiler)
+    mngr.subscribe(subscribed.append, keytype=Key.BUTTON)
+    mngr.save_joystick(joy)
+    mngr.save_key_event(Key(Key.BUTTON, 0, 1, joy))
+    mngr.process_events()
+    mngr.button_repeater.key_repeated(Key(Key.BUTTON, 0, 1, joy))
+
+    calls = {row['func']: row['calls'] for row in profiler.top(None)}
+    assert calls[added.append] == 1 and calls[handled.append] == 1 and calls[subscribed.append] == 1
+    assert calls[mngr._update_key_event] == 1
+
+    # Stop profiling
+    mngr.profiler = None
+    profiler.reset()
+    mngr.save_key_event(Key(Key.BUTTON, 1, 1, joy))
+    mngr.process_events()
+    mngr.button_repeater.key_repeated(Key(Key.BUTTON, 1, 1, joy))
+    assert profiler.top() == [] and len(handled) == 3  # Includes the first repeated key
+
+
+def test_axis_table():
+    from pyjoystick.interface import Key
+    from pyjoystick.axis_response import AxisTable
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy = make_joystick()
+    mngr = ThreadEventManager()
+    mngr.save_joystick(joy)
+
+    table = AxisTable(deadband=0.1)
+    table.set_pair(0, 1, deadband=0.2)
+    mngr.set_axis_table(joy, table)
+    assert mngr.get_axis_table(joy) is table
+
+    def saved():
+        events = mngr.clear_joystick_events()[joy]['events']
+        return {key.number: value for key, value in events.items()}
+
+    mngr.save_key_event(Key(Key.AXIS, 0, 0.15, joy))  # Inside the radial deadband
+    mngr.save_key_event(Key(Key.AXIS, 2, 0.05, joy))
+    assert saved() == {}
+
+    mngr.save_key_event(Key(Key.AXIS, 1, 0.15, joy))  # Both axes leave the radial deadband
+    values = saved()
+    assert set(values) == {0, 1} and values[0] == values[1] > 0
+    assert joy.get_axis(0) == joy.get_axis(1) == values[0]
+
+    mngr.save_key_event(Key(Key.AXIS, 1, 0, joy))  # Both axes return to rest
+    assert saved() == {0: 0, 1: 0}
+
+    mngr.save_key_event(Key(Key.AXIS, 2, 0.55, joy))
+    assert round(saved()[2], 4) == 0.5
+
+    # Without a table the joystick deadband is used
+    mngr.set_axis_table(joy, None)
+    mngr.save_key_event(Key(Key.AXIS, 1, 0.15, joy))
+    assert saved() == {}
+
+
+def test_poll():
+    import time
+    from pyjoystick.interface import Key
+    from pyjoystick.coalesce import RateLimited
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy = make_joystick()
+    joy.set_deadband(0)
+    handled = []
+
+    def event_loop(add_joystick, remove_joystick, handle_key_event, alive=None):
+        add_joystick(joy)
+        for i in range(5):
+            handle_key_event(Key(Key.AXIS, 0, (i + 1) / 10, joy))
+        handle_key_event(Key(Key.BUTTON, 0, 1, joy))
+        handle_key_event(Key(Key.HAT, 0, Key.HAT_UP, joy))
+        handle_key_event(Key(Key.BUTTON, 0, 0, joy))
+        while alive():
+            time.sleep(0.01)
+
+    mngr = ThreadEventManager(event_loop, handle_key_event=handled.append,
+                              dispatch_mode=ThreadEventManager.DISPATCH_POLL)
+    with mngr:
+        assert mngr.worker is None
+        time.sleep(0.05)
+        events = mngr.poll()
+        assert list(events) == [joy]
+        assert [(str(key), value) for key, value in events[joy]['events'].items()] == [('Axis 0', 0.5)]
+        assert [(str(key), key.value) for key in events[joy]['buttons']] == \
+            [('Button 0', 1), ('Hat 0 [Up]', Key.HAT_UP), ('Button 0', 0)]
+
+        # Nothing new since the last poll
+        events = mngr.poll()
+        assert all(not items['events'] and not items['buttons'] for items in events.values())
+    assert handled == []
+
+    # Held coalesced events are returned when they are due
+    clock = [0]
+    mngr = ThreadEventManager(dispatch_mode=ThreadEventManager.DISPATCH_POLL,
+                              coalesce_policies={Key.AXIS: RateLimited(10, clock=lambda: clock[0])})
+    mngr.save_joystick(joy)
+    assert not mngr.has_held_events()
+    mngr.save_key_event(Key(Key.AXIS, 1, 0.5, joy))
+    mngr.save_key_event(Key(Key.AXIS, 1, 0.75, joy))
+    assert mngr.has_held_events()
+    assert list(mngr.poll()[joy]['events'].values()) == [0.5]
+    clock[0] = 1
+    assert list(mngr.poll()[joy]['events'].values()) == [0.75]
+
+    # Ring transport
+    mngr = ThreadEventManager(dispatch_mode=ThreadEventManager.DISPATCH_POLL,
+                              transport=ThreadEventManager.TRANSPORT_RING)
+    mngr.save_joystick(joy)
+    mngr.save_key_event(Key(Key.AXIS, 2, 0.5, joy))
+    mngr.save_key_event(Key(Key.BUTTON, 1, 1, joy))
+    events = mngr.poll()
+    assert [str(key) for key in events[joy]['events']] == ['Axis 2']
+    assert [str(key) for key in events[joy]['buttons']] == ['Button 1']
+
+    # Keys from two joysticks of the same model resolve to the joystick with the same id
+    pad0, pad1 = make_joystick(0, 'Gamepad'), make_joystick(1, 'Gamepad')
+    mngr = ThreadEventManager(dispatch_mode=ThreadEventManager.DISPATCH_POLL)
+    mngr.save_joystick(pad0)
+    mngr.save_joystick(pad1)
+    mngr.save_key_event(Key(Key.BUTTON, 1, 1, make_joystick(1, 'Gamepad')))
+    events = mngr.poll()
+    assert not events[pad0]['buttons'] and events[pad1]['buttons'][0].joystick is pad1
+    mngr.delete_joystick(make_joystick(1, 'Gamepad'))
+    assert list(mngr.joysticks) == [pad0] and pad1 not in mngr._saved_joysticks
+
+
+def test_batch_handler():
+    import math
+    from pyjoystick.interface import Key, KeyTypes
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy, other = make_joystick(0, 'Gamepad'), make_joystick(1, 'Other')
+    joy.set_deadband(0)
+    batches = []
+
+    def save_keys(mngr):
+        mngr.save_joystick(joy)
+        mngr.save_joystick(other)
+        mngr.save_key_event(Key(Key.AXIS, 0, 0.25, joy))
+        mngr.save_key_event(Key(Key.AXIS, 0, 0.5, joy))
+        mngr.save_key_event(Key(Key.BUTTON, 0, 1, joy))
+        mngr.save_key_event(Key(Key.BUTTON, 1, 1, other))
+        mngr.process_events()
+
+    # One batch for the dispatch without per key handlers
+    mngr = ThreadEventManager(handle_key_events=lambda keys: batches.append([str(k) for k in keys]))
+    assert mngr.has_batch_handler() and not mngr.has_key_handlers()
+    save_keys(mngr)
+    assert batches == [['Axis 0', 'Button 0', 'Button 1']]
+
+    # One batch per joystick and the per key handler still works
+    batches.clear()
+    handled = []
+    mngr = ThreadEventManager(handle_key_event=handled.append, batch_per_device=True,
+                              handle_key_events=lambda keys: batches.append([str(k) for k in keys]))
+    save_keys(mngr)
+    assert batches == [['Axis 0', 'Button 0'], ['Button 1']]
+    assert [str(k) for k in handled] == ['Axis 0', 'Button 0', 'Button 1']
+
+    # Columnar batch
+    batches.clear()
+    mngr = ThreadEventManager(handle_key_events=batches.append, batch_columns=True)
+    save_keys(mngr)
+    columns = batches[0]
+    assert list(columns.devices) == [0, 0, 1]
+    assert [KeyTypes.from_code(code) for code in columns.types] == [Key.AXIS, Key.BUTTON, Key.BUTTON]
+    assert list(columns.numbers) == [0, 0, 1] and list(columns.values) == [0.5, 1, 1]
+    assert not any(math.isnan(t) for t in columns.timestamps)  # Timestamped without stats
+
+    # Subclass batch handler
+    class BatchManager(ThreadEventManager):
+        def handle_key_events(self, batch):
+            batches.append(len(batch))
+
+    batches.clear()
+    save_keys(BatchManager())
+    assert batches == [3]
+
+
+def test_history():
+    from pyjoystick.interface import Key
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy = make_joystick()
+    mngr = ThreadEventManager(record_history=True, history_capacity=10)
+    mngr.save_joystick(joy)
+    for i in range(15):
+        mngr.save_key_event(Key(Key.AXIS, 0, (i + 1) / 15, joy))  # Recorded before the events are coalesced
+    mngr.save_key_event(Key(Key.AXIS, 1, 0.1, joy))  # Inside the deadband
+    mngr.save_key_event(Key(Key.BUTTON, 2, 1, joy))
+
+    history = mngr.history.get(joy)
+    times, values = history.window(Key.AXIS, 0)
+    assert len(values) == 10 and values[-1] == 1 and list(times) == sorted(times)
+    assert [list(a) for a in history.window(Key.AXIS, 1)] == [[], []]
+    assert history.value_at(Key.BUTTON, 2, times[-1]) is None
+    assert history.state_at(history.clock())[(Key.BUTTON, 2)] == 1
+
+    mngr.enable_history(False)
+    assert mngr.history is None
+    mngr.save_key_event(Key(Key.BUTTON, 3, 1, joy))
+
+
+def test_consumers():
+    import threading
+    from pyjoystick.interface import Key
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy = make_joystick()
+    mngr = ThreadEventManager(dispatch_mode=ThreadEventManager.DISPATCH_POLL)
+    mngr.save_joystick(joy)
+
+    release = threading.Event()
+    fast_keys = []
+    fast_done = threading.Event()
+
+    def slow(key):
+        release.wait(2)
+
+    def fast(key):
+        fast_keys.append(key)
+        if len(fast_keys) == 3:
+            fast_done.set()
+
+    slow_consumer = mngr.add_consumer(slow, name='slow', queue_limit=1)
+    fast_consumer = mngr.add_consumer(fast, name='fast')
+    pull = mngr.add_consumer(name='pull')
+    mngr.alive.set()
+    for consumer in mngr.consumers:
+        consumer.start()
+    try:
+        keys = [Key(Key.BUTTON, i, 1, joy) for i in range(3)]
+        for key in keys:
+            mngr.save_key_event(key)
+        assert fast_done.wait(1)  # Not held up by the slow consumer
+        assert all(a is b for a, b in zip(fast_keys, keys))  # Fanned out by reference
+        assert [k.number for k in pull.poll_keys()] == [0, 1, 2]
+        assert mngr.poll()[joy]['buttons'] == keys  # The manager's own buffer still has the keys
+        assert mngr.stats()['consumers']['fast'] == {'delivered': 3, 'dropped': 0}
+    finally:
+        release.set()
+        mngr.stop()
+    assert not fast_consumer.is_running() and not slow_consumer.is_running()
+    assert mngr.stats()['consumers']['slow']['dropped'] >= 1
+
+    mngr.remove_consumer(fast_consumer)
+    assert fast_consumer not in mngr.consumers and len(mngr.consumers) == 2
+
+
+def test_adaptive_dispatch():
+    import time
+    import threading
+    from pyjoystick.interface import Key
+    from pyjoystick.run_thread import ThreadEventManager
+
+    joy = make_joystick()
+    handled = threading.Event()
+    mngr = ThreadEventManager(handle_key_event=lambda key: handled.set(), activity_timeout=0.01,
+                              dispatch_mode=ThreadEventManager.DISPATCH_ADAPTIVE, min_interval=0.001,
+                              max_interval=0.01)
+    assert mngr.stats()['dispatch']['interval'] == 0.01
+    mngr.save_joystick(joy)
+    mngr.alive.set()
+    mngr.worker = mngr.start_dispatcher()
+    try:
+        # Idle until the dispatcher stops waking
+        start = time.time()
+        while not mngr.scheduler.sleeping and time.time() - start < 2:
+            time.sleep(0.01)
+        assert mngr.scheduler.sleeping
+
+        mngr.save_key_event(Key(Key.BUTTON, 0, 1, joy))
+        assert handled.wait(1)
+        time.sleep(0.01)
+    finally:
+        mngr.stop()
+
+    stats = mngr.stats()['dispatch']
+    assert 0.001 <= stats['interval'] <= 0.01
+    assert stats['adjustments']['sleep'] >= 1 and stats['adjustments']['wake'] >= 1
+    assert all(0.001 <= interval <= 0.01 for _, interval, _ in stats['recent'])
+
+
+if __name__ == '__main__':
+    test_composite_joystick()
+    test_event_dispatch_mode()
+    test_event_dispatch_held_events()
+    test_double_buffered_events()
+    test_ring_transport()
+    test_subscribe()
+    test_handler_workers()
+    test_priority_lane()
+    test_priority_lane_worker()
+    test_find_key()
+    test_find_key_run_during()
+    test_bounded_buffers()
+    test_stats()
+    test_profiler()
+    test_axis_table()
+    test_poll()
+    test_batch_handler()
+    test_history()
+    test_consumers()
+    test_adaptive_dispatch()
+
+    print('All tests finished successfully!')
@@ -0,0 +1,60 @@
+
+def test_latency_histogram():
+    from pyjoystick.stats import LatencyHistogram
+
+    hist = LatencyHistogram(significant_bits=4)
+    assert hist.percentile(50) is None
+
+    for value in range(16):
+        assert hist.bucket(value) == (value, value)  # Small values are exact
+    assert hist.bucket(1000) == (960, 1023)
+    assert hist.bucket(1000000) == (983040, 1048575)
+
+    for value in [100] * 90 + [1000] * 9 + [100000]:
+        hist.record(value)
+    snapshot = hist.snapshot()
+    assert snapshot['count'] == 100 and snapshot['min'] == 100 and snapshot['max'] == 100000
+    assert snapshot['mean'] == (100 * 90 + 1000 * 9 + 100000) / 100
+    assert 100 <= snapshot['p50'] <= 103
+    assert 1000 <= snapshot['p99'] <= 1023
+    assert snapshot['p999'] == 100000
+    assert [count for lower, upper, count in snapshot['buckets']] == [90, 9, 1]
+
+    hist.reset()
+    assert hist.count == 0 and hist.buckets == {}
+
+
+def test_event_stats():
+    import time
+    from pyjoystick.interface import Key, Joystick
+    from pyjoystick.stats import EventStats
+
+    joy = Joystick()
+    stats = EventStats()
+    key = Key(Key.BUTTON, 0, 1, joy)
+    key.timestamp = time.perf_counter()
+    stats.add_received(key)
+    stats.add_received(Key(Key.AXIS, 0, 0.5, joy))
+    stats.add_received(Key(Key.AXIS, 1, 0.5, joy))
+    stats.add_handler_call(key)
+    stats.add_handler_call(Key(Key.AXIS, 0, 0.5, joy))  # No timestamp
+    stats.add_depth('buffer', 3)
+    stats.add_depth('buffer', 1)
+    stats.add_tick(2000)
+
+    snapshot = stats.snapshot()
+    assert snapshot['received'] == {joy: {Key.BUTTON: 1, Key.AXIS: 2}}
+    assert snapshot['handler_calls'] == 2 and snapshot['latency']['count'] == 1
+    assert snapshot['high_water'] == {'buffer': 3}
+    assert snapshot['tick']['last'] == 2000 and snapshot['tick']['count'] == 1
+
+    stats.reset()
+    snapshot = stats.snapshot()
+    assert snapshot['received'] == {} and snapshot['handler_calls'] == 0 and snapshot['tick']['count'] == 0
+
+
+if __name__ == '__main__':
+    test_latency_histogram()
+    test_event_stats()
+
+    print('All tests finished successfully!')
@@ -13,6 +13,47 @@ def test_rescale():
     assert rescale(180, curr_min=-180, curr_max=180, new_min=0, new_max=360) == 360
 
 
+def test_numpy_kernels():
+    from pyjoystick.utils import deadband, rescale, deadband_array, rescale_array, hat_to_range_array, \
+        hat_from_range_array
+    from pyjoystick.interface import HatValues
+
+    try:
+        import numpy as np
+    except ImportError:
+        # NumPy is optional
+        try:
+            deadband_array([0.5])
+            raise AssertionError('deadband_array did not raise an ImportError without NumPy!')
+        except ImportError:
+            pass
+        return
+
+    values = np.linspace(-1, 1, 2001)
+    for dead in (0, 0.2, -0.3, 1):
+        assert (deadband_array(values, dead) == [deadband(v, dead) for v in values]).all(), dead
+    percent = np.linspace(-100, 100, 201)
+    assert (deadband_array(percent, 20, scale=100) == [deadband(v, 20, scale=100) for v in percent]).all()
+    out = np.empty(len(values))
+    assert deadband_array(values, out=out) is out
+
+    # Int32
+    raw = np.arange(-32768, 32768, 7)
+    expected = [rescale(int(v), curr_min=-32768, curr_max=32767, new_min=-1, new_max=1) for v in raw]
+    assert (rescale_array(raw, curr_min=-32768, curr_max=32767, new_min=-1, new_max=1) == expected).all()
+
+    hats = np.array([0, 1, 2, 3, 4, 6, 8, 9, 12])
+    ranges = hat_to_range_array(hats)
+    assert [tuple(r) for r in ranges.tolist()] == [HatValues.as_range(int(h)) for h in hats]
+    assert (hat_from_range_array(ranges) == hats).all()
+    for invalid in ([5], [16], [-1]):
+        try:
+            hat_to_range_array(invalid)
+            raise AssertionError('Invalid hat value did not raise an error!')
+        except ValueError:
+            pass
+
+
 def test_periodic_thread():
     import time
     from pyjoystick.utils import PeriodicThread
@@ -40,8 +81,176 @@ def test_periodic_thread():
     assert all(round(t, precision) == test_interval for t in diff), diff
 
 
+def test_periodic_thread_schedule():
+    import time
+    import threading
+    from pyjoystick.utils import PeriodicThread
+
+    # Calls start on the schedule no matter how long they run
+    li = []
+
+    def run():
+        li.append(time.monotonic())
+        time.sleep(0.01)
+
+    tmr = PeriodicThread(0.03, run)
+    tmr.start()
+    while len(li) < 6:
+        time.sleep(0.01)
+    tmr.join()
+    assert 0.14 <= li[5] - li[0] < 0.2, li[5] - li[0]
+    jitter = tmr.get_jitter()
+    assert jitter['count'] >= 6 and 0 <= jitter['mean'] <= jitter['max'] and jitter['missed'] == 0
+
+    # Stop wakes the thread right away
+    called = threading.Event()
+    tmr = PeriodicThread(10, called.set)
+    tmr.start()
+    assert called.wait(1)
+    start = time.monotonic()
+    tmr.join(1)
+    assert not tmr.is_alive() and time.monotonic() - start < 0.5
+
+    # Overrun policies
+    tmr = PeriodicThread(1, overrun=PeriodicThread.SKIP)
+    assert tmr.next_deadline(10, 10.5) == 11
+    assert tmr.next_deadline(10, 13.5) == 14 and tmr.missed == 3
+    tmr = PeriodicThread(1, overrun=PeriodicThread.CATCH_UP)
+    assert tmr.next_deadline(10, 13.5) == 11
+    tmr = PeriodicThread(1, overrun=PeriodicThread.REALIGN)
+    assert tmr.next_deadline(10, 13.5) == 14.5
+
+    # An interval of 0 runs back to back with every overrun policy
+    for overrun in (PeriodicThread.SKIP, PeriodicThread.CATCH_UP, PeriodicThread.REALIGN):
+        tmr = PeriodicThread(0, overrun=overrun)
+        assert tmr.next_deadline(10, 13.5) == 13.5 and tmr.missed == 0
+    called = threading.Event()
+    tmr = PeriodicThread(0, called.set)
+    tmr.start()
+    assert called.wait(1)
+    tmr.join(1)
+    assert not tmr.is_alive()
+    try:
+        PeriodicThread(1, overrun='other')
+        raise AssertionError('Invalid overrun policy did not raise an error!')
+    except ValueError:
+        pass
+
+
+def test_periodic_thread_precision():
+    import time
+    from pyjoystick.utils import PeriodicThread
+
+    li = []
+    tmr = PeriodicThread(0.002, lambda: li.append(time.monotonic()), precision=True, spin_budget=0.0005)
+    tmr.start()
+    while len(li) < 50:
+        time.sleep(0.01)
+    tmr.join()
+
+    assert 0.09 <= li[49] - li[0] < 0.15, li[49] - li[0]
+    cost = tmr.get_spin_cost()
+    assert cost['estimate'] == 0.25
+    assert cost['spin_time'] > 0 and 0 < cost['measured'] <= 1
+    assert tmr.get_jitter()['mean'] < 0.002
+
+    # Not spinning in the normal mode
+    tmr = PeriodicThread(0.002)
+    assert tmr.get_spin_cost()['estimate'] == 0
+
+
+def test_adaptive_interval():
+    import pickle
+    from pyjoystick.utils import AdaptiveInterval
+
+    sched = AdaptiveInterval(min_interval=0.01, max_interval=0.08, interval=0.04, idle_ticks=2, busy_events=10)
+    assert sched.interval == 0.04
+
+    assert sched.update(1) == 0.02  # Events shrink the interval
+    assert sched.update(1) == 0.01
+    assert sched.update(1) == 0.01  # Stays inside the min bound
+    assert sched.update(0) == 0.01  # Waits for idle_ticks before growing
+    assert sched.update(0) == 0.015
+    assert sched.update(0) == 0.0225
+    assert sched.update(12) == 0.01  # Busy
+    for _ in range(10):
+        sched.update(0)
+    assert sched.interval == 0.08 and sched.update(0, held=True) == 0.08
+    assert sched.update(0) is None and sched.sleeping
+    sched.wake()
+    assert sched.interval == 0.01 and not sched.sleeping
+    sched.update(0)
+    sched.update(0)
+    assert sched.update(0, dropped=2) == 0.01
+
+    snapshot = sched.snapshot()
+    assert snapshot['interval'] == 0.01 and snapshot['last_reason'] == 'dropped'
+    assert snapshot['adjustments'] == {'events': 2, 'idle': 10, 'busy': 1, 'sleep': 2, 'wake': 1, 'dropped': 1}
+    assert [reason for _, _, reason in snapshot['recent']][:3] == ['events', 'events', 'idle']
+
+    copied = sched.copy()
+    assert copied.interval == 0.04 and copied.snapshot()['adjustments'] == {}
+
+    # Only the settings are pickled
+    unpickled = pickle.loads(pickle.dumps(sched))
+    assert unpickled.interval == 0.04 and unpickled.snapshot()['adjustments'] == {}
+    assert unpickled.min_interval == 0.01 and unpickled.max_interval == 0.08 and unpickled.idle_ticks == 2
+    assert unpickled.lock is not sched.lock
+
+    try:
+        AdaptiveInterval(min_interval=0.1, max_interval=0.01)
+        raise AssertionError('Invalid bounds were accepted')
+    except ValueError:
+        pass
+
+
+def test_ordered_executor():
+    import time
+    import threading
+    from pyjoystick.utils import OrderedExecutor
+
+    executor = OrderedExecutor(max_workers=2)
+    results = {'slow': [], 'fast': []}
+    fast_done = threading.Event()
+
+    def run(name, i, sleep):
+        time.sleep(sleep)
+        results[name].append(i)
+        if name == 'fast' and i == 9:
+            fast_done.set()
+
+    for i in range(10):
+        executor.submit('slow', run, 'slow', i, 0.02)
+        executor.submit('fast', run, 'fast', i, 0)
+
+    assert fast_done.wait(1)
+    assert len(results['slow']) < 10, 'The slow order key blocked the fast order key!'
+    assert executor.join(5)
+    assert results['slow'] == list(range(10))
+    assert results['fast'] == list(range(10))
+
+    # Drop the oldest waiting calls
+    executor = OrderedExecutor(max_workers=1, queue_limit=2, overflow=OrderedExecutor.DROP_OLDEST)
+    started, blocker = threading.Event(), threading.Event()
+    found = []
+    executor.submit('key', lambda: started.set() or blocker.wait())
+    assert started.wait(1)
+    for i in range(5):
+        executor.submit('key', found.append, i)
+    blocker.set()
+    assert executor.join(5)
+    assert found == [3, 4]
+    assert executor.dropped == 3
+    executor.shutdown()
+
+
 if __name__ == '__main__':
     test_rescale()
+    test_numpy_kernels()
     test_periodic_thread()
+    test_periodic_thread_schedule()
+    test_periodic_thread_precision()
+    test_adaptive_interval()
+    test_ordered_executor()
 
     print('All tests finished successfully!')